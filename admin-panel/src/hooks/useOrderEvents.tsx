@@ -0,0 +1,46 @@
+import { useEffect, useRef } from 'react';
+import { useQueryClient } from 'react-query';
+import { ordersAPI } from '../services/api';
+import { OrderEvent } from '../types';
+
+const RECONNECT_DELAY_MS = 3000;
+// Events arriving together (e.g. a bulk status change) trigger one refetch
+const REFRESH_DEBOUNCE_MS = 300;
+
+// Keeps order queries fresh from the server's event stream instead of polling
+export const useOrderEvents = (onEvent?: (event: OrderEvent) => void): void => {
+  const queryClient = useQueryClient();
+  const onEventRef = useRef(onEvent);
+  onEventRef.current = onEvent;
+
+  useEffect(() => {
+    const controller = new AbortController();
+    let refreshTimer: ReturnType<typeof setTimeout> | undefined;
+
+    const handleEvent = (event: OrderEvent) => {
+      onEventRef.current?.(event);
+      clearTimeout(refreshTimer);
+      refreshTimer = setTimeout(() => {
+        queryClient.invalidateQueries('orders');
+        queryClient.invalidateQueries('order');
+      }, REFRESH_DEBOUNCE_MS);
+    };
+
+    const connect = async () => {
+      while (!controller.signal.aborted) {
+        try {
+          await ordersAPI.streamEvents(handleEvent, controller.signal);
+        } catch (error) {
+          if (controller.signal.aborted) return;
+        }
+        await new Promise((resolve) => setTimeout(resolve, RECONNECT_DELAY_MS));
+      }
+    };
+    connect();
+
+    return () => {
+      controller.abort();
+      clearTimeout(refreshTimer);
+    };
+  }, [queryClient]);
+};
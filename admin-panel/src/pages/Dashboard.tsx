@@ -9,7 +9,7 @@ import {
   TagsOutlined
 } from '@ant-design/icons';
 import { useQuery, useQueryClient } from 'react-query';
-import { ordersAPI, usersAPI, productsAPI, categoriesAPI } from '../services/api';
+import { dashboardAPI } from '../services/api';
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer } from 'recharts';
 import { useResponsive } from '../hooks/useResponsive';
 import ErrorAlert from '../components/ErrorAlert';
@@ -18,25 +18,21 @@ const Dashboard: React.FC = () => {
   const { isMobile, isTablet } = useResponsive();
   const queryClient = useQueryClient();
   
-  const { data: orderStats, error: orderStatsError, isLoading: orderStatsLoading, refetch: refetchOrderStats } = useQuery('order-stats', () => ordersAPI.getStats());
-  const { data: userStats, error: userStatsError, isLoading: userStatsLoading, refetch: refetchUserStats } = useQuery('user-stats', () => usersAPI.getStats());
-  const { data: productStats, error: productStatsError, isLoading: productStatsLoading, refetch: refetchProductStats } = useQuery('product-stats', () => productsAPI.getStats());
-  const { data: recentOrders, error: recentOrdersError, isLoading: recentOrdersLoading, refetch: refetchRecentOrders } = useQuery('recent-orders', () => 
-    ordersAPI.getAll(1, isMobile ? 3 : 5)
+  // One request for every section of the page
+  const { data: summary, error: summaryError, refetch: refetchSummary } = useQuery(
+    ['dashboard-summary', isMobile],
+    () => dashboardAPI.getSummary(isMobile ? 3 : 5)
   );
+  const orderStats = summary?.orders;
+  const userStats = summary?.users;
+  const productStats = summary?.products;
 
-  // Check if any critical data failed to load
-  const hasError = orderStatsError || userStatsError || productStatsError || recentOrdersError;
-
-  const chartData = [
-    { name: 'Пн', orders: 12, revenue: 1200 },
-    { name: 'Вт', orders: 19, revenue: 1900 },
-    { name: 'Ср', orders: 15, revenue: 1500 },
-    { name: 'Чт', orders: 22, revenue: 2200 },
-    { name: 'Пт', orders: 28, revenue: 2800 },
-    { name: 'Сб', orders: 35, revenue: 3500 },
-    { name: 'Нд', orders: 30, revenue: 3000 },
-  ];
+  const weekdayNames = ['Нд', 'Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб'];
+  const chartData = (summary?.last_7_days || []).map((day) => ({
+    name: weekdayNames[new Date(day.day).getDay()],
+    orders: day.orders,
+    revenue: day.revenue,
+  }));
 
   const columns = [
     {
@@ -84,32 +80,11 @@ const Dashboard: React.FC = () => {
       <h1 style={{ marginBottom: 24 }}>Панель управління</h1>
       
       {/* Show error alerts if any data failed to load */}
-      {orderStatsError && (
-        <ErrorAlert 
-          error={orderStatsError} 
-          onRetry={() => refetchOrderStats()}
-          message="Не вдалося завантажити статистику замовлень"
-        />
-      )}
-      {userStatsError && (
-        <ErrorAlert 
-          error={userStatsError} 
-          onRetry={() => refetchUserStats()}
-          message="Не вдалося завантажити статистику користувачів"
-        />
-      )}
-      {productStatsError && (
-        <ErrorAlert 
-          error={productStatsError} 
-          onRetry={() => refetchProductStats()}
-          message="Не вдалося завантажити статистику товарів"
-        />
-      )}
-      {recentOrdersError && (
+      {summaryError && (
         <ErrorAlert 
-          error={recentOrdersError} 
-          onRetry={() => refetchRecentOrders()}
-          message="Не вдалося завантажити останні замовлення"
+          error={summaryError} 
+          onRetry={() => refetchSummary()}
+          message="Не вдалося завантажити дані панелі"
         />
       )}
       
@@ -242,7 +217,7 @@ const Dashboard: React.FC = () => {
       <Card title="Останні замовлення">
         <Table
           columns={columns}
-          dataSource={recentOrders?.items || []}
+          dataSource={summary?.recent_orders || []}
           rowKey="id"
           pagination={false}
         />
@@ -25,7 +25,8 @@ import {
 } from '@ant-design/icons';
 import { useQuery, useMutation, useQueryClient } from 'react-query';
 import { ordersAPI } from '../services/api';
-import { Order, OrderItem } from '../types';
+import { useOrderEvents } from '../hooks/useOrderEvents';
+import { Order, OrderItem, OrderSummary } from '../types';
 import dayjs, { Dayjs } from 'dayjs';
 import { saveAs } from 'file-saver';
 
@@ -34,12 +35,19 @@ const { Option } = Select;
 
 const Orders: React.FC = () => {
   const [isModalVisible, setIsModalVisible] = useState(false);
-  const [selectedOrder, setSelectedOrder] = useState<Order | null>(null);
+  const [selectedOrderId, setSelectedOrderId] = useState<number | null>(null);
   const [statusFilter, setStatusFilter] = useState<string>('all');
   const [dateRange, setDateRange] = useState<[Dayjs | null, Dayjs | null] | null>(null);
   const [searchText, setSearchText] = useState('');
   const queryClient = useQueryClient();
 
+  // New orders and status changes made elsewhere show up without reloading
+  useOrderEvents((event) => {
+    if (event.type === 'order.created') {
+      message.info(`Нове замовлення #${event.order_id}`);
+    }
+  });
+
   const { data: ordersData, isLoading } = useQuery(
     ['orders', statusFilter, dateRange, searchText], 
     () => ordersAPI.getAll(
@@ -47,7 +55,8 @@ const Orders: React.FC = () => {
       100,
       statusFilter !== 'all' ? statusFilter : undefined,
       dateRange?.[0] ? dateRange[0].format('YYYY-MM-DD') : undefined,
-      dateRange?.[1] ? dateRange[1].format('YYYY-MM-DD') : undefined
+      dateRange?.[1] ? dateRange[1].format('YYYY-MM-DD') : undefined,
+      searchText.trim() || undefined
     )
   );
 
@@ -57,6 +66,7 @@ const Orders: React.FC = () => {
     {
       onSuccess: () => {
         queryClient.invalidateQueries('orders');
+        queryClient.invalidateQueries('order');
         message.success('Статус замовлення оновлено!');
       },
       onError: () => {
@@ -65,8 +75,15 @@ const Orders: React.FC = () => {
     }
   );
 
-  const handleViewOrder = (order: Order) => {
-    setSelectedOrder(order);
+  // The list only carries summaries; details are loaded when an order is opened
+  const { data: selectedOrder } = useQuery(
+    ['order', selectedOrderId],
+    () => ordersAPI.getById(selectedOrderId as number),
+    { enabled: selectedOrderId !== null }
+  );
+
+  const handleViewOrder = (order: OrderSummary) => {
+    setSelectedOrderId(order.id);
     setIsModalVisible(true);
   };
 
@@ -111,14 +128,8 @@ const Orders: React.FC = () => {
     evening: 'Вечір (16:00-20:00)',
   };
 
-  const filteredOrders = ordersData?.items?.filter(order => {
-    const matchesSearch = 
-      order.contact_name.toLowerCase().includes(searchText.toLowerCase()) ||
-      order.id.toString().includes(searchText) ||
-      order.contact_phone?.toLowerCase().includes(searchText.toLowerCase());
-    
-    return matchesSearch;
-  });
+  // Searching happens on the server
+  const filteredOrders = ordersData?.items;
 
   const columns = [
     {
@@ -130,7 +141,7 @@ const Orders: React.FC = () => {
     {
       title: 'Клієнт',
       key: 'customer',
-      render: (_: any, record: Order) => (
+      render: (_: any, record: OrderSummary) => (
         <div>
           <div style={{ fontWeight: 500 }}>{record.contact_name}</div>
           {record.contact_phone && (
@@ -143,12 +154,12 @@ const Orders: React.FC = () => {
     },
     {
       title: 'Товари',
-      dataIndex: 'items',
-      key: 'items',
-      render: (items: OrderItem[]) => (
+      dataIndex: 'items_count',
+      key: 'items_count',
+      render: (itemsCount: number) => (
         <div>
           <Tag icon={<ShoppingCartOutlined />} color="blue">
-            {items.length} товар{items.length !== 1 ? 'ів' : ''}
+            {itemsCount} товар{itemsCount !== 1 ? 'ів' : ''}
           </Tag>
         </div>
       ),
@@ -156,7 +167,7 @@ const Orders: React.FC = () => {
     {
       title: 'Сума',
       key: 'amount',
-      render: (_: any, record: Order) => (
+      render: (_: any, record: OrderSummary) => (
         <div>
           <div style={{ fontWeight: 500 }}>{record.total_amount} грн</div>
           {record.discount_amount > 0 && (
@@ -171,7 +182,7 @@ const Orders: React.FC = () => {
       title: 'Статус',
       dataIndex: 'status',
       key: 'status',
-      render: (status: Order['status'], record: Order) => (
+      render: (status: Order['status'], record: OrderSummary) => (
         <Select
           value={status}
           style={{ width: 120 }}
@@ -191,7 +202,7 @@ const Orders: React.FC = () => {
     {
       title: 'Дата доставки',
       key: 'delivery',
-      render: (_: any, record: Order) => (
+      render: (_: any, record: OrderSummary) => (
         <div>
           <div>{dayjs(record.delivery_date).format('DD.MM.YYYY')}</div>
           <div style={{ color: '#666', fontSize: '12px' }}>
@@ -210,7 +221,7 @@ const Orders: React.FC = () => {
       title: 'Дії',
       key: 'actions',
       width: 100,
-      render: (_: any, record: Order) => (
+      render: (_: any, record: OrderSummary) => (
         <Button
           type="primary"
           ghost
@@ -244,7 +255,7 @@ const Orders: React.FC = () => {
 
       <div style={{ marginBottom: 16, display: 'flex', gap: 16, flexWrap: 'wrap' }}>
         <Input
-          placeholder="Пошук за ім'ям, телефоном або ID"
+          placeholder="Пошук за ім'ям, телефоном, адресою або коментарем"
           prefix={<SearchOutlined />}
           value={searchText}
           onChange={(e) => setSearchText(e.target.value)}
@@ -283,11 +294,11 @@ const Orders: React.FC = () => {
       />
 
       <Modal
-        title={`Замовлення #${selectedOrder?.id}`}
+        title={`Замовлення #${selectedOrderId}`}
         open={isModalVisible}
         onCancel={() => {
           setIsModalVisible(false);
-          setSelectedOrder(null);
+          setSelectedOrderId(null);
         }}
         footer={null}
         width={800}
@@ -27,7 +27,7 @@ import {
 } from '@ant-design/icons';
 import { useQuery, useMutation, useQueryClient } from 'react-query';
 import { categoriesAPI, productsAPI } from '../services/api';
-import { Product, PackageInfo } from '../types';
+import { Product, PackageInfo, ImageVariant } from '../types';
 import PackageManager from '../components/PackageManager';
 
 const { Option } = Select;
@@ -38,6 +38,7 @@ const Products: React.FC = () => {
   const [editingProduct, setEditingProduct] = useState<Product | null>(null);
   const [form] = Form.useForm();
   const [imageUrl, setImageUrl] = useState<string>('');
+  const [imageVariants, setImageVariants] = useState<ImageVariant[]>([]);
   const [uploading, setUploading] = useState(false);
   const [isMobile, setIsMobile] = useState(false);
   const [packageManagerVisible, setPackageManagerVisible] = useState(false);
@@ -107,6 +108,7 @@ const Products: React.FC = () => {
     try {
       const result = await productsAPI.uploadImage(file);
       setImageUrl(result.url);
+      setImageVariants(result.variants);
       form.setFieldsValue({ image_url: result.url });
       message.success('Зображення завантажено успішно!');
     } catch (error) {
@@ -120,12 +122,14 @@ const Products: React.FC = () => {
     setEditingProduct(null);
     form.resetFields();
     setImageUrl('');
+    setImageVariants([]);
     setIsModalVisible(true);
   };
 
   const handleEdit = (product: Product) => {
     setEditingProduct(product);
     setImageUrl(product.image_url || '');
+    setImageVariants(product.image_variants || []);
     form.setFieldsValue(product);
     setIsModalVisible(true);
   };
@@ -139,7 +143,8 @@ const Products: React.FC = () => {
       const values = await form.validateFields();
       const productData = {
         ...values,
-        image_url: imageUrl
+        image_url: imageUrl,
+        image_variants: imageVariants
       };
       
       if (editingProduct) {
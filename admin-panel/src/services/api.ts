@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { Category, Product, ProductPackage, User, Order, PromoCode, District, AdminUser, PaginatedResponse } from '../types';
+import { Category, Product, ProductPackage, User, Order, PromoCode, District, AdminUser, PaginatedResponse, ImageUploadResult, DirectUploadTarget, DirectUploadStatus, ExportJobStatus, TimeseriesMetric, TimeseriesResponse, DashboardSummary, OrderSummary, OrderEvent } from '../types';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || '/api/v1';
 
@@ -11,6 +11,48 @@ const api = axios.create({
   },
 });
 
+const UPLOAD_POLL_INTERVAL_MS = 1000;
+const UPLOAD_POLL_TIMEOUT_MS = 2 * 60 * 1000;
+const EXPORT_POLL_INTERVAL_MS = 2000;
+const EXPORT_POLL_TIMEOUT_MS = 15 * 60 * 1000;
+
+// Upload an image straight to storage, then wait for the API to render its variants
+const directUpload = async (
+  file: File,
+  target: { product_id?: string; package_id?: number } = {}
+): Promise<ImageUploadResult> => {
+  const presign = await api.post<DirectUploadTarget>('/admin/upload/presign', {
+    content_type: file.type,
+  });
+  const { upload_id, method, url, fields, headers } = presign.data;
+  // Local storage hands out paths relative to the API host
+  const uploadUrl = new URL(url, new URL(API_BASE_URL, window.location.origin)).toString();
+
+  if (method === 'POST') {
+    const formData = new FormData();
+    Object.entries(fields).forEach(([key, value]) => formData.append(key, value));
+    formData.append('file', file);
+    await axios.post(uploadUrl, formData);
+  } else {
+    await axios.put(uploadUrl, file, { headers });
+  }
+
+  await api.post('/admin/upload/complete', { upload_id, ...target });
+
+  const deadline = Date.now() + UPLOAD_POLL_TIMEOUT_MS;
+  while (Date.now() < deadline) {
+    await new Promise((resolve) => setTimeout(resolve, UPLOAD_POLL_INTERVAL_MS));
+    const { data } = await api.get<DirectUploadStatus>(`/admin/upload/${upload_id}`);
+    if (data.status === 'done' && data.url) {
+      return { url: data.url, variants: data.variants };
+    }
+    if (data.status === 'failed') {
+      throw new Error(data.error || 'Image processing failed');
+    }
+  }
+  throw new Error('Image processing timed out');
+};
+
 // Add JWT token to requests
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem('access_token');
@@ -187,15 +229,8 @@ export const productsAPI = {
     await api.delete(`/admin/products/${id}`);
   },
   
-  uploadImage: async (file: File): Promise<{ url: string }> => {
-    const formData = new FormData();
-    formData.append('image', file);
-    const response = await api.post('/admin/upload/image', formData, {
-      headers: {
-        'Content-Type': 'multipart/form-data',
-      },
-    });
-    return response.data;
+  uploadImage: async (file: File): Promise<ImageUploadResult> => {
+    return directUpload(file);
   },
   
   getStats: async (): Promise<{
@@ -244,16 +279,19 @@ export const ordersAPI = {
     size = 20, 
     status?: string,
     startDate?: string,
-    endDate?: string
-  ): Promise<PaginatedResponse<Order>> => {
+    endDate?: string,
+    search?: string
+  ): Promise<PaginatedResponse<OrderSummary>> => {
     const params = new URLSearchParams({
       page: page.toString(),
       size: size.toString(),
+      view: 'summary',
     });
     
     if (status) params.append('status', status);
     if (startDate) params.append('start_date', startDate);
     if (endDate) params.append('end_date', endDate);
+    if (search) params.append('q', search);
     
     const response = await api.get(`/admin/orders?${params.toString()}`);
     return response.data;
@@ -269,6 +307,33 @@ export const ordersAPI = {
     return response.data;
   },
   
+  // Server-Sent Events read with fetch, since EventSource cannot send the bearer token.
+  // Resolves when the server closes the stream; rejects on errors or abort.
+  streamEvents: async (onEvent: (event: OrderEvent) => void, signal: AbortSignal): Promise<void> => {
+    const response = await fetch(`${API_BASE_URL}/admin/orders/events`, {
+      headers: { Authorization: `Bearer ${localStorage.getItem('access_token')}` },
+      signal,
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Order events failed: HTTP ${response.status}`);
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) return;
+      buffer += decoder.decode(value, { stream: true });
+      const messages = buffer.split('\n\n');
+      buffer = messages.pop() || '';
+      for (const message of messages) {
+        const data = message.split('\n').find((line) => line.startsWith('data: '));
+        if (data) onEvent(JSON.parse(data.slice(6)));
+      }
+    }
+  },
+  
   getStats: async (startDate?: string, endDate?: string): Promise<{
     total_orders: number;
     total_revenue: number;
@@ -283,11 +348,56 @@ export const ordersAPI = {
     return response.data;
   },
   
-  exportReport: async (startDate: string, endDate: string): Promise<Blob> => {
-    const response = await api.get(`/admin/orders/export`, {
-      params: { start_date: startDate, end_date: endDate },
-      responseType: 'blob',
+  // Reports are rendered by a background job; poll it, then fetch the file
+  exportReport: async (
+    startDate: string,
+    endDate: string,
+    format: 'xlsx' | 'csv' = 'xlsx',
+    onProgress?: (job: ExportJobStatus) => void
+  ): Promise<Blob> => {
+    const { data: created } = await api.post<ExportJobStatus>('/admin/exports', {
+      start_date: startDate,
+      end_date: endDate,
+      format,
     });
+
+    const deadline = Date.now() + EXPORT_POLL_TIMEOUT_MS;
+    while (Date.now() < deadline) {
+      const { data: job } = await api.get<ExportJobStatus>(`/admin/exports/${created.job_id}`);
+      onProgress?.(job);
+      if (job.status === 'done') {
+        const response = await api.get(`/admin/exports/${job.job_id}/download`, {
+          responseType: 'blob',
+        });
+        return response.data;
+      }
+      if (job.status === 'failed' || job.status === 'expired') {
+        throw new Error(job.error || 'Export failed');
+      }
+      await new Promise((resolve) => setTimeout(resolve, EXPORT_POLL_INTERVAL_MS));
+    }
+    throw new Error('Export timed out');
+  }
+};
+
+// Dashboard API
+export const dashboardAPI = {
+  getSummary: async (recent = 5): Promise<DashboardSummary> => {
+    const response = await api.get('/admin/dashboard/summary', { params: { recent } });
+    return response.data;
+  }
+};
+
+// Analytics API
+export const analyticsAPI = {
+  getTimeseries: async (params: {
+    metric: TimeseriesMetric;
+    granularity?: 'day' | 'week' | 'month';
+    start_date?: string;
+    end_date?: string;
+    group_by?: 'district' | 'category';
+  }): Promise<TimeseriesResponse> => {
+    const response = await api.get('/admin/analytics/timeseries', { params });
     return response.data;
   }
 };
@@ -357,16 +467,8 @@ export const packagesAPI = {
     await api.delete(`/admin/products/${productId}/packages/${packageId}`);
   },
   
-  uploadImage: async (productId: string, packageId: number, file: File): Promise<{ url: string }> => {
-    const formData = new FormData();
-    formData.append('image', file);
-    
-    const response = await api.post(`/admin/products/${productId}/packages/${packageId}/image`, formData, {
-      headers: {
-        'Content-Type': 'multipart/form-data',
-      },
-    });
-    return response.data;
+  uploadImage: async (productId: string, packageId: number, file: File): Promise<ImageUploadResult> => {
+    return directUpload(file, { product_id: productId, package_id: packageId });
   }
 };
 
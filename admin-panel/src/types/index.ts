@@ -15,6 +15,54 @@ export interface PackageInfo {
   note?: string;
 }
 
+export interface ImageVariant {
+  url: string;
+  width: number;
+  height: number;
+  format: 'webp' | 'jpeg';
+}
+
+export interface ImageUploadResult {
+  url: string;
+  variants: ImageVariant[];
+}
+
+export interface DirectUploadTarget {
+  upload_id: string;
+  key: string;
+  method: 'POST' | 'PUT';
+  url: string;
+  fields: Record<string, string>;
+  headers: Record<string, string>;
+  expires_in: number;
+}
+
+export interface DirectUploadStatus {
+  upload_id: string;
+  status: 'queued' | 'processing' | 'done' | 'failed';
+  product_id?: string;
+  package_id?: number;
+  url?: string;
+  variants: ImageVariant[];
+  error?: string;
+}
+
+export interface ExportJobStatus {
+  job_id: string;
+  status: 'queued' | 'processing' | 'done' | 'failed' | 'expired';
+  format: 'xlsx' | 'csv';
+  start_date: string;
+  end_date: string;
+  rows_total?: number;
+  rows_done: number;
+  progress: number;
+  filename: string;
+  size?: number;
+  created_at: string;
+  expires_at?: string;
+  error?: string;
+}
+
 export interface ProductPackage {
   id: number;
   product_id: string;
@@ -24,6 +72,7 @@ export interface ProductPackage {
   unit: string;
   price: number;
   image_url?: string;
+  image_variants?: ImageVariant[];
   available: boolean;
   sort_order: number;
   note?: string;
@@ -38,6 +87,7 @@ export interface Product {
   description?: string;
   price_per_kg: number;
   image_url?: string;
+  image_variants?: ImageVariant[];
   packages: PackageInfo[]; // Legacy field
   product_packages?: ProductPackage[]; // New relational packages
   is_active: boolean;
@@ -100,6 +150,41 @@ export interface Order {
   district: District;
 }
 
+export interface OrderSummary {
+  id: number;
+  order_id: number;
+  user_id: number;
+  status: Order['status'];
+  total_amount: number;
+  discount_amount: number;
+  district_id: number;
+  district_name?: string;
+  delivery_time_slot: Order['delivery_time_slot'];
+  delivery_date: string;
+  contact_name: string;
+  contact_phone?: string;
+  created_at: string;
+  items_count: number;
+}
+
+// Pushed by GET /admin/orders/events
+export type OrderEvent =
+  | {
+      type: 'order.created';
+      id: number;
+      order_id: number;
+      status: Order['status'];
+      total_amount: number;
+      contact_name: string;
+    }
+  | {
+      type: 'order.status_changed';
+      id: number;
+      order_id: number;
+      status: Order['status'];
+      old_status: Order['status'];
+    };
+
 export interface PromoCode {
   id: number;
   code: string;
@@ -135,6 +220,51 @@ export interface ApiResponse<T> {
   message?: string;
 }
 
+export interface DashboardSummary {
+  orders: {
+    total_orders: number;
+    total_revenue: number;
+    avg_order_value: number;
+    orders_by_status: Record<string, number>;
+  };
+  users: {
+    total: number;
+    active: number;
+    gold_clients: number;
+    blocked: number;
+  };
+  products: {
+    total_products: number;
+    total_categories: number;
+    featured_products: number;
+    active_products: number;
+  };
+  bot: {
+    total_users: number;
+    bot_users: number;
+    total_bot_interactions: number;
+    active_users_last_7_days: number;
+    average_interactions_per_user: number;
+  };
+  recent_orders: Order[];
+  last_7_days: { day: string; orders: number; revenue: number }[];
+}
+
+export type TimeseriesMetric = 'revenue' | 'orders' | 'aov' | 'new_users';
+
+export interface TimeseriesResponse {
+  metric: TimeseriesMetric;
+  granularity: 'day' | 'week' | 'month';
+  group_by?: 'district' | 'category';
+  start_date: string;
+  end_date: string;
+  series: {
+    key?: string;
+    label?: string;
+    points: { period: string; value: number }[];
+  }[];
+}
+
 export interface PaginatedResponse<T> {
   items: T[];
   total: number;
@@ -0,0 +1,48 @@
+"""Add order daily stats rollup
+
+Revision ID: 9c4f2a7e1b36
+Revises: 5b8e1d2c4a90
+Create Date: 2026-10-19 16:40:12.512903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4f2a7e1b36'
+down_revision = '5b8e1d2c4a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('order_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', postgresql.ENUM(name='orderstatus', create_type=False), nullable=False),
+    sa.Column('district_id', sa.Integer(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('discount', sa.Float(), nullable=False),
+    sa.Column('item_quantity', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status', 'district_id')
+    )
+
+    # Backfill from existing orders; later changes are applied as they happen
+    op.execute("""
+        INSERT INTO order_daily_stats (day, status, district_id, order_count, revenue, discount, item_quantity)
+        SELECT (o.created_at AT TIME ZONE 'UTC')::date, o.status, o.district_id,
+               count(*), coalesce(sum(o.total_amount), 0), coalesce(sum(o.discount_amount), 0),
+               coalesce(sum(items.quantity), 0)
+        FROM orders o
+        LEFT JOIN (
+            SELECT order_id, sum(quantity) AS quantity FROM order_items GROUP BY order_id
+        ) items ON items.order_id = o.id
+        WHERE o.status IS NOT NULL
+        GROUP BY 1, 2, 3
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('order_daily_stats')
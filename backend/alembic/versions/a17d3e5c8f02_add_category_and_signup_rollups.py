@@ -0,0 +1,72 @@
+"""Add category and signup rollups
+
+Revision ID: a17d3e5c8f02
+Revises: 9c4f2a7e1b36
+Create Date: 2026-10-19 18:05:47.220516
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a17d3e5c8f02'
+down_revision = '9c4f2a7e1b36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('order_category_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', postgresql.ENUM(name='orderstatus', create_type=False), nullable=False),
+    sa.Column('category_id', sa.String(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('item_quantity', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status', 'category_id')
+    )
+    op.create_table('user_daily_signups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('new_users', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+
+    # Backfill; an order's total is spread over its categories by item totals
+    op.execute("""
+        WITH categories AS (
+            SELECT oi.order_id, p.category_id,
+                   sum(oi.quantity) AS quantity, sum(oi.total_price) AS item_total
+            FROM order_items oi
+            JOIN products p ON p.id = oi.product_id
+            GROUP BY oi.order_id, p.category_id
+        ), totals AS (
+            SELECT order_id, sum(item_total) AS items_total, count(*) AS category_count
+            FROM categories
+            GROUP BY order_id
+        )
+        INSERT INTO order_category_daily_stats (day, status, category_id, order_count, revenue, item_quantity)
+        SELECT (o.created_at AT TIME ZONE 'UTC')::date, o.status, c.category_id, count(*),
+               coalesce(sum(CASE WHEN t.items_total > 0
+                                 THEN o.total_amount * c.item_total / t.items_total
+                                 ELSE o.total_amount / t.category_count END), 0),
+               coalesce(sum(c.quantity), 0)
+        FROM orders o
+        JOIN categories c ON c.order_id = o.id
+        JOIN totals t ON t.order_id = o.id
+        WHERE o.status IS NOT NULL
+        GROUP BY 1, 2, 3
+    """)
+    op.execute("""
+        INSERT INTO user_daily_signups (day, new_users)
+        SELECT (created_at AT TIME ZONE 'UTC')::date, count(*)
+        FROM users
+        WHERE created_at IS NOT NULL
+        GROUP BY 1
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('user_daily_signups')
+    op.drop_table('order_category_daily_stats')
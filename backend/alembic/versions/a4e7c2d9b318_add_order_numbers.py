@@ -0,0 +1,36 @@
+"""Add order numbers
+
+Revision ID: a4e7c2d9b318
+Revises: f2c6e8a41b95
+Create Date: 2026-10-20 09:12:44.208157
+
+order_id stopped being unique on its own when orders were partitioned, and
+archived orders left the orders table altogether. order_numbers records
+every number issued, live or archived, under a plain primary key; the API
+claims a number there in the same transaction as the order.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4e7c2d9b318'
+down_revision = 'f2c6e8a41b95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('order_numbers',
+    sa.Column('order_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('order_id')
+    )
+    op.execute(
+        "INSERT INTO order_numbers (order_id) "
+        "SELECT order_id FROM orders UNION SELECT order_id FROM archived_orders"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('order_numbers')
@@ -0,0 +1,153 @@
+"""Partition orders and order_items by month
+
+Revision ID: b7d2f4e9c613
+Revises: e6f18b3d9a27
+Create Date: 2026-10-19 21:04:12.517830
+
+Rebuilds both tables as range-partitioned tables (PostgreSQL 12+) and copies
+the existing rows across, so run it in a maintenance window: the tables are
+locked while rows are copied. order_items gains order_created_at, the
+partition key, filled from its order. Primary keys and the order_id unique
+constraint include the partition key, as PostgreSQL requires, so order_id
+is only unique per created_at here; the add_order_numbers migration restores
+a global guard.
+"""
+from datetime import date, datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2f4e9c613'
+down_revision = 'e6f18b3d9a27'
+branch_labels = None
+depends_on = None
+
+# Partition names and bounds must match app.services.partitions;
+# later months are created by its maintain_partitions job
+MONTHS_AHEAD = 3
+
+# Must match app.services.order_search.search_document
+SEARCH_DOCUMENT = (
+    "coalesce(contact_name, '') || ' ' || coalesce(contact_phone, '') || ' ' || "
+    "coalesce(comment, '') || ' ' || coalesce(delivery_address, '')"
+)
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partitions(table: str, first: date, last: date) -> None:
+    month = first
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE {table}_{month:%Y_%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+            f"TO ('{_add_months(month, 1).isoformat()} 00:00:00+00')"
+        )
+        month = _add_months(month, 1)
+    op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+
+def _create_search_indexes() -> None:
+    op.execute(
+        "CREATE INDEX ix_orders_search_tsv ON orders "
+        f"USING gin (to_tsvector('simple'::regconfig, {SEARCH_DOCUMENT}))"
+    )
+    op.execute(
+        "CREATE INDEX ix_orders_search_trgm ON orders "
+        f"USING gin (({SEARCH_DOCUMENT}) gin_trgm_ops)"
+    )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    # The partition keys must be set on every row
+    op.execute("UPDATE orders SET created_at = now() WHERE created_at IS NULL")
+    op.add_column('order_items', sa.Column('order_created_at', sa.DateTime(timezone=True), nullable=True))
+    op.execute(
+        "UPDATE order_items SET order_created_at = orders.created_at "
+        "FROM orders WHERE orders.id = order_items.order_id"
+    )
+
+    op.execute("ALTER TABLE order_items RENAME TO order_items_unpartitioned")
+    op.execute("ALTER TABLE orders RENAME TO orders_unpartitioned")
+
+    # Same columns, types and defaults (including the id sequences)
+    op.execute(
+        "CREATE TABLE orders (LIKE orders_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    op.execute(
+        "CREATE TABLE order_items (LIKE order_items_unpartitioned INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (order_created_at)"
+    )
+
+    oldest = bind.execute(sa.text("SELECT min(created_at) FROM orders_unpartitioned")).scalar()
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    first = oldest.astimezone(timezone.utc).date().replace(day=1) if oldest else current
+    last = _add_months(current, MONTHS_AHEAD)
+    _create_partitions('orders', first, last)
+    _create_partitions('order_items', first, last)
+
+    op.execute("INSERT INTO orders SELECT * FROM orders_unpartitioned")
+    op.execute("INSERT INTO order_items SELECT * FROM order_items_unpartitioned")
+
+    # Keep the sequences when the old tables go
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY NONE")
+    op.drop_table('order_items_unpartitioned')
+    op.drop_table('orders_unpartitioned')
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY order_items.id")
+
+    op.alter_column('orders', 'created_at', nullable=False, server_default=sa.text('now()'))
+    op.alter_column('order_items', 'order_created_at', nullable=False)
+    op.create_primary_key('orders_pkey', 'orders', ['id', 'created_at'])
+    op.create_unique_constraint('orders_order_id_key', 'orders', ['order_id', 'created_at'])
+    op.create_foreign_key('orders_user_id_fkey', 'orders', 'users', ['user_id'], ['id'])
+    op.create_foreign_key('orders_district_id_fkey', 'orders', 'districts', ['district_id'], ['id'])
+    _create_search_indexes()
+
+    op.create_primary_key('order_items_pkey', 'order_items', ['id', 'order_created_at'])
+    op.create_foreign_key(
+        'order_items_order_id_fkey', 'order_items', 'orders',
+        ['order_id', 'order_created_at'], ['id', 'created_at'],
+    )
+    op.create_foreign_key('order_items_product_id_fkey', 'order_items', 'products', ['product_id'], ['id'])
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id', 'order_created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE order_items RENAME TO order_items_partitioned")
+    op.execute("ALTER TABLE orders RENAME TO orders_partitioned")
+
+    op.execute("CREATE TABLE orders (LIKE orders_partitioned INCLUDING DEFAULTS)")
+    op.execute("CREATE TABLE order_items (LIKE order_items_partitioned INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO orders SELECT * FROM orders_partitioned")
+    op.execute("INSERT INTO order_items SELECT * FROM order_items_partitioned")
+
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY NONE")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY NONE")
+    # Dropping a partitioned table drops its partitions
+    op.drop_table('order_items_partitioned')
+    op.drop_table('orders_partitioned')
+    op.execute("ALTER SEQUENCE orders_id_seq OWNED BY orders.id")
+    op.execute("ALTER SEQUENCE order_items_id_seq OWNED BY order_items.id")
+
+    op.alter_column('orders', 'created_at', nullable=True)
+    op.create_primary_key('orders_pkey', 'orders', ['id'])
+    op.create_unique_constraint('orders_order_id_key', 'orders', ['order_id'])
+    op.create_foreign_key('orders_user_id_fkey', 'orders', 'users', ['user_id'], ['id'])
+    op.create_foreign_key('orders_district_id_fkey', 'orders', 'districts', ['district_id'], ['id'])
+    _create_search_indexes()
+
+    op.drop_column('order_items', 'order_created_at')
+    op.create_primary_key('order_items_pkey', 'order_items', ['id'])
+    op.create_foreign_key('order_items_order_id_fkey', 'order_items', 'orders', ['order_id'], ['id'])
+    op.create_foreign_key('order_items_product_id_fkey', 'order_items', 'products', ['product_id'], ['id'])
+    op.create_index('ix_order_items_order_id', 'order_items', ['order_id'], unique=False)
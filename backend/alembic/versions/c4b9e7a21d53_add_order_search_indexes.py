@@ -0,0 +1,39 @@
+"""Add order search indexes
+
+Revision ID: c4b9e7a21d53
+Revises: a17d3e5c8f02
+Create Date: 2026-10-19 19:12:08.431907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4b9e7a21d53'
+down_revision = 'a17d3e5c8f02'
+branch_labels = None
+depends_on = None
+
+# Must match app.services.order_search.search_document
+SEARCH_DOCUMENT = (
+    "coalesce(contact_name, '') || ' ' || coalesce(contact_phone, '') || ' ' || "
+    "coalesce(comment, '') || ' ' || coalesce(delivery_address, '')"
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX ix_orders_search_tsv ON orders "
+        f"USING gin (to_tsvector('simple'::regconfig, {SEARCH_DOCUMENT}))"
+    )
+    op.execute(
+        "CREATE INDEX ix_orders_search_trgm ON orders "
+        f"USING gin (({SEARCH_DOCUMENT}) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_orders_search_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_orders_search_tsv")
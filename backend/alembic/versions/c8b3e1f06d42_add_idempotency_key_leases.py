@@ -0,0 +1,24 @@
+"""Add idempotency key leases
+
+Revision ID: c8b3e1f06d42
+Revises: a4e7c2d9b318
+Create Date: 2026-10-20 10:03:27.551902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8b3e1f06d42'
+down_revision = 'a4e7c2d9b318'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('idempotency_keys', sa.Column('claimed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('idempotency_keys', 'claimed_at')
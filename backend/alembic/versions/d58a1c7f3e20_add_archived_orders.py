@@ -0,0 +1,44 @@
+"""Add archived orders
+
+Revision ID: d58a1c7f3e20
+Revises: b7d2f4e9c613
+Create Date: 2026-10-19 21:47:30.118264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd58a1c7f3e20'
+down_revision = 'b7d2f4e9c613'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('archived_orders',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('status', postgresql.ENUM(name='orderstatus', create_type=False), nullable=False),
+    sa.Column('district_id', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('discount_amount', sa.Float(), nullable=False),
+    sa.Column('delivery_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('contact_name', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('item_quantity', sa.Integer(), nullable=False),
+    sa.Column('categories', sa.JSON(), nullable=False),
+    sa.Column('archive_key', sa.String(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('order_id')
+    )
+    op.create_index(op.f('ix_archived_orders_user_id'), 'archived_orders', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_archived_orders_user_id'), table_name='archived_orders')
+    op.drop_table('archived_orders')
@@ -0,0 +1,24 @@
+"""Index order_items.order_id
+
+Revision ID: e6f18b3d9a27
+Revises: c4b9e7a21d53
+Create Date: 2026-10-19 19:48:31.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f18b3d9a27'
+down_revision = 'c4b9e7a21d53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
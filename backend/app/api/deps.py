@@ -1,15 +1,17 @@
-from typing import Generator, Optional
+from typing import AsyncGenerator, Generator, Optional
 from fastapi import Depends, HTTPException, status, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.requests import HTTPConnection
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.core.config import settings
 from app.core.telegram_auth import TelegramAuth
 from app.core.security import verify_token, get_admin_by_id
-from app.db.session import get_async_session
+from app.db.session import get_async_session, get_read_session, read_router, statement_timeout
 from app.db.models.user import User
 from app.db.models.admin import AdminUser
+from app.services import rollups
 
 
 # Initialize Telegram auth
@@ -62,6 +64,7 @@ async def get_current_user(
             language_code=user_data.get("language_code", "uk")
         )
         session.add(user)
+        await rollups.record_user_created(session, user)
         await session.commit()
         await session.refresh(user)
     else:
@@ -108,6 +111,15 @@ async def get_optional_user(
         return None
 
 
+async def get_user_read_session(
+    connection: HTTPConnection,
+    current_user: User = Depends(get_current_user)
+) -> AsyncGenerator[AsyncSession, None]:
+    """Read session for the current user's own data, on the primary right after they wrote"""
+    async with read_router.session(current_user.id, statement_timeout(connection)) as session:
+        yield session
+
+
 # JWT Bearer scheme for admin authentication
 bearer_scheme = HTTPBearer()
 
@@ -1,12 +1,15 @@
-from typing import List, Optional
+import os
+from typing import List, Optional, Union
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, status, UploadFile, File, Form, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_, desc
 from sqlalchemy.orm import selectinload, joinedload
 from sqlalchemy.exc import IntegrityError
 
-from app.api.deps import get_async_session, get_current_admin
+from app.api.deps import get_async_session, get_current_admin, get_read_session
+from app.core.config import settings
+from app.db.session import read_only_gets, session_options
 from app.db.models.product import Category, Product, ProductPackage, District, PromoCode
 from app.db.models.user import User
 from app.db.models.order import Order, OrderItem
@@ -20,8 +23,18 @@ from app.schemas.product import (
 )
 from app.schemas.admin import *
 from app.services.s3 import s3_service
+from app.services.image_usage import release_images
+from app.services.image_jobs import get_upload_job, start_upload_job
+from app.services.order_events import order_events
+from app.services import (
+    analytics, export, export_jobs, image_gc, order_archive, order_search, order_status, partitions, stats
+)
+from app.services.storage import StorageError
+
+router = APIRouter(dependencies=[Depends(read_only_gets)])
 
-router = APIRouter()
+# Analytics and exports scan long date ranges
+report_timeout = Depends(session_options(statement_timeout=settings.DATABASE_REPORT_STATEMENT_TIMEOUT))
 
 # File Upload
 @router.post("/upload/image", response_model=ImageUploadResponse)
@@ -29,13 +42,67 @@ async def upload_image(
     image: UploadFile = File(...),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
-    """Upload image to S3"""
+    """Upload image to S3 with resized WebP/JPEG variants"""
     try:
-        image_url = await s3_service.upload_image(image, folder="products")
-        return ImageUploadResponse(url=image_url)
+        uploaded = await s3_service.upload_image(image, folder="products")
+        return ImageUploadResponse(**uploaded)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/upload/presign", response_model=DirectUploadTarget)
+async def presign_image_upload(
+    upload: DirectUploadRequest,
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """Get a presigned target for uploading an image straight to storage"""
+    return s3_service.presign_upload(upload.content_type, settings.DIRECT_UPLOAD_MAX_SIZE_MB)
+
+@router.post("/upload/complete", response_model=DirectUploadStatus, status_code=202)
+async def complete_image_upload(
+    upload: DirectUploadComplete,
+    session: AsyncSession = Depends(get_async_session),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """Queue processing of a direct upload and attach it to a product or package"""
+    if upload.package_id is not None:
+        if upload.product_id is None:
+            raise HTTPException(status_code=400, detail="product_id is required with package_id")
+        query = select(ProductPackage.id).where(
+            ProductPackage.id == upload.package_id,
+            ProductPackage.product_id == upload.product_id
+        )
+        if (await session.execute(query)).scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Package not found")
+    elif upload.product_id is not None:
+        query = select(Product.id).where(Product.id == upload.product_id)
+        if (await session.execute(query)).scalar_one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Product not found")
+    
+    folder = "packages" if upload.package_id is not None else "products"
+    return start_upload_job(upload.upload_id, folder, upload.product_id, upload.package_id)
+
+@router.post("/images/gc", response_model=ImageGCReport)
+async def collect_orphaned_images(
+    dry_run: bool = Query(True, description="Only report what would be deleted"),
+    session: AsyncSession = Depends(get_async_session),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """Delete stored images no product or package references"""
+    return await image_gc.collect_orphaned_images(session, dry_run=dry_run)
+
+@router.get("/upload/{upload_id}", response_model=DirectUploadStatus)
+async def get_image_upload_status(
+    upload_id: str,
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """Get processing status of a direct upload"""
+    job = get_upload_job(upload_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return job
+
 # Categories CRUD
 @router.get("/categories", response_model=List[CategorySchema])
 async def get_admin_categories(
@@ -142,28 +209,13 @@ async def get_admin_products(
         size=size
     )
 
-@router.get("/products/stats")
+@router.get("/products/stats", response_model=ProductStats)
 async def get_product_stats(
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
     """Get product statistics"""
-    total_products_query = select(func.count(Product.id))
-    total_categories_query = select(func.count(Category.id))
-    featured_products_query = select(func.count(Product.id)).where(Product.is_featured == True)
-    active_products_query = select(func.count(Product.id)).where(Product.is_active == True)
-    
-    total_products = (await session.execute(total_products_query)).scalar()
-    total_categories = (await session.execute(total_categories_query)).scalar()
-    featured_products = (await session.execute(featured_products_query)).scalar()
-    active_products = (await session.execute(active_products_query)).scalar()
-    
-    return {
-        "total_products": total_products,
-        "total_categories": total_categories,
-        "featured_products": featured_products,
-        "active_products": active_products
-    }
+    return await stats.product_stats(session)
 
 @router.get("/products/{product_id}", response_model=ProductResponse)
 async def get_admin_product(
@@ -219,14 +271,22 @@ async def update_product(
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    # Delete old image if new one is provided
-    if product.image_url and db_product.image_url and product.image_url != db_product.image_url:
-        await s3_service.delete_image(db_product.image_url)
+    update_data = product.model_dump(exclude_unset=True)
+    old_image_url = db_product.image_url
+    
+    # Variants of the previous image are stale unless new ones were sent along
+    if "image_url" in update_data and update_data["image_url"] != old_image_url:
+        update_data.setdefault("image_variants", [])
     
-    for field, value in product.model_dump(exclude_unset=True).items():
+    for field, value in update_data.items():
         setattr(db_product, field, value)
     
     await session.commit()
+    
+    # Delete old image if new one is provided and nothing else uses it
+    if product.image_url and old_image_url and product.image_url != old_image_url:
+        await release_images(session, [old_image_url])
+    
     await session.refresh(db_product, ['category'])
     return db_product
 
@@ -237,19 +297,21 @@ async def delete_product(
     current_admin: AdminUser = Depends(get_current_admin)
 ):
     """Delete product"""
-    query = select(Product).where(Product.id == product_id)
+    query = select(Product).options(selectinload(Product.product_packages)).where(Product.id == product_id)
     result = await session.execute(query)
     db_product = result.scalar_one_or_none()
     
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    # Delete image from S3
-    if db_product.image_url:
-        await s3_service.delete_image(db_product.image_url)
+    # Packages are deleted with the product, so their images go too
+    image_urls = [db_product.image_url] + [package.image_url for package in db_product.product_packages]
     
     await session.delete(db_product)
     await session.commit()
+    
+    # Delete images from storage unless another product or package shares them
+    await release_images(session, image_urls)
     return {"message": "Product deleted successfully"}
 
 
@@ -288,26 +350,11 @@ async def get_admin_users(
 
 @router.get("/users/stats", response_model=UserStats)
 async def get_user_stats(
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
     """Get user statistics"""
-    total_query = select(func.count(User.id))
-    active_query = select(func.count(User.id)).where(User.is_blocked == False)
-    gold_query = select(func.count(User.id)).where(User.is_gold_client == True)
-    blocked_query = select(func.count(User.id)).where(User.is_blocked == True)
-    
-    total = (await session.execute(total_query)).scalar()
-    active = (await session.execute(active_query)).scalar()
-    gold_clients = (await session.execute(gold_query)).scalar()
-    blocked = (await session.execute(blocked_query)).scalar()
-    
-    return UserStats(
-        total=total,
-        active=active,
-        gold_clients=gold_clients,
-        blocked=blocked
-    )
+    return UserStats(**await stats.user_stats(session))
 
 @router.get("/users/{user_id}", response_model=UserResponse)
 async def get_user_by_id(
@@ -348,7 +395,23 @@ async def update_user(
     return db_user
 
 # Orders Management
-@router.get("/orders", response_model=PaginatedResponse[OrderResponse])
+# Columns behind the order list's summary view
+ORDER_SUMMARY_COLUMNS = (
+    Order.id,
+    Order.order_id,
+    Order.user_id,
+    Order.status,
+    Order.total_amount,
+    Order.discount_amount,
+    Order.district_id,
+    Order.delivery_time_slot,
+    Order.delivery_date,
+    Order.contact_name,
+    Order.contact_phone,
+    Order.created_at,
+)
+
+@router.get("/orders", response_model=Union[PaginatedResponse[OrderSummary], PaginatedResponse[OrderResponse]])
 async def get_admin_orders(
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
@@ -356,10 +419,18 @@ async def get_admin_orders(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
     order_id: Optional[int] = Query(None),
+    q: Optional[str] = Query(None, description="Search contact name, phone, comment and delivery address"),
+    view: str = Query("full", pattern="^(summary|full)$"),
     session: AsyncSession = Depends(get_async_session),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
-    """Get paginated orders for admin"""
+    """
+    Get paginated orders for admin, ranked by relevance when searching
+
+    The default full view loads items and user for every order. view=summary
+    reads only the list columns, the item count and the district name in one
+    Core query; a single order's details are at GET /orders/{order_id}.
+    """
     offset = (page - 1) * size
     
     # Build filters
@@ -386,6 +457,9 @@ async def get_admin_orders(
             filters.append(Order.created_at <= end_dt)
         except ValueError:
             pass
+    search = order_search.search_filter(session, q)
+    if search is not None:
+        filters.append(search)
     
     # Count total
     count_query = select(func.count(Order.id))
@@ -395,26 +469,42 @@ async def get_admin_orders(
     total = count_result.scalar()
     
     # Get orders
-    query = (
-        select(Order)
-        .options(
+    if view == "summary":
+        query = select(
+            *ORDER_SUMMARY_COLUMNS,
+            District.name.label("district_name"),
+            select(func.count(OrderItem.id))
+            .where(partitions.items_join())
+            .correlate(Order)
+            .scalar_subquery()
+            .label("items_count"),
+        ).outerjoin(District, District.id == Order.district_id)
+    else:
+        query = select(Order).options(
             selectinload(Order.items),
             selectinload(Order.user),
             selectinload(Order.district)
         )
-        .order_by(desc(Order.created_at))
-        .offset(offset)
-        .limit(size)
-    )
+    query = query.offset(offset).limit(size)
     
     if filters:
         query = query.where(and_(*filters))
+    rank = order_search.search_rank(session, q)
+    if rank is not None:
+        query = query.order_by(desc(rank))
+    query = query.order_by(desc(Order.created_at), desc(Order.id))
     
     result = await session.execute(query)
-    orders = result.scalars().all()
+    if view == "summary":
+        return PaginatedResponse[OrderSummary](
+            items=[OrderSummary.model_validate(row) for row in result.mappings()],
+            total=total,
+            page=page,
+            size=size
+        )
     
-    return PaginatedResponse(
-        items=orders,
+    return PaginatedResponse[OrderResponse](
+        items=result.scalars().all(),
         total=total,
         page=page,
         size=size
@@ -424,157 +514,212 @@ async def get_admin_orders(
 async def get_order_stats(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_read_session),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
-    """Get order statistics"""
-    # Build filters
-    filters = []
+    """Get order statistics from the daily rollup; dates are whole UTC days, both inclusive"""
+    start_day = end_day = None
     if start_date:
         try:
-            start_dt = datetime.fromisoformat(start_date)
-            filters.append(Order.created_at >= start_dt)
+            start_day = datetime.fromisoformat(start_date).date()
         except ValueError:
             pass
     if end_date:
         try:
-            end_dt = datetime.fromisoformat(end_date)
-            filters.append(Order.created_at <= end_dt)
+            end_day = datetime.fromisoformat(end_date).date()
         except ValueError:
             pass
     
-    # Base query with filters
-    base_query = select(Order)
-    if filters:
-        base_query = base_query.where(and_(*filters))
+    return OrderStats(**await stats.order_stats(session, start_day, end_day))
+
+# Dashboard
+@router.get("/dashboard/summary", response_model=DashboardSummary)
+async def get_dashboard_summary(
+    recent: int = Query(5, ge=0, le=20),
+    session: AsyncSession = Depends(get_read_session),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """Get everything the dashboard page shows in one call"""
+    today = datetime.utcnow().date()
+    week_start = today - timedelta(days=6)
+    orders_series = await analytics.cached_timeseries(session, "orders", "day", week_start, today)
+    revenue_series = await analytics.cached_timeseries(session, "revenue", "day", week_start, today)
+    last_7_days = [
+        DashboardDay(day=orders_point["period"], orders=orders_point["value"], revenue=revenue_point["value"])
+        for orders_point, revenue_point in zip(
+            orders_series["series"][0]["points"], revenue_series["series"][0]["points"]
+        )
+    ]
     
-    # Total orders
-    total_orders_query = select(func.count(Order.id))
-    if filters:
-        total_orders_query = total_orders_query.where(and_(*filters))
-    total_orders = (await session.execute(total_orders_query)).scalar()
+    recent_orders = []
+    if recent:
+        query = (
+            select(Order)
+            .options(
+                selectinload(Order.items),
+                selectinload(Order.user),
+                selectinload(Order.district)
+            )
+            .order_by(desc(Order.created_at))
+            .limit(recent)
+        )
+        recent_orders = (await session.execute(query)).scalars().all()
+    
+    return DashboardSummary(
+        orders=await stats.order_stats(session),
+        users=await stats.user_stats(session),
+        products=await stats.product_stats(session),
+        bot=await stats.bot_stats(session),
+        recent_orders=recent_orders,
+        last_7_days=last_7_days
+    )
+
+# Analytics
+ANALYTICS_DEFAULT_DAYS = {"day": 30, "week": 12 * 7, "month": 365}
+ANALYTICS_MAX_DAYS = 10 * 366
+
+@router.get("/analytics/timeseries", response_model=TimeseriesResponse, dependencies=[report_timeout])
+async def get_analytics_timeseries(
+    metric: str = Query(..., pattern="^(revenue|orders|aov|new_users)$"),
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    group_by: Optional[str] = Query(None, pattern="^(district|category)$"),
+    session: AsyncSession = Depends(get_read_session),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """Get a metric per day, week or month; dates are whole UTC days, both inclusive"""
+    if metric == "new_users" and group_by:
+        raise HTTPException(status_code=400, detail="new_users cannot be grouped")
     
-    # Total revenue
-    revenue_query = select(func.sum(Order.total_amount))
-    if filters:
-        revenue_query = revenue_query.where(and_(*filters))
-    total_revenue = (await session.execute(revenue_query)).scalar() or 0
+    try:
+        end_day = datetime.fromisoformat(end_date).date() if end_date else datetime.utcnow().date()
+        start_day = (
+            datetime.fromisoformat(start_date).date() if start_date
+            else end_day - timedelta(days=ANALYTICS_DEFAULT_DAYS[granularity] - 1)
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format")
     
-    # Average order value
-    avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
+    if start_day > end_day:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    if (end_day - start_day).days >= ANALYTICS_MAX_DAYS:
+        raise HTTPException(status_code=400, detail="Date range is too long")
     
-    # Orders by status
-    status_query = select(Order.status, func.count(Order.id)).group_by(Order.status)
-    if filters:
-        status_query = status_query.where(and_(*filters))
-    status_result = await session.execute(status_query)
-    orders_by_status = {status.value if hasattr(status, 'value') else str(status): count 
-                       for status, count in status_result.fetchall()}
-    
-    return OrderStats(
-        total_orders=total_orders,
-        total_revenue=total_revenue,
-        avg_order_value=avg_order_value,
-        orders_by_status=orders_by_status
-    )
+    return await analytics.cached_timeseries(session, metric, granularity, start_day, end_day, group_by)
 
-@router.get("/orders/export")
+@router.get("/orders/export", dependencies=[report_timeout])
 async def export_orders_report(
     start_date: str = Query(...),
     end_date: str = Query(...),
-    session: AsyncSession = Depends(get_async_session),
+    format: str = Query("xlsx", pattern="^(xlsx|csv)$"),
+    session: AsyncSession = Depends(get_read_session),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
-    """Export orders report as Excel"""
+    """Export orders report as Excel or CSV"""
+    from fastapi.responses import FileResponse, StreamingResponse
+    from starlette.background import BackgroundTask
+    
     try:
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, PatternFill, Alignment
-        from io import BytesIO
-        from fastapi.responses import StreamingResponse
-        
         start_dt = datetime.fromisoformat(start_date)
         end_dt = datetime.fromisoformat(end_date)
-        
-        # Get orders
-        query = (
-            select(Order)
-            .options(
-                selectinload(Order.items),
-                selectinload(Order.user),
-                selectinload(Order.district)
-            )
-            .where(and_(
-                Order.created_at >= start_dt,
-                Order.created_at <= end_dt
-            ))
-            .order_by(desc(Order.created_at))
-        )
-        result = await session.execute(query)
-        orders = result.scalars().all()
-        
-        # Create workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Orders Report"
-        
-        # Headers
-        headers = [
-            "ID", "Customer", "Phone", "Status", "Total Amount", 
-            "Discount", "District", "Delivery Date", "Delivery Time",
-            "Items Count", "Created At", "Comment"
-        ]
-        
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
-            cell.alignment = Alignment(horizontal="center")
-        
-        # Data
-        for row, order in enumerate(orders, 2):
-            ws.cell(row=row, column=1, value=order.id)
-            ws.cell(row=row, column=2, value=order.contact_name)
-            ws.cell(row=row, column=3, value=order.contact_phone or "")
-            ws.cell(row=row, column=4, value=order.status.value if hasattr(order.status, 'value') else str(order.status))
-            ws.cell(row=row, column=5, value=order.total_amount)
-            ws.cell(row=row, column=6, value=order.discount_amount)
-            ws.cell(row=row, column=7, value=order.district.name if order.district else "")
-            ws.cell(row=row, column=8, value=order.delivery_date.strftime("%Y-%m-%d"))
-            ws.cell(row=row, column=9, value=order.delivery_time_slot.value if hasattr(order.delivery_time_slot, 'value') else str(order.delivery_time_slot))
-            ws.cell(row=row, column=10, value=len(order.items))
-            ws.cell(row=row, column=11, value=order.created_at.strftime("%Y-%m-%d %H:%M"))
-            ws.cell(row=row, column=12, value=order.comment or "")
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Save to BytesIO
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
-        filename = f"orders_report_{start_date}_{end_date}.xlsx"
-        
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format")
+    filename = f"orders_report_{start_date}_{end_date}.{format}"
+    
+    if format == "csv":
         return StreamingResponse(
-            BytesIO(output.read()),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            export.stream_orders_csv(start_dt, end_dt),
+            media_type="text/csv; charset=utf-8",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
-        
+    
+    try:
+        path = await export.write_orders_xlsx(session, start_dt, end_dt)
     except ImportError:
         raise HTTPException(status_code=500, detail="Excel export not available")
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+        # The details stay in the log; clients only learn that the export failed
+        print(f"Warning: orders export {start_date}..{end_date} failed: {e!r}")
+        raise HTTPException(status_code=500, detail="Export failed")
+    
+    return FileResponse(
+        path,
+        media_type=export.XLSX_MEDIA_TYPE,
+        filename=filename,
+        background=BackgroundTask(os.remove, path)
+    )
+
+@router.post("/exports", response_model=ExportJobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def create_export_job(
+    request: ExportJobRequest,
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """Render an orders report in the background; poll the returned job for progress"""
+    try:
+        datetime.fromisoformat(request.start_date)
+        datetime.fromisoformat(request.end_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format")
+    
+    return export_jobs.start_export_job(request.start_date, request.end_date, request.format)
+
+@router.get("/exports/{job_id}", response_model=ExportJobStatus)
+async def get_export_job(
+    job_id: str,
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """Get status and progress of an export job"""
+    job = export_jobs.get_export_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
+@router.get("/exports/{job_id}/download")
+async def download_export(
+    job_id: str,
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """Download the report of a finished export job"""
+    from fastapi.responses import StreamingResponse
+    
+    job = export_jobs.get_export_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job["status"] == "expired":
+        raise HTTPException(status_code=410, detail="Export has expired")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail="Export is not ready yet")
+    
+    # Streamed in chunks, so a large report is never held in memory whole
+    try:
+        chunks = await s3_service.storage.open_stream(export_jobs.export_key(job))
+    except StorageError:
+        raise HTTPException(status_code=410, detail="Export has expired")
+    
+    headers = {"Content-Disposition": f"attachment; filename={job['filename']}"}
+    if job.get("size") is not None:
+        headers["Content-Length"] = str(job["size"])
+    return StreamingResponse(chunks, media_type=export.REPORT_MEDIA_TYPES[job["format"]], headers=headers)
+
+@router.get("/orders/events")
+async def stream_order_events(
+    request: Request,
+    session: AsyncSession = Depends(get_async_session),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """Stream order created and status changed events as Server-Sent Events"""
+    from fastapi.responses import StreamingResponse
+    
+    # The stream stays open for as long as the page does; give back the connection used for auth
+    await session.close()
+    return StreamingResponse(
+        order_events.stream(request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/orders/{order_id}", response_model=OrderResponse)
 async def get_admin_order(
@@ -595,6 +740,9 @@ async def get_admin_order(
     result = await session.execute(query)
     order = result.scalar_one_or_none()
     
+    if not order:
+        order = await order_archive.get_archived_order(session, order_id)
+    
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
@@ -607,20 +755,66 @@ async def update_order_status(
     session: AsyncSession = Depends(get_async_session),
     current_admin: AdminUser = Depends(get_current_admin)
 ):
-    """Update order status"""
-    query = select(Order).where(Order.id == order_id)
-    result = await session.execute(query)
-    order = result.scalar_one_or_none()
+    """Update order status; only moves allowed by the order workflow are accepted"""
+    from app.db.models.order import OrderStatus
+    try:
+        new_status = OrderStatus(status_update.status)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid order status")
     
-    if not order:
+    changes, rejected = await order_status.update_statuses(session, [order_id], new_status)
+    current = rejected.get(order_id)
+    if not changes and current is None:
         raise HTTPException(status_code=404, detail="Order not found")
+    if current is not None and current != new_status:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Cannot change order status from {current.value} to {new_status.value}",
+        )
     
-    order.status = status_update.status
-    order.updated_at = datetime.utcnow()
-    
-    await session.commit()
-    await session.refresh(order, ['items', 'user', 'district'])
-    return order
+    query = (
+        select(Order)
+        .options(
+            selectinload(Order.items),
+            selectinload(Order.user),
+            selectinload(Order.district)
+        )
+        .where(Order.id == order_id)
+        .execution_options(populate_existing=True)
+    )
+    result = await session.execute(query)
+    return result.scalar_one()
+
+@router.post("/orders/status:batch", response_model=OrderStatusBatchResult)
+async def batch_update_order_status(
+    batch: OrderStatusBatchUpdate,
+    session: AsyncSession = Depends(get_async_session),
+    current_admin: AdminUser = Depends(get_current_admin)
+):
+    """Move many orders to one status; orders the workflow does not allow to move are skipped"""
+    from app.db.models.order import OrderStatus
+    try:
+        new_status = OrderStatus(batch.status)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid order status")
+    
+    changes, rejected = await order_status.update_statuses(session, batch.order_ids, new_status)
+    updated = {change["id"] for change in changes}
+    skipped = []
+    for order_id in dict.fromkeys(batch.order_ids):
+        if order_id in updated:
+            continue
+        current = rejected.get(order_id)
+        skipped.append(OrderStatusBatchSkipped(
+            id=order_id,
+            status=current.value if current else None,
+            reason="invalid_transition" if current else "not_found",
+        ))
+    return OrderStatusBatchResult(
+        status=new_status.value,
+        updated=[order_id for order_id in dict.fromkeys(batch.order_ids) if order_id in updated],
+        skipped=skipped,
+    )
 
 # Districts CRUD
 @router.get("/districts", response_model=List[DistrictResponse])
@@ -887,10 +1081,22 @@ async def update_product_package(
     if not db_package:
         raise HTTPException(status_code=404, detail="Package not found")
     
-    for field, value in package.model_dump(exclude_unset=True).items():
+    update_data = package.model_dump(exclude_unset=True)
+    old_image_url = db_package.image_url
+    
+    # Variants of the previous image are stale unless new ones were sent along
+    if "image_url" in update_data and update_data["image_url"] != old_image_url:
+        update_data.setdefault("image_variants", [])
+    
+    for field, value in update_data.items():
         setattr(db_package, field, value)
     
     await session.commit()
+    
+    # Delete the old image if it was replaced and nothing else uses it
+    if "image_url" in update_data and old_image_url and update_data["image_url"] != old_image_url:
+        await release_images(session, [old_image_url])
+    
     await session.refresh(db_package)
     return db_package
 
@@ -913,15 +1119,14 @@ async def delete_product_package(
     if not db_package:
         raise HTTPException(status_code=404, detail="Package not found")
     
-    # Delete image from S3 if exists
-    if db_package.image_url:
-        try:
-            await s3_service.delete_image(db_package.image_url)
-        except Exception as e:
-            print(f"Warning: Failed to delete package image: {e}")
+    image_url = db_package.image_url
     
     await session.delete(db_package)
     await session.commit()
+    
+    # Delete image from S3 if exists and is no longer shared
+    if image_url:
+        await release_images(session, [image_url])
 
 
 @router.post("/products/{product_id}/packages/{package_id}/image", response_model=ImageUploadResponse)
@@ -945,17 +1150,22 @@ async def upload_package_image(
         raise HTTPException(status_code=404, detail="Package not found")
     
     try:
-        # Delete old image if exists
-        if db_package.image_url:
-            await s3_service.delete_image(db_package.image_url)
+        old_image_url = db_package.image_url
         
         # Upload new image
-        image_url = await s3_service.upload_image(image, folder="packages")
+        uploaded = await s3_service.upload_image(image, folder="packages")
         
-        # Update package with new image URL
-        db_package.image_url = image_url
+        # Update package with new image URL and its variants
+        db_package.image_url = uploaded["url"]
+        db_package.image_variants = uploaded["variants"]
         await session.commit()
         
-        return ImageUploadResponse(url=image_url)
+        # Delete old image if exists and nothing else uses it
+        if old_image_url and old_image_url != uploaded["url"]:
+            await release_images(session, [old_image_url])
+        
+        return ImageUploadResponse(**uploaded)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
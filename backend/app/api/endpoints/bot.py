@@ -3,11 +3,11 @@ from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from sqlalchemy.sql import func
 from pydantic import BaseModel
 
-from app.db.session import get_async_session
+from app.db.session import get_async_session, get_read_session
 from app.db.models.user import User
+from app.services import rollups, stats
 
 router = APIRouter()
 
@@ -58,6 +58,7 @@ async def record_bot_interaction(
             last_bot_interaction=current_time
         )
         session.add(user)
+        await rollups.record_user_created(session, user)
         print(f"📝 Created new user: {user.first_name} ({user.id})")
     else:
         # Update existing user
@@ -132,41 +133,6 @@ async def get_bot_user(
 
 
 @router.get("/stats")
-async def get_bot_stats(session: AsyncSession = Depends(get_async_session)):
+async def get_bot_stats(session: AsyncSession = Depends(get_read_session)):
     """Get bot usage statistics"""
-    
-    # Total users
-    total_users = await session.execute(select(func.count(User.id)))
-    total_users_count = total_users.scalar()
-    
-    # Users with bot interactions
-    bot_users = await session.execute(
-        select(func.count(User.id)).where(User.bot_interactions_count > 0)
-    )
-    bot_users_count = bot_users.scalar()
-    
-    # Total bot interactions
-    total_interactions = await session.execute(
-        select(func.sum(User.bot_interactions_count))
-    )
-    total_interactions_count = total_interactions.scalar() or 0
-    
-    # Active users (interacted in last 7 days)
-    from datetime import timedelta
-    week_ago = datetime.utcnow() - timedelta(days=7)
-    
-    active_users = await session.execute(
-        select(func.count(User.id)).where(User.last_bot_interaction >= week_ago)
-    )
-    active_users_count = active_users.scalar()
-    
-    return {
-        "total_users": total_users_count,
-        "bot_users": bot_users_count,
-        "total_bot_interactions": total_interactions_count,
-        "active_users_last_7_days": active_users_count,
-        "average_interactions_per_user": (
-            total_interactions_count / bot_users_count 
-            if bot_users_count > 0 else 0
-        )
-    }
\ No newline at end of file
+    return await stats.bot_stats(session)
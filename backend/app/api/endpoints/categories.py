@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
-from app.api.deps import get_async_session
+from app.api.deps import get_read_session
 from app.db.models.product import Category, Product
 from app.schemas.product import Category as CategorySchema, Product as ProductSchema
 
@@ -13,7 +13,7 @@ router = APIRouter()
 
 @router.get("/", response_model=List[CategorySchema])
 async def get_categories(
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     """Get all active categories"""
     query = select(Category).where(Category.is_active == True).order_by(Category.order)
@@ -25,7 +25,7 @@ async def get_categories(
 @router.get("/{category_id}/products", response_model=List[ProductSchema])
 async def get_category_products(
     category_id: str,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     """Get all active products in a category"""
     # First check if category exists
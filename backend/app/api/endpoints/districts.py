@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.api.deps import get_async_session
+from app.api.deps import get_read_session
 from app.db.models.product import District
 from app.schemas.product import District as DistrictSchema
 
@@ -12,7 +12,7 @@ router = APIRouter()
 
 @router.get("/", response_model=List[DistrictSchema])
 async def get_districts(
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     """Get all active delivery districts"""
     query = select(District).where(District.is_active == True).order_by(District.name)
@@ -6,6 +6,7 @@ from typing import Optional
 from datetime import datetime
 
 from app.core.config import settings
+from app.core.metrics import track_outbound
 
 router = APIRouter()
 
@@ -62,7 +63,7 @@ Please check the system logs for more details.
     """.strip()
     
     try:
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient() as client, track_outbound("telegram", "sendMessage"):
             response = await client.post(
                 f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage",
                 json={
@@ -0,0 +1,79 @@
+import re
+from typing import Tuple
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from PIL import Image, UnidentifiedImageError
+
+from app.core.config import settings
+from app.services.image_cache import image_cache
+from app.services.images import IMAGE_FORMATS, image_pool, process_image
+from app.services.s3 import VARIANT_KEY_RE, IMMUTABLE_CACHE_CONTROL, s3_service
+from app.services.storage import StorageError
+
+router = APIRouter()
+
+SIZE_RE = re.compile(r"^(?P<width>\d+)x(?P<height>\d+)$")
+
+# Only uploaded product imagery can be resized; staged uploads and other objects stay private
+PROXY_FOLDERS = ("products/", "packages/")
+
+# Originals without a content hash in their key may be replaced in place
+MUTABLE_CACHE_CONTROL = "public, max-age=86400"
+
+
+def _parse_size(size: str) -> Tuple[int, int]:
+    match = SIZE_RE.match(size)
+    if not match:
+        raise HTTPException(status_code=404, detail="Not found")
+    # Only sizes the clients render, so callers cannot fill the cache with arbitrary boxes
+    if size not in settings.IMAGE_PROXY_SIZES:
+        raise HTTPException(
+            status_code=400, detail=f"Image size must be one of: {', '.join(settings.IMAGE_PROXY_SIZES)}"
+        )
+    return int(match.group("width")), int(match.group("height"))
+
+
+@router.get("/{size}/{key:path}")
+async def get_resized_image(
+    size: str,
+    key: str,
+    fit: str = Query("contain", pattern="^(contain|cover)$"),
+    accept: str = Header(""),
+    if_none_match: str = Header(""),
+):
+    """
+    Serve an uploaded image scaled to WIDTHxHEIGHT, one of IMAGE_PROXY_SIZES
+
+    ``fit=contain`` keeps the whole image inside the box, ``fit=cover`` crops
+    it to fill the box, like the CSS object-fit values.
+    """
+    width, height = _parse_size(size)
+    if not key.startswith(PROXY_FOLDERS) or ".." in key.split("/"):
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    fmt = "webp" if "image/webp" in accept else "jpeg"
+    _, extension, content_type, _ = IMAGE_FORMATS[fmt]
+
+    async def render() -> Tuple[bytes, str]:
+        try:
+            original = await s3_service.storage.get(key)
+        except StorageError:
+            raise HTTPException(status_code=404, detail="Image not found")
+        try:
+            content = await image_pool.run(process_image, original, width, height, fmt, fit == "cover")
+        except (Image.DecompressionBombError, Image.DecompressionBombWarning, UnidentifiedImageError):
+            raise HTTPException(status_code=422, detail="Image cannot be resized")
+        return content, extension
+
+    entry, content = await image_cache.get_or_create(f"{width}x{height}/{fit}/{fmt}/{key}", render)
+
+    etag = f'"{entry.etag}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if VARIANT_KEY_RE.match(key) else MUTABLE_CACHE_CONTROL,
+        # The format follows the Accept header
+        "Vary": "Accept",
+    }
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type=content_type, headers=headers)
@@ -1,40 +1,95 @@
-from typing import List
+import asyncio
+from typing import List, Optional
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, text
+from sqlalchemy import insert, select, func, text, union_all
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import selectinload
 
-from app.api.deps import get_async_session, get_current_user
+from app.api.deps import get_async_session, get_current_user, get_user_read_session
+from app.db.session import read_router
 from app.db.models.user import User
-from app.db.models.order import Order, OrderItem, OrderStatus, DeliveryTimeSlot
+from app.db.models.order import ArchivedOrder, Order, OrderNumber, OrderItem, OrderStatus, DeliveryTimeSlot
 from app.db.models.product import District, PromoCode, Product
 from app.schemas.order import OrderCreate, Order as OrderSchema, OrderSummary
 from app.services.messaging import messaging_service
+from app.services.order_events import order_created, order_events
+from app.services import idempotency, order_archive, partitions, rollups
 
 router = APIRouter()
 
 
 async def get_next_order_id(session: AsyncSession) -> int:
-    """Get the next order ID starting from 100"""
-    result = await session.execute(
-        select(func.max(Order.order_id))
-    )
-    max_order_id = result.scalar()
+    """
+    Reserve the next order ID starting from 100
     
-    if max_order_id is None:
-        return 100
-    else:
-        return max_order_id + 1
+    The number is claimed in order_numbers, in the order's transaction. Its
+    primary key is the one guard on order_id across partitions and the archive:
+    a checkout racing for the same number waits for the other to commit, finds
+    it taken and tries the next one.
+    """
+    dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+    while True:
+        max_order_id = (await session.execute(select(func.max(OrderNumber.order_id)))).scalar()
+        candidate = 100 if max_order_id is None else max(max_order_id + 1, 100)
+        result = await session.execute(
+            dialect.insert(OrderNumber).values(order_id=candidate).on_conflict_do_nothing()
+        )
+        if result.rowcount:
+            return candidate
 
 
 @router.post("/", response_model=OrderSchema)
 async def create_order(
     order_data: OrderCreate,
     current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_async_session),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
+):
+    """Create a new order; retries with the same Idempotency-Key return the first result"""
+    if not idempotency_key:
+        return await _create_order(order_data, current_user, session)
+    
+    user_id = current_user.id  # The user is expired by the rollback on failure
+    fingerprint = idempotency.request_hash(order_data.model_dump(mode="json"))
+    previous = await idempotency.claim(session, user_id, idempotency_key, fingerprint)
+    if previous is not None:
+        return await _replay(session, previous)
+    
+    try:
+        return await _create_order(order_data, current_user, session, idempotency_key)
+    except BaseException:
+        # Cancelled requests too, or retries wait out the lease; shielded so a second cancel cannot skip it
+        try:
+            await asyncio.shield(idempotency.release(session, user_id, idempotency_key))
+        except Exception as e:
+            print(f"Warning: could not release Idempotency-Key {idempotency_key}: {e}")
+        raise
+
+
+async def _replay(session: AsyncSession, previous) -> JSONResponse:
+    """Answer a retried request from the order its key created"""
+    print(f"🔁 Replaying order {previous.order_id} for Idempotency-Key {previous.key}")
+    response = previous.response
+    if response is None:
+        # The order committed but its response was not stored
+        result = await session.execute(
+            select(Order)
+            .options(selectinload(Order.items), selectinload(Order.district))
+            .where(Order.id == previous.order_id)
+        )
+        response = OrderSchema.model_validate(result.scalar_one()).model_dump(mode="json")
+    return JSONResponse(response, headers={"Idempotent-Replayed": "true"})
+
+
+async def _create_order(
+    order_data: OrderCreate,
+    current_user: User,
+    session: AsyncSession,
+    idempotency_key: Optional[str] = None
 ):
-    """Create a new order"""
     print(f"🚀 Order creation started for user {current_user.id} ({current_user.first_name})")
     print(f"📊 Order data: {len(order_data.items)} items, total: {order_data.total}")
     
@@ -119,6 +174,22 @@ async def create_order(
             # Update promo usage
             promo.usage_count += 1
     
+    # Validate products in one query
+    product_ids = {item.product_id for item in order_data.items}
+    active_result = await session.execute(
+        select(Product.id).where(
+            Product.id.in_(product_ids),
+            Product.is_active == True
+        )
+    )
+    active_product_ids = set(active_result.scalars().all())
+    for item_data in order_data.items:
+        if item_data.product_id not in active_product_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Product {item_data.product_id} not found or inactive"
+            )
+    
     # Get next order ID
     next_order_id = await get_next_order_id(session)
     
@@ -141,24 +212,11 @@ async def create_order(
     session.add(order)
     await session.flush()  # Get order ID
     
-    # Validate products and create order items
-    for item_data in order_data.items:
-        # Validate product exists
-        product_result = await session.execute(
-            select(Product).where(
-                Product.id == item_data.product_id,
-                Product.is_active == True
-            )
-        )
-        product = product_result.scalar_one_or_none()
-        if not product:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Product {item_data.product_id} not found or inactive"
-            )
-        
-        order_item = OrderItem(
+    # Create order items in one executemany rather than one INSERT per item
+    await session.execute(insert(OrderItem), [
+        dict(
             order_id=order.id,
+            order_created_at=order.created_at,
             product_id=item_data.product_id,
             product_name=item_data.product_name,
             package_id=item_data.package_id,
@@ -168,14 +226,28 @@ async def create_order(
             price_per_unit=item_data.price_per_unit,
             total_price=item_data.total_price
         )
-        session.add(order_item)
+        for item_data in order_data.items
+    ])
     
+    await rollups.record_order_created(session, order)
+    if idempotency_key:
+        await idempotency.record_order(session, current_user.id, idempotency_key, order.id)
     await session.commit()
+    # The user's next reads should see this order even if the replica lags
+    read_router.pin(current_user.id)
     await session.refresh(order)
     
     # Load relationships
     await session.refresh(order, ["items", "district"])
     
+    if idempotency_key:
+        await idempotency.store_response(
+            session, current_user.id, idempotency_key,
+            OrderSchema.model_validate(order).model_dump(mode="json")
+        )
+    
+    await order_events.publish(order_created(order))
+    
     # Send confirmation messages
     client_message_sent = False
     admin_message_sent = False
@@ -207,46 +279,33 @@ async def create_order(
 @router.get("/", response_model=List[OrderSummary])
 async def get_user_orders(
     current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_user_read_session)
 ):
-    """Get current user's orders"""
-    query = (
-        select(Order)
-        .where(Order.user_id == current_user.id)
-        .order_by(Order.created_at.desc())
+    """Get current user's orders, archived ones included"""
+    items_count = (
+        select(func.coalesce(func.sum(OrderItem.quantity), 0))
+        .where(partitions.items_join())
+        .correlate(Order)
+        .scalar_subquery()
     )
+    summary_columns = ("id", "order_id", "user_id", "status", "total_amount", "delivery_date", "contact_name", "created_at")
+    history = union_all(
+        select(*[getattr(Order, name) for name in summary_columns], items_count.label("items_count"))
+        .where(Order.user_id == current_user.id),
+        select(*[getattr(ArchivedOrder, name) for name in summary_columns], ArchivedOrder.item_quantity.label("items_count"))
+        .where(ArchivedOrder.user_id == current_user.id),
+    ).subquery()
+    query = select(history).order_by(history.c.created_at.desc())
     
     result = await session.execute(query)
-    orders = result.scalars().all()
-    
-    # Convert to OrderSummary
-    order_summaries = []
-    for order in orders:
-        # Count items
-        items_count_query = select(func.sum(OrderItem.quantity)).where(OrderItem.order_id == order.id)
-        items_count_result = await session.execute(items_count_query)
-        items_count = items_count_result.scalar() or 0
-        
-        order_summaries.append(OrderSummary(
-            id=order.id,
-            order_id=order.order_id,
-            user_id=order.user_id,
-            status=order.status,
-            total_amount=order.total_amount,
-            delivery_date=order.delivery_date,
-            contact_name=order.contact_name,
-            created_at=order.created_at,
-            items_count=int(items_count)
-        ))
-    
-    return order_summaries
+    return [OrderSummary.model_validate(row) for row in result.mappings()]
 
 
 @router.get("/{order_id}", response_model=OrderSchema)
 async def get_order(
     order_id: int,
     current_user: User = Depends(get_current_user),
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_user_read_session)
 ):
     """Get specific order details"""
     query = (
@@ -261,6 +320,9 @@ async def get_order(
     result = await session.execute(query)
     order = result.scalar_one_or_none()
     
+    if not order:
+        order = await order_archive.get_archived_order(session, order_id, current_user.id)
+    
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
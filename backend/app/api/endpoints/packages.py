@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
 from sqlalchemy.orm import selectinload
 
-from app.api.deps import get_async_session
+from app.api.deps import get_async_session, get_read_session
 from app.db.models.product import ProductPackage, Product
 from app.schemas.product import (
     ProductPackage as ProductPackageSchema,
@@ -18,7 +18,7 @@ router = APIRouter()
 @router.get("/product/{product_id}", response_model=List[ProductPackageSchema])
 async def get_product_packages(
     product_id: str,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     """Get all packages for a specific product"""
     # First, verify the product exists
@@ -47,7 +47,7 @@ async def get_product_packages(
 @router.get("/{package_id}", response_model=ProductPackageSchema)
 async def get_package(
     package_id: int,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     """Get a specific package by ID"""
     query = select(ProductPackage).where(ProductPackage.id == package_id)
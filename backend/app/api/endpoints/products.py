@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
-from app.api.deps import get_async_session
+from app.api.deps import get_read_session
 from app.db.models.product import Product, ProductPackage
 from app.schemas.product import Product as ProductSchema, ProductWithPackages
 
@@ -15,7 +15,7 @@ router = APIRouter()
 async def get_products(
     category_id: Optional[str] = Query(None, description="Filter by category ID"),
     featured: Optional[bool] = Query(None, description="Filter by featured products"),
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     """Get all active products with optional filtering"""
     query = (
@@ -44,7 +44,7 @@ async def get_products(
 
 @router.get("/featured", response_model=List[ProductWithPackages])
 async def get_featured_products(
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     """Get all featured products"""
     query = (
@@ -68,7 +68,7 @@ async def get_featured_products(
 @router.get("/{product_id}", response_model=ProductWithPackages)
 async def get_product(
     product_id: str,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_read_session)
 ):
     """Get product details by ID"""
     query = (
@@ -0,0 +1,48 @@
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+
+from app.services.s3 import s3_service
+from app.services.storage import LocalStorageBackend, StorageError
+
+router = APIRouter()
+
+
+@router.put("/upload/{key:path}", status_code=204)
+async def upload_to_local_storage(
+    key: str,
+    request: Request,
+    content_type: str = Query(...),
+    max_bytes: int = Query(...),
+    expires: int = Query(...),
+    signature: str = Query(...)
+):
+    """
+    Receive a presigned upload for the local storage backend
+
+    Stands in for the storage service's own upload endpoint, so direct uploads
+    work the same way in development as against S3.
+    """
+    backend = s3_service.storage
+    if not isinstance(backend, LocalStorageBackend):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    if not backend.verify_upload(key, content_type, max_bytes, expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired upload signature")
+    if request.headers.get("content-type") != content_type:
+        raise HTTPException(status_code=400, detail="Content-Type does not match the signed upload")
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="File size too large"
+            )
+    if not body:
+        raise HTTPException(status_code=400, detail="Empty upload")
+
+    try:
+        await backend.put(key, bytes(body), content_type)
+    except StorageError as e:
+        raise HTTPException(status_code=500, detail=f"Storage upload failed: {str(e)}")
+    return Response(status_code=204)
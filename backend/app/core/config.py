@@ -14,6 +14,8 @@ class Settings(BaseSettings):
     TELEGRAM_BOT_TOKEN: str
     ADMIN_CHAT_ID: Optional[str] = None
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    PASSWORD_HASH_WORKERS: int = 2  # Threads dedicated to bcrypt hashing/verification
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 8  # Max bcrypt jobs handed to the pool at once
     
     # Testing
     TESTING: bool = False
@@ -39,6 +41,38 @@ class Settings(BaseSettings):
             path=values.data.get("POSTGRES_DB"),
         )
     
+    # Read replica
+    DATABASE_READ_URL: Optional[PostgresDsn] = None  # Unset sends every read to DATABASE_URL
+    DATABASE_READ_MAX_LAG: float = 5.0  # Seconds behind the primary before reads fall back to it
+    DATABASE_READ_LAG_CHECK_INTERVAL: float = 10.0  # Seconds between replica lag checks
+    READ_YOUR_WRITES_SECONDS: int = 30  # A user reads from the primary this long after writing
+    
+    # Statement timeouts (PostgreSQL)
+    DATABASE_STATEMENT_TIMEOUT: int = 15000  # Milliseconds per statement in request sessions; 0 for the server default
+    DATABASE_REPORT_STATEMENT_TIMEOUT: int = 120000  # Milliseconds per statement for analytics and exports
+    
+    # Order partitions (PostgreSQL)
+    ORDER_PARTITION_MONTHS_AHEAD: int = 3  # Monthly partitions kept ready after the current month
+    ORDER_PARTITION_CHECK_HOURS: float = 24  # Hours between checks for missing partitions
+    
+    # Order archive
+    ORDER_ARCHIVE_AFTER_DAYS: int = 365  # Delivered/cancelled orders older than this move to storage; 0 disables
+    ORDER_ARCHIVE_BATCH_SIZE: int = 500  # Orders moved per transaction
+    ORDER_ARCHIVE_INTERVAL_HOURS: float = 24  # Hours between archiver runs
+    
+    # Idempotent order submission
+    IDEMPOTENCY_TTL_HOURS: int = 24  # Retries with the same Idempotency-Key are answered from storage this long
+    IDEMPOTENCY_WAIT_SECONDS: float = 10  # A retry waits this long for the original request before a 409
+    IDEMPOTENCY_LEASE_SECONDS: float = 60  # An unfinished request older than this is presumed dead; a retry takes over
+    
+    # Metrics
+    METRICS_TOKEN: Optional[str] = None  # Bearer token Prometheus sends to /metrics; unset disables the endpoint
+    
+    # Query budgets (staging)
+    QUERY_TRACKING: bool = False  # Log routes that exceed the budgets below
+    QUERY_BUDGET_WARN: int = 30  # SQL statements per request before a route is logged
+    QUERY_REPEAT_LIMIT: int = 2  # Runs of one statement per request before it is logged as an N+1
+    
     # Redis
     REDIS_HOST: str = "redis"
     REDIS_PORT: int = 6379
@@ -50,6 +84,13 @@ class Settings(BaseSettings):
             return v
         return f"redis://{values.data.get('REDIS_HOST')}:{values.data.get('REDIS_PORT')}"
     
+    # Order event stream
+    ORDER_EVENTS_BACKEND: str = "redis"  # "redis" fans events out to every API worker, "memory" stays in-process
+    ORDER_EVENTS_CHANNEL: str = "order-events"  # Redis pub/sub channel
+    ORDER_EVENTS_HEARTBEAT: float = 15.0  # Seconds between keep-alive comments on an idle stream
+    ORDER_EVENTS_QUEUE_SIZE: int = 100  # Events buffered per stream; the oldest are dropped beyond this
+    ORDER_EVENTS_REDIS_COOLDOWN: float = 30.0  # Seconds writes skip Redis after a failed publish
+    
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
     
@@ -57,6 +98,11 @@ class Settings(BaseSettings):
     # Web App
     WEB_APP_URL: str
     
+    # Object storage
+    STORAGE_BACKEND: str = "s3"  # "s3" or "local"
+    LOCAL_STORAGE_DIR: str = "static/uploads"  # Keep below static/ so files are served
+    LOCAL_STORAGE_URL: str = "/static/uploads"  # Public URL prefix for LOCAL_STORAGE_DIR
+    
     # S3 Configuration
     S3_ENDPOINT_URL: Optional[str] = None
     S3_ACCESS_KEY_ID: Optional[str] = None
@@ -64,6 +110,33 @@ class Settings(BaseSettings):
     S3_BUCKET_NAME: Optional[str] = None
     S3_REGION: Optional[str] = None
     S3_PUBLIC_URL: Optional[str] = None
+    STORAGE_IO_WORKERS: int = 8  # Threads for blocking storage client calls
+    
+    # Image processing
+    IMAGE_PROCESS_WORKERS: int = 2  # Worker processes for Pillow work
+    IMAGE_MAX_PENDING: int = 4  # Images processing or queued before new uploads wait
+    IMAGE_QUEUE_TIMEOUT: float = 10.0  # Seconds to wait for a slot before answering 503
+    IMAGE_VARIANT_WIDTHS: List[int] = [320, 640, 1200]  # Widths rendered for every upload
+    IMAGE_VARIANT_FORMATS: List[str] = ["webp", "jpeg"]
+    IMAGE_MAX_PIXELS: int = 40_000_000  # Decompression-bomb limit (~40MP)
+    UPLOAD_CHUNK_SIZE: int = 64 * 1024  # Bytes read from an upload per step
+    UPLOAD_SPOOL_MAX_MEMORY: int = 1024 * 1024  # Uploads above this spill to a temp file
+    DIRECT_UPLOAD_MAX_SIZE_MB: int = 5  # Limit for presigned uploads straight to storage
+    DIRECT_UPLOAD_EXPIRES: int = 15 * 60  # Seconds a presigned upload target stays valid
+    IMAGE_PROXY_SIZES: List[str] = ["80x80", "160x160", "240x240"]  # Boxes served by /img: webapp thumbnails at 1x-3x
+    IMAGE_CACHE_DIR: str = "cache/images"  # Resized images rendered by /img
+    IMAGE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    IMAGE_GC_MIN_AGE_HOURS: int = 24  # Unreferenced images younger than this are kept
+    
+    # Background jobs
+    BACKGROUND_WORKERS: int = 2  # Coroutines draining the in-process job queue
+    BACKGROUND_QUEUE_SIZE: int = 100  # Queued jobs before new ones are refused with 503
+    EXPORT_PROCESS_WORKERS: int = 1  # Worker processes rendering report files
+    EXPORT_TTL_HOURS: int = 24  # Finished reports are deleted from storage after this
+    
+    # Dashboard analytics
+    ANALYTICS_CACHE_TTL: int = 60  # Seconds a computed time series is reused
+    STATS_CACHE_TTL: int = 30  # Seconds dashboard counts are reused
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,336 @@
+"""
+Prometheus metrics
+
+A small in-process registry rendered in the Prometheus text format at
+``/metrics``, which only answers requests carrying METRICS_TOKEN. Counters and histograms are updated as things happen: HTTP
+requests by MetricsMiddleware, SQL statements by engine event listeners,
+outbound Telegram and storage calls through ``track_outbound``. Gauges such
+as pool usage and queue depths are read from their owners when scraped.
+
+Values are per process; with several workers, Prometheus scrapes and sums
+each one.
+"""
+import contextvars
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_labels(names: Iterable[str], values: Iterable[Any]) -> str:
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """Named metric with a fixed set of label names"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(name suffix, formatted labels, value) for every series"""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, labels, value in self.samples():
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        return [("", _format_labels(self.labelnames, key), value) for key, value in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    """Gauge set directly, or read from ``collect`` on every scrape"""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        collect: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._collectors: List[Callable[[], Dict[LabelValues, float]]] = [collect] if collect else []
+
+    def add_collector(self, collect: Callable[[], Dict[LabelValues, float]]) -> None:
+        self._collectors.append(collect)
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        values = dict(self._values)
+        for collect in self._collectors:
+            try:
+                values.update(collect())
+            except Exception as e:
+                print(f"Warning: Collecting metric {self.name} failed: {e}")
+        return [("", _format_labels(self.labelnames, key), value) for key, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: count in each bucket (not cumulative) plus one for +Inf, then the sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def count(self, **labels: Any) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def sum(self, **labels: Any) -> float:
+        series = self._series.get(self._key(labels))
+        return series[1][0] if series else 0.0
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        result = []
+        for key, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bound),))
+                result.append(("_bucket", labels, cumulative))
+            labels = _format_labels(self.labelnames, key)
+            result.append(("_sum", labels, total[0]))
+            result.append(("_count", labels, cumulative))
+        return result
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# HTTP
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Time from request start to the end of the response body", ("method", "route")
+))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge("http_requests_in_flight", "HTTP requests being handled"))
+HTTP_QUERIES = REGISTRY.register(Histogram(
+    "http_request_db_queries", "SQL statements run while handling a request", ("method", "route"),
+    buckets=QUERY_COUNT_BUCKETS,
+))
+HTTP_QUERY_TIME = REGISTRY.register(Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements while handling a request", ("method", "route")
+))
+
+# Database
+DB_QUERIES = REGISTRY.register(Counter("db_queries_total", "SQL statements executed", ("engine",)))
+DB_QUERY_TIME = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ("engine",), buckets=QUERY_BUCKETS
+))
+DB_POOL_SIZE = REGISTRY.register(Gauge("db_pool_size", "Configured connection pool size", ("engine",)))
+DB_POOL_CHECKED_OUT = REGISTRY.register(Gauge(
+    "db_pool_checked_out", "Connections currently checked out", ("engine",)
+))
+DB_POOL_OVERFLOW = REGISTRY.register(Gauge(
+    "db_pool_overflow", "Connections open beyond the pool size", ("engine",)
+))
+DB_POOL_WAIT = REGISTRY.register(Histogram(
+    "db_pool_wait_seconds", "Time spent waiting to check out a connection", ("engine",), buckets=QUERY_BUCKETS
+))
+
+# Outbound calls and background work
+OUTBOUND_LATENCY = REGISTRY.register(Histogram(
+    "outbound_request_duration_seconds", "Calls to external services", ("service", "operation", "outcome")
+))
+QUEUE_DEPTH = REGISTRY.register(Gauge("background_queue_depth", "Jobs waiting or running per queue", ("queue",)))
+
+
+@asynccontextmanager
+async def track_outbound(service: str, operation: str) -> AsyncIterator[None]:
+    """Time a call to an external service; outcome is "error" if it raises"""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        OUTBOUND_LATENCY.observe(time.perf_counter() - start, service=service, operation=operation, outcome=outcome)
+
+
+class _RequestQueries:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Statements run while handling the current request; None outside requests
+_request_queries: contextvars.ContextVar[Optional[_RequestQueries]] = contextvars.ContextVar(
+    "request_queries", default=None
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long checkouts wait for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - start, engine=self.logging_name or "default")
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Count and time an engine's statements and expose its pool usage"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        DB_QUERIES.inc(engine=name)
+        DB_QUERY_TIME.observe(elapsed, engine=name)
+        queries = _request_queries.get()
+        if queries is not None:
+            queries.count += 1
+            queries.seconds += elapsed
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        if context.connection is not None:
+            starts = context.connection.info.get("query_start")
+            if starts:
+                starts.pop()
+
+    pool = sync_engine.pool
+    if hasattr(pool, "checkedout"):
+        DB_POOL_SIZE.add_collector(lambda: {(name,): pool.size()})
+        DB_POOL_CHECKED_OUT.add_collector(lambda: {(name,): pool.checkedout()})
+        DB_POOL_OVERFLOW.add_collector(lambda: {(name,): max(pool.overflow(), 0)})
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route request counts, latency and SQL use
+
+    Routes are labelled by their template (``/api/v1/orders/{order_id}``) so
+    IDs in paths do not create new series; requests that match no route share
+    the "unmatched" label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        queries = _RequestQueries()
+        token = _request_queries.set(queries)
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            _request_queries.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method=method, route=route_path, status=status_code)
+            HTTP_LATENCY.observe(elapsed, method=method, route=route_path)
+            HTTP_QUERIES.observe(queries.count, method=method, route=route_path)
+            HTTP_QUERY_TIME.observe(queries.seconds, method=method, route=route_path)
@@ -0,0 +1,117 @@
+"""
+SQL statement tracking for query budgets and N+1 detection
+
+Statements executed while a tracker is active are recorded by an engine
+event listener. A statement whose text repeats within one request or test
+is the usual sign of an N+1: the same query run once per row with
+different parameters. Tests declare budgets with ``query_budget``; in
+staging, QueryTrackingMiddleware logs routes that exceed
+QUERY_BUDGET_WARN statements or repeat one more than QUERY_REPEAT_LIMIT
+times.
+"""
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+
+# Longest statement text quoted in a report
+REPORT_SQL_LENGTH = 300
+
+# Execution options for housekeeping statements that budgets should not count
+UNTRACKED = {"query_tracking": False}
+
+
+class QueryTracker:
+    """Statements run while the tracker is active"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def repeated(self, limit: int) -> List[Tuple[str, int]]:
+        """Statements run more than limit times, most frequent first"""
+        return [(sql, n) for sql, n in Counter(self.statements).most_common() if n > limit]
+
+    def problems(self, max_queries: Optional[int] = None, max_repeats: Optional[int] = None) -> List[str]:
+        """Descriptions of every way the statements exceed the given limits"""
+        problems = []
+        if max_queries is not None and self.count > max_queries:
+            problems.append(f"{self.count} SQL statements, budget is {max_queries}")
+        if max_repeats is not None:
+            for sql, n in self.repeated(max_repeats):
+                sql = " ".join(sql.split())[:REPORT_SQL_LENGTH]
+                problems.append(f"statement run {n} times (limit {max_repeats}): {sql}")
+        return problems
+
+
+_active_trackers: contextvars.ContextVar[Tuple[QueryTracker, ...]] = contextvars.ContextVar(
+    "active_query_trackers", default=()
+)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block runs more statements than its budget allows"""
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryTracker]:
+    """Record the statements run in this context until the block exits"""
+    tracker = QueryTracker()
+    token = _active_trackers.set(_active_trackers.get() + (tracker,))
+    try:
+        yield tracker
+    finally:
+        _active_trackers.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: Optional[int] = None, max_repeats: Optional[int] = 1) -> Iterator[QueryTracker]:
+    """
+    Fail with QueryBudgetExceeded if the block overruns its statement budget
+
+    Args:
+        max_queries: Most statements the block may run; None for no limit
+        max_repeats: Most times one statement text may run; None for no limit
+    """
+    with track_queries() as tracker:
+        yield tracker
+    problems = tracker.problems(max_queries, max_repeats)
+    if problems:
+        raise QueryBudgetExceeded("Query budget exceeded:\n  " + "\n  ".join(problems))
+
+
+def install(engine) -> None:
+    """Report an engine's statements to the active trackers"""
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and context.execution_options.get("query_tracking") is False:
+            return
+        for tracker in _active_trackers.get():
+            tracker.statements.append(statement)
+
+
+class QueryTrackingMiddleware:
+    """ASGI middleware logging routes that run too many or repeated statements"""
+
+    def __init__(self, app, max_queries: int, max_repeats: int):
+        self.app = app
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as tracker:
+            await self.app(scope, receive, send)
+
+        problems = tracker.problems(self.max_queries, self.max_repeats)
+        if problems:
+            route = getattr(scope.get("route"), "path", None) or scope["path"]
+            print(f"Warning: {scope['method']} {route} exceeded its query budget:\n  " + "\n  ".join(problems))
@@ -1,5 +1,7 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union, Optional
+from typing import Any, Callable, Union, Optional, TypeVar
 import jwt
 from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -11,6 +13,17 @@ from app.db.models.admin import AdminUser
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt is deliberately slow, so it runs on a small dedicated pool instead of
+# the event loop; the semaphore keeps login bursts from piling up in the pool queue
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+_password_semaphore: Optional[asyncio.Semaphore] = None
+_password_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+T = TypeVar("T")
+
 # JWT settings
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
@@ -65,6 +78,33 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _get_password_semaphore() -> asyncio.Semaphore:
+    """Get the concurrency cap for the running event loop"""
+    global _password_semaphore, _password_semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _password_semaphore is None or _password_semaphore_loop is not loop:
+        _password_semaphore = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_CONCURRENCY)
+        _password_semaphore_loop = loop
+    return _password_semaphore
+
+
+async def _run_in_password_pool(func: Callable[..., T], *args: Any) -> T:
+    """Run a bcrypt call on the password pool without blocking the event loop"""
+    async with _get_password_semaphore():
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, func, *args)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash off the event loop"""
+    return await _run_in_password_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password off the event loop"""
+    return await _run_in_password_pool(get_password_hash, password)
+
+
 async def authenticate_admin(session: AsyncSession, username: str, password: str) -> Optional[AdminUser]:
     """Authenticate admin user with username/password"""
     query = select(AdminUser).where(
@@ -76,7 +116,7 @@ async def authenticate_admin(session: AsyncSession, username: str, password: str
     
     if not admin:
         return None
-    if not verify_password(password, admin.password_hash):
+    if not await verify_password_async(password, admin.password_hash):
         return None
     return admin
 
@@ -1,7 +1,7 @@
 # Import all models here for Alembic to pick them up
 from app.db.session import Base  # noqa
-from app.db.models.user import User  # noqa
+from app.db.models.user import User, UserDailySignups  # noqa
 from app.db.models.product import Category, Product, ProductPackage, District, PromoCode  # noqa
-from app.db.models.order import Order, OrderItem, OrderStatus, DeliveryTimeSlot  # noqa
+from app.db.models.order import Order, OrderItem, OrderStatus, DeliveryTimeSlot, OrderNumber, ArchivedOrder, IdempotencyKey, OrderDailyStats, OrderCategoryDailyStats  # noqa
 from app.db.models.admin import AdminUser  # noqa
 from app.db.models.admin_settings import AdminSetting  # noqa
\ No newline at end of file
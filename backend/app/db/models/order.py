@@ -1,4 +1,7 @@
-from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, Text, Enum as SQLEnum
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, DateTime, ForeignKey, Text, JSON, Enum as SQLEnum
+from sqlalchemy import event, select
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -29,7 +32,7 @@ class DeliveryTimeSlot(enum.Enum):
 class Order(Base):
     __tablename__ = "orders"
     
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, primary_key=True)  # (id, created_at) in the partitioned PostgreSQL table
     order_id = Column(Integer, unique=True, nullable=False)
     user_id = Column(BigInteger, ForeignKey("users.id"), nullable=False)
     
@@ -59,7 +62,12 @@ class Order(Base):
     contact_phone = Column(String, nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key on PostgreSQL; also set client-side so items can copy it before a reload
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+    )
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
@@ -74,8 +82,9 @@ class Order(Base):
 class OrderItem(Base):
     __tablename__ = "order_items"
     
-    id = Column(Integer, primary_key=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    id = Column(Integer, primary_key=True)  # (id, order_created_at) in the partitioned PostgreSQL table
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
+    order_created_at = Column(DateTime(timezone=True), nullable=False)  # Order's created_at, the partition key
     product_id = Column(String, ForeignKey("products.id"), nullable=False)
     
     # Item details (expected/ordered)
@@ -100,4 +109,103 @@ class OrderItem(Base):
     product = relationship("Product")  # Temporarily removed back_populates
     
     def __repr__(self):
-        return f"<OrderItem: {self.product_name} x{self.quantity}>"
\ No newline at end of file
+        return f"<OrderItem: {self.product_name} x{self.quantity}>"
+
+
+@event.listens_for(OrderItem, "before_insert")
+def copy_order_created_at(mapper, connection, item):
+    """Fill order_created_at from the order in the INSERT itself when the caller left it out"""
+    if item.order_created_at is not None:
+        return
+    order = item.__dict__.get("order")
+    if order is not None and order.created_at is not None:
+        item.order_created_at = order.created_at
+    else:
+        item.order_created_at = (
+            select(Order.created_at).where(Order.id == item.order_id).scalar_subquery()
+        )
+
+
+class OrderNumber(Base):
+    """Every order number handed out; unique across order partitions and the archive"""
+    __tablename__ = "order_numbers"
+    
+    order_id = Column(Integer, primary_key=True, autoincrement=False)  # Order.order_id
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<OrderNumber #{self.order_id}>"
+
+
+class ArchivedOrder(Base):
+    """Order moved to the cold archive: list-view and rollup fields plus the file holding the rest"""
+    __tablename__ = "archived_orders"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)  # Order.id before archiving
+    order_id = Column(Integer, unique=True, nullable=False)
+    user_id = Column(BigInteger, nullable=False, index=True)
+    status = Column(SQLEnum(OrderStatus), nullable=False)
+    district_id = Column(Integer, nullable=False)
+    total_amount = Column(Float, nullable=False)
+    discount_amount = Column(Float, nullable=False, default=0)
+    delivery_date = Column(DateTime(timezone=True), nullable=False)
+    contact_name = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    
+    item_quantity = Column(Integer, nullable=False, default=0)
+    categories = Column(JSON, nullable=False, default=list)  # [category_id, item quantity, item total] for rollup rebuilds
+    archive_key = Column(String, nullable=False)  # Storage key of the file with the full order
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<ArchivedOrder #{self.order_id} in {self.archive_key}>"
+
+
+class IdempotencyKey(Base):
+    """Order submission made under an Idempotency-Key, and the response retries get"""
+    __tablename__ = "idempotency_keys"
+    
+    user_id = Column(BigInteger, primary_key=True)
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)  # SHA-256 of the request body
+    order_id = Column(Integer, nullable=True)  # Order.id, set in the transaction that creates it
+    response = Column(JSON, nullable=True)  # Response body; null while the request is in flight
+    claimed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())  # Start of the lease
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<IdempotencyKey {self.key} for user {self.user_id}>"
+
+
+class OrderDailyStats(Base):
+    """Per-day order totals by status and district, kept in step with orders"""
+    __tablename__ = "order_daily_stats"
+    
+    day = Column(Date, primary_key=True)  # UTC date the order was created
+    status = Column(SQLEnum(OrderStatus), primary_key=True)
+    district_id = Column(Integer, primary_key=True)
+    
+    order_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+    discount = Column(Float, nullable=False, default=0)
+    item_quantity = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<OrderDailyStats {self.day} {self.status.value} district {self.district_id}: {self.order_count}>"
+
+
+class OrderCategoryDailyStats(Base):
+    """Per-day order totals by status and product category"""
+    __tablename__ = "order_category_daily_stats"
+    
+    day = Column(Date, primary_key=True)  # UTC date the order was created
+    status = Column(SQLEnum(OrderStatus), primary_key=True)
+    category_id = Column(String, primary_key=True)
+    
+    order_count = Column(Integer, nullable=False, default=0)  # Orders with items in the category
+    revenue = Column(Float, nullable=False, default=0)  # Item totals with the order discount spread over them
+    item_quantity = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<OrderCategoryDailyStats {self.day} {self.status.value} {self.category_id}: {self.order_count}>"
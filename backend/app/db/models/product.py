@@ -31,6 +31,8 @@ class Product(Base):
     description = Column(Text, nullable=True)
     price_per_kg = Column(Float, nullable=False)
     image_url = Column(String, nullable=True)
+    # Resized copies of image_url: [{"url", "width", "height", "format"}]
+    image_variants = Column(JSON, nullable=True, default=list)
     
     # Available packages as JSON (DEPRECATED - use ProductPackage model instead)
     # Format: [{"id": "1kg", "weight": 1, "unit": "кг", "available": true}]
@@ -78,6 +80,7 @@ class ProductPackage(Base):
     unit = Column(String, nullable=False)  # "г", "кг", "шт", "набір"
     price = Column(Float, nullable=False)
     image_url = Column(String, nullable=True)
+    image_variants = Column(JSON, nullable=True, default=list)  # Resized copies of image_url
     available = Column(Boolean, default=True)
     sort_order = Column(Integer, default=0)
     note = Column(String, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, String, DateTime, Boolean, Integer
+from sqlalchemy import Column, BigInteger, String, Date, DateTime, Boolean, Integer
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -33,4 +33,15 @@ class User(Base):
     orders = relationship("Order", back_populates="user")
     
     def __repr__(self):
-        return f"<User {self.id}: {self.first_name}>"
\ No newline at end of file
+        return f"<User {self.id}: {self.first_name}>"
+
+
+class UserDailySignups(Base):
+    """New users per day"""
+    __tablename__ = "user_daily_signups"
+    
+    day = Column(Date, primary_key=True)  # UTC date the user was created
+    new_users = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<UserDailySignups {self.day}: {self.new_users}>"
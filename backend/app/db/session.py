@@ -1,9 +1,16 @@
-from typing import AsyncGenerator
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Dict, List, Optional
 
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from starlette.requests import HTTPConnection
 
 from app.core.config import settings
+from app.core import query_tracker
+from app.core.metrics import InstrumentedQueuePool, instrument_engine
 
 # Create async engine
 engine = create_async_engine(
@@ -12,7 +19,11 @@ engine = create_async_engine(
     future=True,
     pool_size=10,
     max_overflow=20,
+    poolclass=InstrumentedQueuePool,
+    pool_logging_name="primary",
 )
+instrument_engine(engine, "primary")
+query_tracker.install(engine)
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -23,14 +34,239 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+# Engine for a read replica, when one is configured
+read_engine = create_async_engine(
+    str(settings.DATABASE_READ_URL),
+    echo=False,
+    future=True,
+    pool_size=10,
+    max_overflow=20,
+    poolclass=InstrumentedQueuePool,
+    pool_logging_name="replica",
+) if settings.DATABASE_READ_URL else None
+if read_engine is not None:
+    instrument_engine(read_engine, "replica")
+    query_tracker.install(read_engine)
+
+ReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+) if read_engine else None
+
 # Create base class for models
 Base = declarative_base()
 
 
-async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
-    """Dependency to get async database session"""
-    async with AsyncSessionLocal() as session:
+def transaction_settings(read_only: bool, statement_timeout: Optional[int]) -> List[str]:
+    """PostgreSQL statements that open a transaction with the given options"""
+    statements = []
+    if read_only:
+        statements.append("SET TRANSACTION READ ONLY")
+    if statement_timeout:
+        statements.append(f"SET LOCAL statement_timeout = {int(statement_timeout)}")
+    return statements
+
+
+class LazySession:
+    """
+    Stands in for an AsyncSession that is only created on first use
+
+    Requests answered from a cache or rejected before touching the database
+    never build a session. Every transaction the session begins on
+    PostgreSQL is opened read-only and/or with a statement timeout
+    (milliseconds) if asked; other databases ignore both.
+    """
+
+    def __init__(
+        self,
+        factory: async_sessionmaker,
+        read_only: bool = False,
+        statement_timeout: Optional[int] = None,
+    ):
+        self._factory = factory
+        self._session: Optional[AsyncSession] = None
+        self.read_only = read_only
+        self.statement_timeout = statement_timeout
+
+    @property
+    def opened(self) -> bool:
+        return self._session is not None
+
+    def _open(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._factory()
+            statements = transaction_settings(self.read_only, self.statement_timeout)
+            if statements:
+                @event.listens_for(self._session.sync_session, "after_begin")
+                def configure_transaction(session, transaction, connection):
+                    if connection.dialect.name != "postgresql":
+                        return
+                    for statement in statements:
+                        connection.exec_driver_sql(statement, execution_options=query_tracker.UNTRACKED)
+        return self._session
+
+    def __getattr__(self, name):
+        return getattr(self._open(), name)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+
+# Seconds behind the primary; 0 when everything received has been replayed
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+""")
+LAG_CHECK_TIMEOUT = 2.0
+
+
+class ReadRouter:
+    """
+    Picks the session factory for reads that can tolerate replica lag
+
+    Reads go to the replica unless none is configured, it is more than
+    max_lag seconds behind, or the lag check fails. Lag is checked at most
+    every check_interval seconds, by one request at a time while the others
+    keep the last answer. A user pinned after a write reads from the primary
+    for pin_seconds so they see their own changes. Pins are kept per process.
+    """
+
+    def __init__(
+        self,
+        primary: async_sessionmaker,
+        replica: Optional[async_sessionmaker],
+        max_lag: float,
+        check_interval: float,
+        pin_seconds: float,
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.pin_seconds = pin_seconds
+        self._replica_ok = True
+        self._checked_at = float("-inf")
+        self._lock = asyncio.Lock()
+        self._pins: Dict[int, float] = {}
+
+    def pin(self, user_id: int) -> None:
+        """Send user_id's reads to the primary for the next pin_seconds"""
+        now = time.monotonic()
+        for expired in [key for key, until in self._pins.items() if until <= now]:
+            del self._pins[expired]
+        self._pins[user_id] = now + self.pin_seconds
+
+    def is_pinned(self, user_id: int) -> bool:
+        until = self._pins.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    async def _replica_lag(self) -> Optional[float]:
+        async with self.replica() as session:
+            lag = (await session.execute(REPLICA_LAG_SQL)).scalar()
+        return float(lag) if lag is not None else None
+
+    async def _check_replica(self) -> bool:
+        try:
+            lag = await asyncio.wait_for(self._replica_lag(), timeout=LAG_CHECK_TIMEOUT)
+        except Exception as e:
+            print(f"Warning: Read replica check failed, reading from primary: {e!r}")
+            return False
+        if lag is not None and lag > self.max_lag:
+            print(f"Warning: Read replica is {lag:.1f}s behind, reading from primary")
+            return False
+        return True
+
+    async def replica_usable(self) -> bool:
+        """Whether reads may go to the replica right now"""
+        if self.replica is None:
+            return False
+        if time.monotonic() - self._checked_at < self.check_interval or self._lock.locked():
+            return self._replica_ok
+        async with self._lock:
+            self._replica_ok = await self._check_replica()
+            self._checked_at = time.monotonic()
+        return self._replica_ok
+
+    async def factory(self, user_id: Optional[int] = None) -> async_sessionmaker:
+        """Session factory for a read, on behalf of user_id if given"""
+        if user_id is not None and self.is_pinned(user_id):
+            return self.primary
+        if await self.replica_usable():
+            return self.replica
+        return self.primary
+
+    @asynccontextmanager
+    async def session(
+        self, user_id: Optional[int] = None, statement_timeout: Optional[int] = None
+    ) -> AsyncIterator[AsyncSession]:
+        """Read-only session from factory(), created on first use"""
+        session = LazySession(await self.factory(user_id), read_only=True, statement_timeout=statement_timeout)
         try:
             yield session
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+
+read_router = ReadRouter(
+    AsyncSessionLocal,
+    ReadSessionLocal,
+    max_lag=settings.DATABASE_READ_MAX_LAG,
+    check_interval=settings.DATABASE_READ_LAG_CHECK_INTERVAL,
+    pin_seconds=settings.READ_YOUR_WRITES_SECONDS,
+)
+
+
+def session_options(statement_timeout: Optional[int] = None, read_only: Optional[bool] = None):
+    """
+    Route dependency overriding the options of the request's sessions
+
+    Args:
+        statement_timeout: Milliseconds a statement may run; 0 for the server default
+        read_only: Open transactions read-only
+
+    Returns:
+        Dependency for a route's or router's ``dependencies``
+    """
+    async def apply_session_options(connection: HTTPConnection) -> None:
+        if statement_timeout is not None:
+            connection.state.statement_timeout = statement_timeout
+        if read_only is not None:
+            connection.state.read_only = read_only
+
+    return apply_session_options
+
+
+async def read_only_gets(connection: HTTPConnection) -> None:
+    """Router dependency running the sessions of GET requests in read-only transactions"""
+    if connection.scope.get("method") in ("GET", "HEAD"):
+        connection.state.read_only = True
+
+
+def statement_timeout(connection: HTTPConnection) -> int:
+    """Statement timeout for the request's sessions, in milliseconds"""
+    return getattr(connection.state, "statement_timeout", settings.DATABASE_STATEMENT_TIMEOUT)
+
+
+async def get_async_session(connection: HTTPConnection) -> AsyncGenerator[AsyncSession, None]:
+    """Dependency to get async database session, created on first use"""
+    session = LazySession(
+        AsyncSessionLocal,
+        read_only=getattr(connection.state, "read_only", False),
+        statement_timeout=statement_timeout(connection),
+    )
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def get_read_session(connection: HTTPConnection) -> AsyncGenerator[AsyncSession, None]:
+    """Dependency to get a session for reads that can tolerate replica lag"""
+    async with read_router.session(statement_timeout=statement_timeout(connection)) as session:
+        yield session
@@ -1,11 +1,19 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
+import hmac
 import os
 
 from app.core.config import settings
-from app.api.endpoints import categories, products, packages, orders, districts, promo, admin, errors, bot, auth
+from app.core import metrics, query_tracker
+from app.api.endpoints import categories, products, packages, orders, districts, promo, admin, errors, bot, auth, storage, images
+from app.services import export_jobs, idempotency, order_archive, partitions
+from app.services.images import image_pool
+from app.services.order_events import order_events
+from app.services.s3 import s3_service
+from app.services.scheduler import scheduler
+from app.services.tasks import task_queue
 
 # Create FastAPI app
 app = FastAPI(
@@ -23,6 +31,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Statement budgets per request, logged in staging
+if settings.QUERY_TRACKING:
+    app.add_middleware(
+        query_tracker.QueryTrackingMiddleware,
+        max_queries=settings.QUERY_BUDGET_WARN,
+        max_repeats=settings.QUERY_REPEAT_LIMIT,
+    )
+
+# Request counts, latency and SQL use per route, served at /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.QUEUE_DEPTH.add_collector(lambda: {
+    ("background",): task_queue.depth,
+    ("image_processing",): image_pool.pending,
+    ("exports",): export_jobs.active_count(),
+})
+
+# Periodic maintenance, started with the application
+scheduler.every(settings.ORDER_PARTITION_CHECK_HOURS * 3600, partitions.maintain_partitions)
+if settings.ORDER_ARCHIVE_AFTER_DAYS:
+    scheduler.every(settings.ORDER_ARCHIVE_INTERVAL_HOURS * 3600, order_archive.run_archiver)
+scheduler.every(3600, idempotency.purge_expired_keys)
+scheduler.every(3600, export_jobs.purge_expired_exports)
+
 # Include API routers
 app.include_router(categories.router, prefix=f"{settings.API_V1_STR}/categories", tags=["categories"])
 app.include_router(products.router, prefix=f"{settings.API_V1_STR}/products", tags=["products"])
@@ -34,6 +65,12 @@ app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/admin/auth", tags
 app.include_router(admin.router, prefix=f"{settings.API_V1_STR}/admin", tags=["admin"])
 app.include_router(errors.router, prefix=f"{settings.API_V1_STR}/errors", tags=["errors"])
 app.include_router(bot.router, prefix=f"{settings.API_V1_STR}/bot", tags=["bot"])
+app.include_router(storage.router, prefix=f"{settings.API_V1_STR}/storage", tags=["storage"])
+app.include_router(images.router, prefix="/img", tags=["images"])
+
+# Local object storage lives below static/, so make sure the mount exists
+if settings.STORAGE_BACKEND == "local":
+    os.makedirs(settings.LOCAL_STORAGE_DIR, exist_ok=True)
 
 # Serve static files (for product images)
 if os.path.exists("static"):
@@ -47,6 +84,21 @@ if os.path.exists("static/webapp"):
 if os.path.exists("../admin-panel/build"):
     app.mount("/adminpanel", StaticFiles(directory="../admin-panel/build", html=True), name="adminpanel")
 
+@app.on_event("startup")
+async def start_scheduled_jobs():
+    """Start periodic maintenance jobs"""
+    scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown_workers():
+    """Stop scheduled and background jobs, image processing, export and storage worker pools, order event listener"""
+    await scheduler.shutdown()
+    await task_queue.shutdown()
+    image_pool.shutdown()
+    export_jobs.shutdown()
+    s3_service.shutdown()
+    await order_events.shutdown()
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -57,6 +109,15 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(authorization: str = Header("")):
+    """Metrics in the Prometheus text format, for scrapers holding METRICS_TOKEN"""
+    expected = f"Bearer {settings.METRICS_TOKEN}" if settings.METRICS_TOKEN else None
+    if expected is None or not hmac.compare_digest(authorization.encode(), expected.encode()):
+        # Answer like an unknown route, so the endpoint is not advertised
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
 # Serve webapp index for SPA routing
 @app.get("/webapp/{full_path:path}")
 async def serve_webapp(full_path: str):
@@ -1,9 +1,11 @@
-from typing import List, Optional, Generic, TypeVar, Any
-from pydantic import BaseModel, validator, field_validator
-from datetime import datetime
+from typing import Dict, List, Optional, Generic, TypeVar, Any
+from pydantic import BaseModel, Field, validator, field_validator
+from datetime import date, datetime
 import html
 import re
 
+from app.schemas.product import ImageVariant, ImageVariants
+
 T = TypeVar('T')
 
 # Authentication schemas
@@ -47,6 +49,64 @@ class PaginatedResponse(BaseModel, Generic[T]):
 
 class ImageUploadResponse(BaseModel):
     url: str
+    variants: List[ImageVariant] = []
+
+# Direct-to-storage uploads
+class DirectUploadRequest(BaseModel):
+    content_type: str
+
+class DirectUploadTarget(BaseModel):
+    upload_id: str
+    key: str
+    method: str
+    url: str
+    fields: Dict[str, str] = {}
+    headers: Dict[str, str] = {}
+    expires_in: int
+
+class DirectUploadComplete(BaseModel):
+    upload_id: str = Field(pattern=r"^[0-9a-f]{32}$")
+    product_id: Optional[str] = None
+    package_id: Optional[int] = None
+
+class DirectUploadStatus(BaseModel):
+    upload_id: str
+    status: str  # queued, processing, done, failed
+    product_id: Optional[str] = None
+    package_id: Optional[int] = None
+    url: Optional[str] = None
+    variants: List[ImageVariant] = []
+    error: Optional[str] = None
+
+# Background order exports
+class ExportJobRequest(BaseModel):
+    start_date: str
+    end_date: str
+    format: str = Field("xlsx", pattern="^(xlsx|csv)$")
+
+class ExportJobStatus(BaseModel):
+    job_id: str
+    status: str  # queued, processing, done, failed, expired
+    format: str
+    start_date: str
+    end_date: str
+    rows_total: Optional[int] = None
+    rows_done: int = 0
+    progress: int = 0  # percent
+    filename: str
+    size: Optional[int] = None
+    created_at: datetime
+    expires_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+class ImageGCReport(BaseModel):
+    dry_run: bool
+    scanned: int
+    orphaned: int
+    orphaned_bytes: int
+    deleted: int
+    failed: int
+    sample: List[str] = []
 
 # Category schemas
 class CategoryCreate(BaseModel):
@@ -101,6 +161,7 @@ class ProductCreate(BaseModel):
     description: Optional[str] = None
     price_per_kg: float
     image_url: Optional[str] = None
+    image_variants: List[ImageVariant] = []
     packages: Optional[List[PackageInfo]] = []
     is_active: bool = True
     is_featured: bool = False
@@ -111,6 +172,7 @@ class ProductUpdate(BaseModel):
     description: Optional[str] = None
     price_per_kg: Optional[float] = None
     image_url: Optional[str] = None
+    image_variants: Optional[List[ImageVariant]] = None
     packages: Optional[List[PackageInfo]] = None
     is_active: Optional[bool] = None
     is_featured: Optional[bool] = None
@@ -124,6 +186,7 @@ class ProductResponse(BaseModel):
     description: Optional[str] = None
     price_per_kg: float
     image_url: Optional[str] = None
+    image_variants: ImageVariants = []
     packages: List[PackageInfo]  # Keep for backward compatibility
     # product_packages: List['ProductPackageResponse'] = []  # New relational packages - temporarily disabled
     is_active: bool
@@ -173,6 +236,19 @@ class UserUpdate(BaseModel):
     is_gold_client: Optional[bool] = None
     is_blocked: Optional[bool] = None
 
+class ProductStats(BaseModel):
+    total_products: int
+    total_categories: int
+    featured_products: int
+    active_products: int
+
+class BotStats(BaseModel):
+    total_users: int
+    bot_users: int
+    total_bot_interactions: int
+    active_users_last_7_days: int
+    average_interactions_per_user: float
+
 class UserStats(BaseModel):
     total: int
     active: int
@@ -218,15 +294,76 @@ class OrderResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class OrderSummary(BaseModel):
+    id: int
+    order_id: int
+    user_id: int
+    status: str
+    total_amount: float
+    discount_amount: float = 0
+    district_id: int
+    district_name: Optional[str] = None
+    delivery_time_slot: str
+    delivery_date: datetime
+    contact_name: str
+    contact_phone: Optional[str] = None
+    created_at: datetime
+    items_count: int
+
 class OrderStatusUpdate(BaseModel):
     status: str
 
+class OrderStatusBatchUpdate(BaseModel):
+    order_ids: List[int] = Field(..., min_length=1, max_length=500)
+    status: str
+
+class OrderStatusBatchSkipped(BaseModel):
+    id: int
+    status: Optional[str] = None  # Current status; None if the order was not found
+    reason: str  # "not_found" or "invalid_transition"
+
+class OrderStatusBatchResult(BaseModel):
+    status: str
+    updated: List[int]
+    skipped: List[OrderStatusBatchSkipped]
+
+class TimeseriesPoint(BaseModel):
+    period: date  # First day of the day, week or month
+    value: float
+
+class TimeseriesSeries(BaseModel):
+    key: Optional[str] = None  # District or category ID when grouped
+    label: Optional[str] = None
+    points: List[TimeseriesPoint]
+
+class TimeseriesResponse(BaseModel):
+    metric: str
+    granularity: str
+    group_by: Optional[str] = None
+    start_date: date
+    end_date: date
+    series: List[TimeseriesSeries]
+
 class OrderStats(BaseModel):
     total_orders: int
     total_revenue: float
     avg_order_value: float
     orders_by_status: dict
 
+# Dashboard
+class DashboardDay(BaseModel):
+    day: date
+    orders: int
+    revenue: float
+
+class DashboardSummary(BaseModel):
+    orders: OrderStats
+    users: UserStats
+    products: ProductStats
+    bot: BotStats
+    recent_orders: List[OrderResponse]
+    last_7_days: List[DashboardDay]
+
 # District schemas
 class DistrictCreate(BaseModel):
     name: str
@@ -320,6 +457,7 @@ class ProductPackageUpdate(BaseModel):
     unit: Optional[str] = None
     price: Optional[float] = None
     image_url: Optional[str] = None
+    image_variants: Optional[List[ImageVariant]] = None
     available: Optional[bool] = None
     sort_order: Optional[int] = None
     note: Optional[str] = None
@@ -352,6 +490,7 @@ class ProductPackageResponse(BaseModel):
     unit: str
     price: float
     image_url: Optional[str] = None
+    image_variants: ImageVariants = []
     available: bool
     sort_order: int
     note: Optional[str] = None
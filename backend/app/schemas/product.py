@@ -1,6 +1,7 @@
 from typing import List, Optional
+from typing_extensions import Annotated
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, BeforeValidator
 
 
 class PackageInfo(BaseModel):
@@ -19,6 +20,18 @@ class PackageInfo(BaseModel):
         super().__init__(**data)
 
 
+class ImageVariant(BaseModel):
+    """Resized copy of a product or package image"""
+    url: str
+    width: int
+    height: int
+    format: str  # "webp" or "jpeg"
+
+
+# Rows created before variants existed store NULL
+ImageVariants = Annotated[List[ImageVariant], BeforeValidator(lambda v: v or [])]
+
+
 class CategoryBase(BaseModel):
     id: str
     name: str
@@ -63,6 +76,7 @@ class Product(ProductBase):
     is_active: bool
     is_featured: bool
     stock_quantity: Optional[float] = None
+    image_variants: ImageVariants = []
     category: Category
     
     class Config:
@@ -132,6 +146,7 @@ class ProductPackageUpdate(BaseModel):
 class ProductPackage(ProductPackageBase):
     id: int
     product_id: str
+    image_variants: ImageVariants = []
     created_at: datetime
     updated_at: datetime
     
@@ -0,0 +1,176 @@
+"""
+Time series for the admin dashboard charts
+
+Series are built from the daily rollups, so a chart over years of history
+reads a few rows per day rather than every order. Days are summed into
+weeks (starting Monday) or months here, and every period in the range gets a
+point so charts need no gap filling. Results are cached briefly per request
+shape.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.order import OrderCategoryDailyStats, OrderDailyStats, OrderStatus
+from app.db.models.product import Category, District
+from app.db.models.user import UserDailySignups
+from app.services.cache import TTLCache
+
+METRICS = ("revenue", "orders", "aov", "new_users")
+GRANULARITIES = ("day", "week", "month")
+GROUP_BY = ("district", "category")
+
+# Cancelled orders bring in no revenue, so they stay out of the charts
+EXCLUDED_STATUSES = (OrderStatus.CANCELLED,)
+
+analytics_cache = TTLCache(ttl=settings.ANALYTICS_CACHE_TTL)
+
+
+def period_start(day: date, granularity: str) -> date:
+    """First day of the period containing day"""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def periods(start: date, end: date, granularity: str) -> List[date]:
+    """Start of every period overlapping start..end"""
+    result = []
+    current = period_start(start, granularity)
+    while current <= end:
+        result.append(current)
+        if granularity == "week":
+            current += timedelta(days=7)
+        elif granularity == "month":
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            current += timedelta(days=1)
+    return result
+
+
+async def _daily_rows(
+    session: AsyncSession,
+    metric: str,
+    start: date,
+    end: date,
+    group_by: Optional[str],
+) -> List[Tuple[date, Any, int, float]]:
+    """(day, group key, count, revenue) rows from the matching rollup"""
+    if metric == "new_users":
+        query = (
+            select(UserDailySignups.day, UserDailySignups.new_users)
+            .where(and_(UserDailySignups.day >= start, UserDailySignups.day <= end))
+        )
+        return [(day, None, count, 0) for day, count in (await session.execute(query)).all()]
+
+    model = OrderCategoryDailyStats if group_by == "category" else OrderDailyStats
+    columns = [model.day]
+    if group_by == "category":
+        columns.append(OrderCategoryDailyStats.category_id)
+    elif group_by == "district":
+        columns.append(OrderDailyStats.district_id)
+
+    query = (
+        select(*columns, func.sum(model.order_count), func.sum(model.revenue))
+        .where(and_(
+            model.day >= start,
+            model.day <= end,
+            model.status.not_in(EXCLUDED_STATUSES),
+        ))
+        .group_by(*columns)
+    )
+    rows = (await session.execute(query)).all()
+    if group_by:
+        return [(day, key, count or 0, revenue or 0) for day, key, count, revenue in rows]
+    return [(day, None, count or 0, revenue or 0) for day, count, revenue in rows]
+
+
+async def _labels(session: AsyncSession, group_by: str, keys) -> Dict[Any, str]:
+    model = Category if group_by == "category" else District
+    result = await session.execute(select(model.id, model.name).where(model.id.in_(list(keys))))
+    return dict(result.all())
+
+
+def _value(metric: str, count: int, revenue: float) -> float:
+    if metric == "revenue":
+        return round(revenue, 2)
+    if metric == "aov":
+        return round(revenue / count, 2) if count else 0
+    return count
+
+
+async def timeseries(
+    session: AsyncSession,
+    metric: str,
+    granularity: str,
+    start: date,
+    end: date,
+    group_by: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    One value per period between two UTC days, both inclusive
+
+    Args:
+        session: Database session used to read the rollups
+        metric: One of METRICS
+        granularity: One of GRANULARITIES
+        start: First day of the range
+        end: Last day of the range
+        group_by: One of GROUP_BY to get a series per district or category
+
+    Returns:
+        Dict with the request parameters and ``series``, a list of
+        ``{"key", "label", "points": [{"period", "value"}]}``
+    """
+    buckets: Dict[Any, Dict[date, List[float]]] = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+    for day, key, count, revenue in await _daily_rows(session, metric, start, end, group_by):
+        bucket = buckets[key][period_start(day, granularity)]
+        bucket[0] += count
+        bucket[1] += revenue
+
+    if not group_by:
+        buckets.setdefault(None, defaultdict(lambda: [0, 0]))
+    labels = await _labels(session, group_by, buckets) if group_by and buckets else {}
+
+    all_periods = periods(start, end, granularity)
+    series = []
+    for key in sorted(buckets, key=lambda key: (key is None, str(labels.get(key, key)))):
+        by_period = buckets[key]
+        series.append({
+            "key": None if key is None else str(key),
+            "label": labels.get(key),
+            "points": [
+                {"period": period, "value": _value(metric, *by_period.get(period, (0, 0)))}
+                for period in all_periods
+            ],
+        })
+
+    return {
+        "metric": metric,
+        "granularity": granularity,
+        "group_by": group_by,
+        "start_date": start,
+        "end_date": end,
+        "series": series,
+    }
+
+
+async def cached_timeseries(
+    session: AsyncSession,
+    metric: str,
+    granularity: str,
+    start: date,
+    end: date,
+    group_by: Optional[str] = None,
+) -> Dict[str, Any]:
+    """timeseries, reused for ANALYTICS_CACHE_TTL seconds per set of arguments"""
+    return await analytics_cache.get_or_set(
+        ("timeseries", metric, granularity, start, end, group_by),
+        lambda: timeseries(session, metric, granularity, start, end, group_by),
+    )
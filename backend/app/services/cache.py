@@ -0,0 +1,49 @@
+"""
+Small in-process cache for values that may be a few seconds stale
+
+Each API process keeps its own copy, so entries are only shared between
+requests served by the same worker.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class TTLCache:
+    """Bounded mapping whose entries expire ``ttl`` seconds after they were set"""
+
+    def __init__(self, ttl: float, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_set(self, key: Hashable, create: Callable[[], Awaitable[T]]) -> T:
+        """Cached value for key, computing and storing it with ``await create()`` on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = await create()
+            self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
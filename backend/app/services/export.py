@@ -0,0 +1,245 @@
+"""
+Order report export
+
+Rows are read in chunks from a server-side cursor and written out as they
+arrive, so memory stays flat however many orders the range covers. CSV is
+streamed straight into the response; XLSX goes through openpyxl's write-only
+mode into a temporary file, since the zip container can only be finished at
+the end. Background export jobs render the same rows in a worker process
+with ``build_orders_report``.
+"""
+import asyncio
+import csv
+import io
+import os
+import pickle
+import tempfile
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterator, List, Sequence
+
+from sqlalchemy import Select, and_, desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.order import Order, OrderItem
+from app.db.models.product import District
+from app.db.session import read_router
+from app.services import partitions
+
+ORDER_EXPORT_HEADERS = [
+    "ID", "Customer", "Phone", "Status", "Total Amount",
+    "Discount", "District", "Delivery Date", "Delivery Time",
+    "Items Count", "Created At", "Comment"
+]
+
+# Rows fetched from the cursor per round trip
+EXPORT_CHUNK_SIZE = 1000
+
+MAX_COLUMN_WIDTH = 50
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+REPORT_MEDIA_TYPES = {
+    "xlsx": XLSX_MEDIA_TYPE,
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def order_export_query(start_dt: datetime, end_dt: datetime) -> Select:
+    """Flat row per order with only the columns the report needs"""
+    items_count = (
+        select(func.count(OrderItem.id))
+        .where(partitions.items_join())
+        .correlate(Order)
+        .scalar_subquery()
+    )
+    return (
+        select(
+            Order.id,
+            Order.contact_name,
+            Order.contact_phone,
+            Order.status,
+            Order.total_amount,
+            Order.discount_amount,
+            District.name,
+            Order.delivery_date,
+            Order.delivery_time_slot,
+            items_count,
+            Order.created_at,
+            Order.comment,
+        )
+        .outerjoin(District, District.id == Order.district_id)
+        .where(and_(
+            Order.created_at >= start_dt,
+            Order.created_at <= end_dt
+        ))
+        .order_by(desc(Order.created_at))
+    )
+
+
+def _enum_value(value: Any) -> str:
+    return value.value if hasattr(value, 'value') else str(value)
+
+
+def _row_values(row: Sequence[Any]) -> List[Any]:
+    (order_id, contact_name, contact_phone, order_status, total_amount, discount_amount,
+     district_name, delivery_date, delivery_time_slot, items_count, created_at, comment) = row
+    return [
+        order_id,
+        contact_name,
+        contact_phone or "",
+        _enum_value(order_status),
+        total_amount,
+        discount_amount,
+        district_name or "",
+        delivery_date.strftime("%Y-%m-%d"),
+        _enum_value(delivery_time_slot),
+        items_count,
+        created_at.strftime("%Y-%m-%d %H:%M"),
+        comment or "",
+    ]
+
+
+async def iter_order_rows(
+    session: AsyncSession,
+    start_dt: datetime,
+    end_dt: datetime,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> AsyncIterator[List[List[Any]]]:
+    """Yield report rows in chunks from a server-side cursor"""
+    query = order_export_query(start_dt, end_dt).execution_options(yield_per=chunk_size)
+    result = await session.stream(query)
+    async for partition in result.partitions(chunk_size):
+        yield [_row_values(row) for row in partition]
+
+
+def estimate_column_widths(rows: Sequence[Sequence[Any]]) -> List[int]:
+    """Column widths fitting the header and the given sample of rows"""
+    widths = [len(header) for header in ORDER_EXPORT_HEADERS]
+    for row in rows:
+        for index, value in enumerate(row):
+            widths[index] = max(widths[index], len(str(value)))
+    return [min(width + 2, MAX_COLUMN_WIDTH) for width in widths]
+
+
+async def stream_orders_csv(start_dt: datetime, end_dt: datetime) -> AsyncIterator[bytes]:
+    """
+    Stream the report as UTF-8 CSV
+
+    Opens its own session: the response body is produced after the request's
+    dependencies have been torn down.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM so Excel picks UTF-8 for Cyrillic names
+    buffer.write("\ufeff")
+    writer.writerow(ORDER_EXPORT_HEADERS)
+
+    async with read_router.session() as session:
+        async for chunk in iter_order_rows(session, start_dt, end_dt):
+            writer.writerows(chunk)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _xlsx_writer():
+    """
+    Write-only workbook with a styled header
+
+    Returns:
+        Tuple of the workbook, its sheet and a ``start_sheet(sample)`` callable
+        that sizes the columns from sample rows and appends the header
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill, Alignment
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Orders Report")
+
+    header = []
+    for title in ORDER_EXPORT_HEADERS:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = Font(bold=True)
+        cell.fill = PatternFill(start_color="CCCCCC", end_color="CCCCCC", fill_type="solid")
+        cell.alignment = Alignment(horizontal="center")
+        header.append(cell)
+
+    def start_sheet(sample: Sequence[Sequence[Any]]) -> None:
+        for index, width in enumerate(estimate_column_widths(sample), 1):
+            ws.column_dimensions[get_column_letter(index)].width = width
+        ws.append(header)
+
+    return wb, ws, start_sheet
+
+
+async def write_orders_xlsx(session: AsyncSession, start_dt: datetime, end_dt: datetime) -> str:
+    """
+    Write the report to a temporary XLSX file and return its path
+
+    Column widths have to precede the rows in write-only mode, so they are
+    estimated from the first chunk. The caller removes the file.
+    """
+    wb, ws, start_sheet = _xlsx_writer()
+
+    started = False
+    async for chunk in iter_order_rows(session, start_dt, end_dt):
+        if not started:
+            start_sheet(chunk)
+            started = True
+        for row in chunk:
+            ws.append(row)
+    if not started:
+        start_sheet([])
+
+    fd, path = tempfile.mkstemp(prefix="orders_report_", suffix=".xlsx")
+    os.close(fd)
+    try:
+        # Zipping the sheet is CPU and disk work, keep it off the event loop
+        await asyncio.to_thread(wb.save, path)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def _read_chunks(rows_path: str) -> Iterator[List[List[Any]]]:
+    with open(rows_path, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def build_orders_report(rows_path: str, out_path: str, fmt: str) -> None:
+    """
+    Render row chunks pickled one after another into an XLSX or CSV report
+
+    Runs inside a worker process, so it must stay a picklable module-level
+    function.
+    """
+    if fmt == "csv":
+        with open(out_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(ORDER_EXPORT_HEADERS)
+            for chunk in _read_chunks(rows_path):
+                writer.writerows(chunk)
+        return
+
+    wb, ws, start_sheet = _xlsx_writer()
+    started = False
+    for chunk in _read_chunks(rows_path):
+        if not started:
+            start_sheet(chunk)
+            started = True
+        for row in chunk:
+            ws.append(row)
+    if not started:
+        start_sheet([])
+    wb.save(out_path)
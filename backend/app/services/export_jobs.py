@@ -0,0 +1,183 @@
+"""
+Order report exports run as background jobs
+
+Large date ranges take longer to render than an HTTP request may stay open.
+A job reads the rows on the background queue, spills them to a temp file and
+has a worker process render the report, so openpyxl never runs on the API's
+event loop. The finished file is kept in storage until it expires and is
+streamed to the client on download; expired reports are deleted hourly by
+the scheduler and before each new job. Progress lives in a small per-process
+registry the admin panel polls; a request identical to one still running
+joins that job instead of starting another.
+"""
+import asyncio
+import os
+import pickle
+import shutil
+import tempfile
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, func, select
+
+from app.core.config import settings
+from app.db.models.order import Order
+from app.db.session import read_router
+from app.services import export
+from app.services.s3 import s3_service
+from app.services.storage import StorageError
+from app.services.tasks import task_queue
+
+EXPORT_PREFIX = "exports/"
+
+# Finished jobs are forgotten once this many newer ones exist
+MAX_TRACKED_JOBS = 200
+
+# Share of the progress bar spent reading rows; rendering and storing take the rest
+READ_PROGRESS = 80
+
+export_jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    # Created lazily so importing the app does not fork worker processes
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.EXPORT_PROCESS_WORKERS)
+    return _executor
+
+
+def shutdown() -> None:
+    """Stop worker processes"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def export_key(job: Dict[str, Any]) -> str:
+    """Storage key of a job's report"""
+    return f"{EXPORT_PREFIX}{job['job_id']}.{job['format']}"
+
+
+def is_expired(job: Dict[str, Any]) -> bool:
+    return job["expires_at"] is not None and job["expires_at"] <= datetime.now(timezone.utc)
+
+
+def get_export_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """Current state of an export job, if this process knows it"""
+    job = export_jobs.get(job_id)
+    if job is not None and job["status"] == "done" and is_expired(job):
+        job["status"] = "expired"
+    return job
+
+
+def active_count() -> int:
+    """Export jobs queued or being built"""
+    return sum(1 for job in export_jobs.values() if job["status"] in ("queued", "processing"))
+
+
+def start_export_job(start_date: str, end_date: str, fmt: str) -> Dict[str, Any]:
+    """Queue an export; a matching job that is still running is returned instead"""
+    for job in export_jobs.values():
+        if (job["status"] in ("queued", "processing")
+                and (job["start_date"], job["end_date"], job["format"]) == (start_date, end_date, fmt)):
+            return job
+
+    job_id = uuid.uuid4().hex
+    job = {
+        "job_id": job_id,
+        "status": "queued",
+        "format": fmt,
+        "start_date": start_date,
+        "end_date": end_date,
+        "rows_total": None,
+        "rows_done": 0,
+        "progress": 0,
+        "filename": f"orders_report_{start_date}_{end_date}.{fmt}",
+        "size": None,
+        "created_at": datetime.now(timezone.utc),
+        "expires_at": None,
+        "error": None,
+    }
+    task_queue.enqueue(_run_export, job)
+
+    export_jobs[job_id] = job
+    while len(export_jobs) > MAX_TRACKED_JOBS:
+        export_jobs.popitem(last=False)
+    return job
+
+
+async def _read_rows(job: Dict[str, Any], rows_path: str) -> None:
+    """Spill the job's rows to a file of pickled chunks, tracking progress"""
+    start_dt = datetime.fromisoformat(job["start_date"])
+    end_dt = datetime.fromisoformat(job["end_date"])
+
+    async with read_router.session() as session:
+        total_query = select(func.count(Order.id)).where(and_(
+            Order.created_at >= start_dt,
+            Order.created_at <= end_dt
+        ))
+        job["rows_total"] = (await session.execute(total_query)).scalar()
+
+        with open(rows_path, "wb") as f:
+            async for chunk in export.iter_order_rows(session, start_dt, end_dt):
+                pickle.dump(chunk, f, protocol=pickle.HIGHEST_PROTOCOL)
+                job["rows_done"] += len(chunk)
+                if job["rows_total"]:
+                    job["progress"] = min(READ_PROGRESS, READ_PROGRESS * job["rows_done"] // job["rows_total"])
+
+
+async def _run_export(job: Dict[str, Any]) -> None:
+    job["status"] = "processing"
+    await purge_expired_exports()
+
+    workdir = tempfile.mkdtemp(prefix="orders_export_")
+    try:
+        rows_path = os.path.join(workdir, "rows.pickle")
+        out_path = os.path.join(workdir, job["filename"])
+        await _read_rows(job, rows_path)
+        job["progress"] = READ_PROGRESS
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            _get_executor(), export.build_orders_report, rows_path, out_path, job["format"]
+        )
+        job["progress"] = 95
+
+        # Uploaded straight from the file, so the report never sits in this process's memory
+        size = os.path.getsize(out_path)
+        await s3_service.storage.put_file(export_key(job), out_path, export.REPORT_MEDIA_TYPES[job["format"]])
+    except Exception as e:
+        job.update(status="failed", error=f"Export failed: {str(e)}")
+        return
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    job.update(
+        status="done",
+        progress=100,
+        size=size,
+        expires_at=datetime.now(timezone.utc) + timedelta(hours=settings.EXPORT_TTL_HOURS),
+    )
+
+
+async def purge_expired_exports() -> int:
+    """Delete reports older than EXPORT_TTL_HOURS from storage and return how many"""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.EXPORT_TTL_HOURS)
+    expired = []
+    async for page in s3_service.storage.list_pages(EXPORT_PREFIX):
+        expired.extend(obj.key for obj in page if obj.last_modified <= cutoff)
+    if not expired:
+        return 0
+    try:
+        await s3_service.storage.delete_many(expired)
+    except StorageError as e:
+        print(f"Warning: Failed to delete expired exports: {e}")
+        return 0
+    return len(expired)
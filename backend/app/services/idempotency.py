@@ -0,0 +1,174 @@
+"""
+Idempotent order submission
+
+Clients send an ``Idempotency-Key`` header with ``POST /orders/`` and reuse it
+when they retry. The first request claims the key in ``idempotency_keys``;
+the order id is recorded in the same transaction as the order and the
+response body right after, so a retry is answered from that row without
+creating a second order or re-sending notifications. A retry arriving while
+the first request is still running polls the row until it completes, then
+replays it. A request that fails or is cancelled releases its key so it can
+be retried. A claim is a lease of IDEMPOTENCY_LEASE_SECONDS: if the worker
+holding it died, a retry takes the key over, and only one of them can
+record an order against it.
+
+Keys are scoped to the user and kept for IDEMPOTENCY_TTL_HOURS.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.order import IdempotencyKey
+from app.db.session import AsyncSessionLocal
+
+# Seconds between checks on a request that holds the key
+POLL_INTERVAL = 0.2
+
+
+def request_hash(body: Dict[str, Any]) -> str:
+    """Fingerprint of a request body, so a key cannot be reused for a different request"""
+    return hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite returns naive datetimes
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _key_filter(user_id: int, key: str):
+    return (IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+
+
+async def claim(session: AsyncSession, user_id: int, key: str, fingerprint: str) -> Optional[IdempotencyKey]:
+    """
+    Claim a key for a new request, or wait for the request that holds it
+
+    Args:
+        session: Database session; committed when the key is claimed
+        user_id: User making the request
+        key: Idempotency-Key header value
+        fingerprint: request_hash of the request body
+
+    Returns:
+        None if the caller now holds the key and should process the request,
+        otherwise the completed row whose result the caller should return
+
+    Raises:
+        HTTPException: 422 if the key was used for a different request,
+            409 if the request holding it does not finish in time
+    """
+    dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        now = datetime.now(timezone.utc)
+        result = await session.execute(
+            dialect.insert(IdempotencyKey)
+            .values(
+                user_id=user_id, key=key, request_hash=fingerprint, claimed_at=now,
+                expires_at=now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+            )
+            .on_conflict_do_nothing(index_elements=["user_id", "key"])
+        )
+        await session.commit()
+        if result.rowcount:
+            return None
+
+        row = (await session.execute(
+            select(IdempotencyKey).where(*_key_filter(user_id, key)).execution_options(populate_existing=True)
+        )).scalar_one_or_none()
+        await session.commit()
+        if row is None:
+            continue  # Released by a failed request since the insert
+
+        if row.request_hash != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request",
+            )
+
+        if _utc(row.expires_at) <= now:
+            await session.execute(delete(IdempotencyKey).where(*_key_filter(user_id, key)))
+            await session.commit()
+            continue
+
+        if row.response is not None or row.order_id is not None:
+            return row
+
+        if _utc(row.claimed_at) <= now - timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS):
+            # The request holding the key stopped without finishing or releasing it
+            taken = await session.execute(
+                update(IdempotencyKey)
+                .where(
+                    *_key_filter(user_id, key), IdempotencyKey.order_id.is_(None),
+                    IdempotencyKey.claimed_at == row.claimed_at,
+                )
+                .values(claimed_at=now)
+            )
+            await session.commit()
+            if taken.rowcount:
+                print(f"Warning: took over stale Idempotency-Key {key} for user {user_id}")
+                return None
+            continue
+
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": "1"},
+            )
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+async def record_order(session: AsyncSession, user_id: int, key: str, order_id: int) -> None:
+    """
+    Tie the key to the order it created; call before committing the order
+
+    Raises:
+        HTTPException: 409 if another request holding the key after a
+            takeover recorded its order first
+    """
+    result = await session.execute(
+        update(IdempotencyKey)
+        .where(*_key_filter(user_id, key), IdempotencyKey.order_id.is_(None))
+        .values(order_id=order_id)
+    )
+    if not result.rowcount:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another request with this Idempotency-Key already created the order",
+        )
+
+
+async def store_response(session: AsyncSession, user_id: int, key: str, response: Dict[str, Any]) -> None:
+    """Keep the response body for retries and commit"""
+    await session.execute(
+        update(IdempotencyKey).where(*_key_filter(user_id, key)).values(response=response)
+    )
+    await session.commit()
+
+
+async def release(session: AsyncSession, user_id: int, key: str) -> None:
+    """Free a key whose request failed before creating an order, so it can be retried"""
+    await session.rollback()
+    await session.execute(
+        delete(IdempotencyKey).where(*_key_filter(user_id, key), IdempotencyKey.order_id.is_(None))
+    )
+    await session.commit()
+
+
+async def purge_expired_keys() -> None:
+    """Scheduled job deleting keys past their TTL"""
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.now(timezone.utc))
+        )
+        await session.commit()
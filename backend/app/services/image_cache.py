@@ -0,0 +1,182 @@
+"""
+Size-bounded disk cache for resized images
+
+Rendered images live as files in one directory; what is cached, how large it
+is and in which order it was used is only tracked in memory. File names carry
+the cache key hash and the content hash, so the index is rebuilt from a
+directory listing after a restart without reading any file. Listing,
+reading, writing and evicting files all run in threads, off the event loop.
+"""
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+@dataclass
+class CacheEntry:
+    path: str
+    size: int
+    etag: str
+    extension: str
+
+
+class DiskLRUCache:
+    """
+    Least-recently-used file cache with request coalescing
+
+    Concurrent misses for the same key share one ``get_or_create`` call, so a
+    burst of requests for a new size renders it once.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._loaded = False
+        self._loading: Optional[asyncio.Future] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def _key_hash(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+    def _scan(self) -> list:
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        for name in os.listdir(self.directory):
+            stem, _, extension = name.partition(".")
+            key_hash, _, etag = stem.partition("-")
+            if not etag or not extension or extension.endswith(".tmp"):
+                continue
+            path = os.path.join(self.directory, name)
+            stat = os.stat(path)
+            files.append((stat.st_atime, key_hash, CacheEntry(path, stat.st_size, etag, extension)))
+        return files
+
+    async def _load(self) -> None:
+        # Done on first use so importing the app does not touch the disk
+        files = await asyncio.to_thread(self._scan)
+        # Oldest access first, so the LRU order survives restarts approximately
+        for _, key_hash, entry in sorted(files, key=lambda item: item[0]):
+            self._entries[key_hash] = entry
+            self.total_bytes += entry.size
+        self._loaded = True
+        await self._remove(self._evict())
+
+    async def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        if self._loading is None or self._loading.done():
+            self._loading = asyncio.ensure_future(self._load())
+        await asyncio.shield(self._loading)
+
+    def _evict(self) -> List[str]:
+        """Drop entries over the size budget from the index and return their files"""
+        paths = []
+        while self.total_bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self.total_bytes -= entry.size
+            paths.append(entry.path)
+        return paths
+
+    @staticmethod
+    async def _remove(paths: List[str]) -> None:
+        if paths:
+            await asyncio.to_thread(_remove_files, paths)
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        """Look up an entry and mark it as recently used"""
+        await self._ensure_loaded()
+        key_hash = self._key_hash(key)
+        entry = self._entries.get(key_hash)
+        if entry is not None:
+            self._entries.move_to_end(key_hash)
+        return entry
+
+    def _write(self, key_hash: str, content: bytes, extension: str) -> CacheEntry:
+        etag = hashlib.sha256(content).hexdigest()[:32]
+        path = os.path.join(self.directory, f"{key_hash}-{etag}.{extension}")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        return CacheEntry(path, len(content), etag, extension)
+
+    async def put(self, key: str, content: bytes, extension: str) -> CacheEntry:
+        """Store content under key, evicting least recently used entries as needed"""
+        await self._ensure_loaded()
+        key_hash = self._key_hash(key)
+        entry = await asyncio.to_thread(self._write, key_hash, content, extension)
+
+        stale = []
+        previous = self._entries.pop(key_hash, None)
+        if previous is not None:
+            self.total_bytes -= previous.size
+            if previous.path != entry.path:
+                stale.append(previous.path)
+        self._entries[key_hash] = entry
+        self.total_bytes += entry.size
+        await self._remove(stale + self._evict())
+        return entry
+
+    async def get_or_create(
+        self,
+        key: str,
+        create: Callable[[], Awaitable[Tuple[bytes, str]]],
+    ) -> Tuple[CacheEntry, bytes]:
+        """
+        Return the cached entry and content, rendering it with ``create`` on a miss
+
+        ``create`` returns ``(content, extension)``; only one call runs per key
+        at a time and every waiter receives its result.
+        """
+        entry = await self.get(key)
+        if entry is not None:
+            try:
+                return entry, await asyncio.to_thread(_read_file, entry.path)
+            except FileNotFoundError:
+                # Removed behind our back; forget it and render again
+                self._entries.pop(self._key_hash(key), None)
+                self.total_bytes -= entry.size
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            content, extension = await create()
+            entry = await self.put(key, content, extension)
+            future.set_result((entry, content))
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody may be waiting; do not log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            del self._pending[key]
+        return entry, content
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _remove_files(paths: List[str]) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# Global instance
+image_cache = DiskLRUCache(settings.IMAGE_CACHE_DIR, settings.IMAGE_CACHE_MAX_BYTES)
@@ -0,0 +1,137 @@
+"""
+Garbage collection of stored images nothing points at any more
+
+Deletes after image replacements can fail, and uploads can be abandoned
+before a product is saved. The collector walks the bucket one listing page
+at a time and deletes objects that no product or package references. Only
+the referenced set and one delete batch are held in memory, however large
+the bucket is.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.product import Product, ProductPackage
+from app.services.s3 import STAGING_PREFIX, VARIANT_KEY_RE, s3_service
+from app.services.storage import PAGE_SIZE, StorageError
+
+# Folders written by image uploads; anything else in the bucket is left alone
+IMAGE_PREFIXES = ("products/", "packages/")
+
+# Orphan keys listed in the report
+SAMPLE_SIZE = 100
+
+
+async def _referenced_keys(session: AsyncSession) -> Tuple[Set[str], Set[str]]:
+    """
+    Keys in use by products and packages
+
+    Returns:
+        Tuple of variant base keys (``products/<hash>``) and plain keys of
+        legacy single-file uploads
+    """
+    query = union_all(
+        select(Product.image_url, Product.image_variants),
+        select(ProductPackage.image_url, ProductPackage.image_variants),
+    )
+    bases: Set[str] = set()
+    keys: Set[str] = set()
+    result = await session.stream(query.execution_options(yield_per=500))
+    async for image_url, image_variants in result:
+        urls = [image_url] + [variant.get("url") for variant in image_variants or []]
+        for url in filter(None, urls):
+            key = s3_service.storage.key_for_url(url)
+            if key is None:
+                continue
+            match = VARIANT_KEY_RE.match(key)
+            if match:
+                bases.add(match.group("base"))
+            else:
+                keys.add(key)
+    return bases, keys
+
+
+def _is_referenced(key: str, bases: Set[str], keys: Set[str]) -> bool:
+    if key.startswith(STAGING_PREFIX):
+        # Staged originals are removed once processed, so any old one is abandoned
+        return False
+    if key in keys:
+        return True
+    match = VARIANT_KEY_RE.match(key)
+    return bool(match) and match.group("base") in bases
+
+
+async def _delete_batch(session: AsyncSession, batch: List[str], report: Dict[str, Any]) -> None:
+    # An upload may have deduplicated onto one of these objects since the scan started
+    bases, keys = await _referenced_keys(session)
+    batch = [key for key in batch if not _is_referenced(key, bases, keys)]
+    if not batch:
+        return
+    try:
+        await s3_service.storage.delete_many(batch)
+        report["deleted"] += len(batch)
+    except StorageError as e:
+        print(f"Warning: Failed to delete orphaned images: {e}")
+        report["failed"] += len(batch)
+
+
+async def collect_orphaned_images(
+    session: AsyncSession,
+    dry_run: bool = True,
+    min_age: Optional[timedelta] = None,
+) -> Dict[str, Any]:
+    """
+    Find and delete stored images no product or package references
+
+    Objects younger than ``min_age`` are skipped, since a fresh upload is only
+    referenced once the admin saves the product.
+
+    Args:
+        session: Database session used to read image references
+        dry_run: Only report what would be deleted
+        min_age: Grace period, defaults to IMAGE_GC_MIN_AGE_HOURS
+
+    Returns:
+        Report with counts of scanned, orphaned, deleted and failed objects
+        and a sample of orphaned keys
+    """
+    if min_age is None:
+        min_age = timedelta(hours=settings.IMAGE_GC_MIN_AGE_HOURS)
+    cutoff = datetime.now(timezone.utc) - min_age
+
+    report: Dict[str, Any] = {
+        "dry_run": dry_run,
+        "scanned": 0,
+        "orphaned": 0,
+        "orphaned_bytes": 0,
+        "deleted": 0,
+        "failed": 0,
+        "sample": [],
+    }
+    bases, keys = await _referenced_keys(session)
+    batch: List[str] = []
+
+    for prefix in IMAGE_PREFIXES + (STAGING_PREFIX,):
+        async for page in s3_service.storage.list_pages(prefix):
+            for obj in page:
+                report["scanned"] += 1
+                if obj.last_modified > cutoff or _is_referenced(obj.key, bases, keys):
+                    continue
+
+                report["orphaned"] += 1
+                report["orphaned_bytes"] += obj.size
+                if len(report["sample"]) < SAMPLE_SIZE:
+                    report["sample"].append(obj.key)
+                if not dry_run:
+                    batch.append(obj.key)
+
+            if len(batch) >= PAGE_SIZE:
+                await _delete_batch(session, batch, report)
+                batch = []
+
+    if batch:
+        await _delete_batch(session, batch, report)
+    return report
@@ -0,0 +1,103 @@
+"""
+Post-processing of images uploaded straight to storage
+
+The admin panel uploads originals with a presigned request, then asks the API
+to finish the upload. Rendering variants and pointing the product or package
+at the new image happens on the background queue; progress is kept in a small
+per-process registry the admin panel can poll.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.db.models.product import Product, ProductPackage
+from app.db.session import AsyncSessionLocal
+from app.services.image_usage import release_images
+from app.services.s3 import s3_service
+from app.services.tasks import task_queue
+
+# Finished jobs are forgotten once this many newer ones exist
+MAX_TRACKED_JOBS = 1000
+
+upload_jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def get_upload_job(upload_id: str) -> Optional[Dict[str, Any]]:
+    """Current state of a direct upload, if this process knows it"""
+    return upload_jobs.get(upload_id)
+
+
+def start_upload_job(
+    upload_id: str,
+    folder: str,
+    product_id: Optional[str] = None,
+    package_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Queue processing of a staged upload; repeated calls return the existing job"""
+    job = upload_jobs.get(upload_id)
+    if job is not None and job["status"] != "failed":
+        return job
+
+    job = {
+        "upload_id": upload_id,
+        "status": "queued",
+        "product_id": product_id,
+        "package_id": package_id,
+        "url": None,
+        "variants": [],
+        "error": None,
+    }
+    task_queue.enqueue(_process_upload, job, folder)
+
+    upload_jobs[upload_id] = job
+    upload_jobs.move_to_end(upload_id)
+    while len(upload_jobs) > MAX_TRACKED_JOBS:
+        upload_jobs.popitem(last=False)
+    return job
+
+
+async def _attach_image(job: Dict[str, Any], uploaded: Dict[str, Any]) -> None:
+    """Point the job's product or package at the new image and release the old one"""
+    async with AsyncSessionLocal() as session:
+        if job["package_id"] is not None:
+            query = select(ProductPackage).where(
+                ProductPackage.id == job["package_id"],
+                ProductPackage.product_id == job["product_id"],
+            )
+            not_found = "Package not found"
+        else:
+            query = select(Product).where(Product.id == job["product_id"])
+            not_found = "Product not found"
+
+        result = await session.execute(query)
+        target = result.scalar_one_or_none()
+        if not target:
+            # Nothing points at the new image; it may be a reused one another upload just
+            # handed out, so it is left to the orphan GC rather than released here
+            raise HTTPException(status_code=404, detail=not_found)
+
+        old_image_url = target.image_url
+        target.image_url = uploaded["url"]
+        target.image_variants = uploaded["variants"]
+        await session.commit()
+
+        if old_image_url and old_image_url != uploaded["url"]:
+            await release_images(session, [old_image_url])
+
+
+async def _process_upload(job: Dict[str, Any], folder: str) -> None:
+    job["status"] = "processing"
+    try:
+        uploaded = await s3_service.process_staged_upload(job["upload_id"], folder=folder)
+        if job["product_id"] is not None:
+            await _attach_image(job, uploaded)
+    except HTTPException as e:
+        job.update(status="failed", error=e.detail)
+        return
+    except Exception as e:
+        job.update(status="failed", error=f"Image processing failed: {str(e)}")
+        return
+
+    job.update(status="done", url=uploaded["url"], variants=uploaded["variants"])
@@ -0,0 +1,67 @@
+"""
+Reference lookups for stored images
+
+Image keys are content-addressed, so one object can back several products and
+packages. Stored objects may only be deleted once no row points at them, and
+not while they are younger than IMAGE_GC_MIN_AGE_HOURS: an upload that reused
+an existing image (which restarts its age) is only referenced once the admin
+saves the product or package.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Set
+
+from sqlalchemy import select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.product import Product, ProductPackage
+from app.services.s3 import s3_service
+from app.services.storage import StorageError
+
+
+async def referenced_image_urls(session: AsyncSession, image_urls: Iterable[str]) -> Set[str]:
+    """Subset of image_urls still used by a product or package"""
+    image_urls = list(image_urls)
+    if not image_urls:
+        return set()
+    query = union(
+        select(Product.image_url).where(Product.image_url.in_(image_urls)),
+        select(ProductPackage.image_url).where(ProductPackage.image_url.in_(image_urls)),
+    )
+    result = await session.execute(query)
+    return set(result.scalars().all())
+
+
+async def _is_recent(image_url: str, cutoff: datetime) -> bool:
+    key = s3_service.storage.key_for_url(image_url)
+    if key is None:
+        return False
+    stored = await s3_service.storage.stat(key)
+    return stored is not None and stored.last_modified > cutoff
+
+
+async def release_images(session: AsyncSession, image_urls: Iterable[str]) -> int:
+    """
+    Delete stored images that are no longer referenced
+
+    Call after the change that dropped the reference has been committed.
+    Images within the GC grace period are left for the orphaned image GC, as
+    are images whose deletion failed; failures are logged rather than raised.
+
+    Returns:
+        Number of images deleted from storage
+    """
+    candidates = set(filter(None, image_urls))
+    unreferenced = candidates - await referenced_image_urls(session, candidates)
+    if not unreferenced:
+        return 0
+    try:
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.IMAGE_GC_MIN_AGE_HOURS)
+        unreferenced = {url for url in unreferenced if not await _is_recent(url, cutoff)}
+        if not unreferenced:
+            return 0
+        await s3_service.delete_images(unreferenced)
+    except StorageError as e:
+        print(f"Warning: Failed to delete {len(unreferenced)} unreferenced images: {e}")
+        return 0
+    return len(unreferenced)
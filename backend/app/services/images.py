@@ -0,0 +1,250 @@
+"""
+Image processing pipeline that keeps Pillow work off the event loop
+"""
+import asyncio
+import io
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from tempfile import NamedTemporaryFile
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from fastapi import HTTPException, UploadFile, status
+from PIL import Image, ImageOps
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+# Encoded image bytes, or the path of a file holding them
+ImageSource = Union[bytes, str]
+
+# Applies to the API process and, via fork, to the image workers
+Image.MAX_IMAGE_PIXELS = settings.IMAGE_MAX_PIXELS
+
+# Output format -> (Pillow format, file extension, content type, save options)
+IMAGE_FORMATS: Dict[str, tuple] = {
+    "jpeg": ("JPEG", "jpg", "image/jpeg", {"quality": 85, "optimize": True, "progressive": True}),
+    "webp": ("WEBP", "webp", "image/webp", {"quality": 80, "method": 4}),
+}
+
+
+async def spool_upload(file: UploadFile, max_bytes: int) -> BinaryIO:
+    """
+    Copy an upload into a temp buffer, rejecting it once it exceeds max_bytes
+
+    The body is read in chunks, so an oversized upload is refused after at most
+    ``max_bytes`` instead of being loaded into memory first. Files up to
+    UPLOAD_SPOOL_MAX_MEMORY stay in memory; larger ones move to a named temp
+    file, so image workers can decode them from disk (see upload_source).
+    """
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File size too large. Maximum {max_bytes // (1024 * 1024)}MB allowed",
+    )
+
+    # Multipart parsing already knows the size, so most oversized files never get copied
+    if file.size is not None and file.size > max_bytes:
+        raise too_large
+
+    buffer: BinaryIO = io.BytesIO()
+    total = 0
+    try:
+        while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+            total += len(chunk)
+            if total > max_bytes:
+                raise too_large
+            if isinstance(buffer, io.BytesIO) and total > settings.UPLOAD_SPOOL_MAX_MEMORY:
+                spooled = NamedTemporaryFile(prefix="upload-")
+                spooled.write(buffer.getvalue())
+                buffer.close()
+                buffer = spooled
+            buffer.write(chunk)
+    except BaseException:
+        buffer.close()
+        raise
+
+    buffer.seek(0)
+    return buffer
+
+
+def upload_source(buffer: BinaryIO) -> ImageSource:
+    """
+    What to hand an image worker for a spooled upload
+
+    A file on disk is passed by path and decoded straight from it, so large
+    uploads are never held in the API process; only in-memory buffers, which
+    are at most UPLOAD_SPOOL_MAX_MEMORY, are passed as bytes.
+    """
+    if isinstance(buffer, io.BytesIO):
+        return buffer.getvalue()
+    return buffer.name
+
+
+def _open_rgb(source: ImageSource, size_hint: Optional[Tuple[int, int]] = None) -> Image.Image:
+    """
+    Decode image bytes or an image file and normalize the color mode
+
+    Images above Image.MAX_IMAGE_PIXELS are refused before their pixels are
+    decoded. For JPEGs a ``size_hint`` lets the decoder downscale while
+    decoding, so large photos never materialize at full resolution.
+    """
+    with warnings.catch_warnings():
+        # Pillow only warns between 1x and 2x the limit; treat that as a bomb too
+        warnings.simplefilter("error", Image.DecompressionBombWarning)
+        image = Image.open(io.BytesIO(source) if isinstance(source, bytes) else source)
+        if size_hint and image.format == "JPEG":
+            image.draft("RGB", size_hint)
+        image.load()
+
+    # Convert to RGB if necessary
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGB')
+    return image
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    """Encode an image in one of IMAGE_FORMATS"""
+    pillow_format, _, _, options = IMAGE_FORMATS[fmt]
+    output_buffer = io.BytesIO()
+    image.save(output_buffer, format=pillow_format, **options)
+    return output_buffer.getvalue()
+
+
+def process_image(
+    content: ImageSource,
+    max_width: int,
+    max_height: int,
+    fmt: str = "jpeg",
+    crop: bool = False,
+) -> bytes:
+    """
+    Decode, downscale and re-encode an image
+
+    With ``crop`` the image is cut to the box's aspect ratio around its center
+    first, so it fills the box instead of fitting inside it. Images are never
+    upscaled. Runs inside a worker process, so it must stay a picklable
+    module-level function.
+    """
+    image = _open_rgb(content, (max_width, max_height))
+
+    if crop:
+        aspect = max_width / max_height
+        if image.width / image.height > aspect:
+            crop_width, crop_height = round(image.height * aspect), image.height
+        else:
+            crop_width, crop_height = image.width, round(image.width / aspect)
+        size = (min(max_width, crop_width), min(max_height, crop_height))
+        image = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+    # Resize if too large
+    elif image.width > max_width or image.height > max_height:
+        image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+
+    return _encode(image, fmt)
+
+
+def process_image_variants(
+    source: ImageSource,
+    widths: Sequence[int],
+    max_height: int,
+    formats: Sequence[str],
+) -> List[Dict[str, Any]]:
+    """
+    Produce a downscaled copy of an image for every width and format
+
+    The image is decoded once and shrunk from the widest variant down, so each
+    step resamples an already reduced image. Images are never upscaled, so a
+    variant may be smaller than its nominal width. Runs inside a worker process.
+
+    Returns:
+        List of dicts with nominal ``width``, actual ``pixel_width``/``height``,
+        ``format`` and encoded ``content``
+    """
+    image = _open_rgb(source, (max(widths), max_height))
+    variants = []
+
+    for width in sorted(set(widths), reverse=True):
+        if image.width > width or image.height > max_height:
+            image.thumbnail((width, max_height), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            variants.append({
+                "width": width,
+                "pixel_width": image.width,
+                "height": image.height,
+                "format": fmt,
+                "content": _encode(image, fmt),
+            })
+
+    return variants
+
+
+class ImageProcessingPool:
+    """
+    Bounded process pool for CPU-heavy image work
+
+    At most ``max_pending`` jobs are running or queued at once. Callers beyond
+    that wait up to ``queue_timeout`` seconds for a slot and are then rejected
+    with 503, so bulk uploads cannot build an unbounded backlog.
+    """
+
+    def __init__(self, workers: int, max_pending: int, queue_timeout: float):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Jobs running or waiting for a slot"""
+        return self._pending
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created lazily so importing the app does not fork worker processes
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run ``func(*args)`` in a worker process, applying backpressure"""
+        semaphore = self._get_semaphore()
+        self._pending += 1
+        try:
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Image processing is busy, please retry shortly",
+                    headers={"Retry-After": str(max(1, int(self.queue_timeout)))},
+                )
+
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._get_executor(), func, *args)
+            finally:
+                semaphore.release()
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        """Stop worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Global instance
+image_pool = ImageProcessingPool(
+    workers=settings.IMAGE_PROCESS_WORKERS,
+    max_pending=settings.IMAGE_MAX_PENDING,
+    queue_timeout=settings.IMAGE_QUEUE_TIMEOUT,
+)
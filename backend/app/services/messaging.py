@@ -2,11 +2,12 @@
 Messaging service for sending notifications about orders
 """
 import httpx
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 from app.core.config import settings
-from app.db.models.order import Order, DeliveryTimeSlot
+from app.core.metrics import track_outbound
+from app.db.models.order import Order, OrderStatus, DeliveryTimeSlot
 
 
 class MessagingService:
@@ -28,14 +29,15 @@ class MessagingService:
             
             async with httpx.AsyncClient(timeout=30.0) as client:
                 print(f"📡 Sending client confirmation to Telegram API...")
-                response = await client.post(
-                    f"{self.bot_api_url}/sendMessage",
-                    json={
-                        "chat_id": order.user_id,
-                        "text": message,
-                        "parse_mode": "HTML"
-                    }
-                )
+                async with track_outbound("telegram", "sendMessage"):
+                    response = await client.post(
+                        f"{self.bot_api_url}/sendMessage",
+                        json={
+                            "chat_id": order.user_id,
+                            "text": message,
+                            "parse_mode": "HTML"
+                        }
+                    )
                 print(f"📊 Client message API response: {response.status_code}")
                 
                 if response.status_code == 200:
@@ -91,15 +93,16 @@ class MessagingService:
             
             async with httpx.AsyncClient(timeout=30.0) as client:
                 print(f"📡 Sending admin notification to chat {settings.ADMIN_CHAT_ID}")
-                response = await client.post(
-                    f"{self.bot_api_url}/sendMessage",
-                    json={
-                        "chat_id": settings.ADMIN_CHAT_ID,
-                        "text": message,
-                        "parse_mode": "HTML",
-                        "reply_markup": keyboard
-                    }
-                )
+                async with track_outbound("telegram", "sendMessage"):
+                    response = await client.post(
+                        f"{self.bot_api_url}/sendMessage",
+                        json={
+                            "chat_id": settings.ADMIN_CHAT_ID,
+                            "text": message,
+                            "parse_mode": "HTML",
+                            "reply_markup": keyboard
+                        }
+                    )
                 print(f"📊 Admin notification API response: {response.status_code}")
                 
                 if response.status_code == 200:
@@ -123,6 +126,53 @@ class MessagingService:
             traceback.print_exc()
             return False
     
+    async def send_status_updates(self, updates: List[Dict[str, Any]]) -> int:
+        """
+        Tell clients their orders changed status, over one HTTP connection
+
+        Args:
+            updates: Dicts with user_id, order_id and the new status
+
+        Returns:
+            Number of messages sent
+        """
+        if settings.TESTING:
+            print(f"🧪 Test mode: Skipping {len(updates)} status updates")
+            return len(updates)
+        
+        sent = 0
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            for update in updates:
+                try:
+                    async with track_outbound("telegram", "sendMessage"):
+                        response = await client.post(
+                            f"{self.bot_api_url}/sendMessage",
+                            json={
+                                "chat_id": update["user_id"],
+                                "text": self._format_status_update_message(update["order_id"], update["status"]),
+                                "parse_mode": "HTML"
+                            }
+                        )
+                    response.raise_for_status()
+                    sent += 1
+                except Exception as e:
+                    print(f"❌ Error sending status update for order #{update['order_id']}: {e}")
+        print(f"📤 Sent {sent}/{len(updates)} status updates")
+        return sent
+    
+    def _format_status_update_message(self, order_id: int, status: OrderStatus) -> str:
+        """Format order status change message for client"""
+        status_map = {
+            OrderStatus.CONFIRMED: "✅ підтверджено",
+            OrderStatus.AUTO_CONFIRMED: "✅ підтверджено",
+            OrderStatus.PREPARING: "👨‍🍳 готується",
+            OrderStatus.DELIVERING: "🚚 передано в доставку",
+            OrderStatus.DELIVERED: "📦 доставлено",
+            OrderStatus.CANCELLED: "❌ скасовано",
+        }
+        status_text = status_map.get(status, f"оновлено: {status.value}")
+        return f"<b>Замовлення #{order_id}</b> {status_text}"
+    
     def _format_client_confirmation_message(self, order: Order) -> str:
         """Format order confirmation message for client"""
         # Simple format as requested by user
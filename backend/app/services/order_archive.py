@@ -0,0 +1,223 @@
+"""
+Cold archive of finished orders
+
+Delivered and cancelled orders older than ORDER_ARCHIVE_AFTER_DAYS are moved,
+with their items, out of the hot tables into gzip-compressed JSON Lines files
+in the storage backend: one file per archiver batch and month, under
+``archive/orders/YYYY/MM/``. Each archived order keeps a row in
+``archived_orders`` with the fields list views and rollup rebuilds need and
+the key of its file, so customer history reads one small table and a lookup
+by id fetches a single file. Archived numbers stay in ``order_numbers``, so
+they are never handed out again.
+
+Parquet would need pyarrow, which the API does not ship; gzip JSON Lines
+compress well for this data and stay readable with standard tools.
+"""
+import enum
+import gzip
+import json
+import uuid
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.db.models.order import ArchivedOrder, Order, OrderItem, OrderStatus
+from app.db.models.product import Product
+from app.db.session import AsyncSessionLocal
+from app.services import partitions
+from app.services.s3 import s3_service
+
+ARCHIVE_PREFIX = "archive/orders/"
+ARCHIVED_STATUSES = (OrderStatus.DELIVERED, OrderStatus.CANCELLED)
+
+# Held while archiving so concurrent API processes do not archive the same orders
+ARCHIVE_LOCK_ID = 0x6F72_6461
+
+# Decompressed archive files kept in memory for repeated lookups
+CACHED_FILES = 4
+_file_cache: "OrderedDict[str, Dict[int, Dict[str, Any]]]" = OrderedDict()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Cannot archive {type(value).__name__}")
+
+
+def _columns(row: Any) -> Dict[str, Any]:
+    return {column.key: getattr(row, column.key) for column in row.__table__.columns}
+
+
+def order_record(order: Order) -> Dict[str, Any]:
+    """Everything stored about an order and its items"""
+    record = _columns(order)
+    record["items"] = [_columns(item) for item in order.items]
+    return record
+
+
+def archive_key(month: date) -> str:
+    return f"{ARCHIVE_PREFIX}{month:%Y/%m}/{uuid.uuid4().hex}.jsonl.gz"
+
+
+def _encode(records: List[Dict[str, Any]]) -> bytes:
+    lines = "".join(json.dumps(record, default=_json_default, ensure_ascii=False) + "\n" for record in records)
+    return gzip.compress(lines.encode("utf-8"))
+
+
+async def _categories(session: AsyncSession, orders: List[Order]) -> Dict[int, List[list]]:
+    """[category_id, item quantity, item total] per order, as the rollups count them"""
+    query = (
+        select(OrderItem.order_id, Product.category_id, func.sum(OrderItem.quantity), func.sum(OrderItem.total_price))
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(partitions.items_of([(order.id, order.created_at) for order in orders]))
+        .group_by(OrderItem.order_id, Product.category_id)
+    )
+    categories = defaultdict(list)
+    for order_id, category_id, quantity, total in (await session.execute(query)).all():
+        categories[order_id].append([category_id, quantity, total])
+    return categories
+
+
+async def _archive_batch(session: AsyncSession, cutoff: datetime, batch_size: int) -> int:
+    query = (
+        select(Order)
+        .options(selectinload(Order.items))
+        .where(Order.status.in_(ARCHIVED_STATUSES), Order.created_at < cutoff)
+        .order_by(Order.created_at)
+        .limit(batch_size)
+    )
+    orders = (await session.execute(query)).scalars().all()
+    if not orders:
+        return 0
+
+    categories = await _categories(session, orders)
+    by_month: Dict[date, List[Order]] = defaultdict(list)
+    for order in orders:
+        created = order.created_at.astimezone(timezone.utc) if order.created_at.tzinfo else order.created_at
+        by_month[date(created.year, created.month, 1)].append(order)
+
+    # Files first: if the transaction below fails they are unreferenced, never missing
+    for month, month_orders in by_month.items():
+        key = archive_key(month)
+        await s3_service.storage.put(key, _encode([order_record(order) for order in month_orders]), "application/gzip")
+        session.add_all([
+            ArchivedOrder(
+                id=order.id,
+                order_id=order.order_id,
+                user_id=order.user_id,
+                status=order.status,
+                district_id=order.district_id,
+                total_amount=order.total_amount,
+                discount_amount=order.discount_amount or 0,
+                delivery_date=order.delivery_date,
+                contact_name=order.contact_name,
+                created_at=order.created_at,
+                item_quantity=sum(item.quantity or 0 for item in order.items),
+                categories=categories.get(order.id, []),
+                archive_key=key,
+            )
+            for order in month_orders
+        ])
+
+    order_ids = [order.id for order in orders]
+    # The created_at bounds let PostgreSQL skip the partitions of newer orders
+    # The session is cleared below, so loaded objects need not be matched against the deletes
+    await session.execute(
+        delete(OrderItem)
+        .where(OrderItem.order_id.in_(order_ids), OrderItem.order_created_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    await session.execute(
+        delete(Order)
+        .where(Order.id.in_(order_ids), Order.created_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    session.expunge_all()
+    return len(orders)
+
+
+async def archive_orders(
+    session: AsyncSession,
+    older_than_days: int,
+    batch_size: int = 500,
+    now: Optional[datetime] = None,
+) -> int:
+    """
+    Move finished orders older than older_than_days to the archive
+
+    Args:
+        session: Session on the primary database
+        older_than_days: Age after which delivered and cancelled orders are archived
+        batch_size: Orders moved per transaction
+        now: Time to measure age from, now by default
+
+    Returns:
+        Number of orders archived
+    """
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=older_than_days)
+    archived = 0
+    while True:
+        if session.get_bind().dialect.name == "postgresql":
+            locked = await session.execute(text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": ARCHIVE_LOCK_ID})
+            if not locked.scalar():
+                break
+        moved = await _archive_batch(session, cutoff, batch_size)
+        archived += moved
+        if moved < batch_size:
+            break
+    await session.rollback()
+    return archived
+
+
+async def run_archiver() -> None:
+    """Scheduled job archiving orders older than ORDER_ARCHIVE_AFTER_DAYS"""
+    async with AsyncSessionLocal() as session:
+        archived = await archive_orders(
+            session, settings.ORDER_ARCHIVE_AFTER_DAYS, settings.ORDER_ARCHIVE_BATCH_SIZE
+        )
+    if archived:
+        print(f"🗄️ Archived {archived} orders")
+
+
+async def _read_file(key: str) -> Dict[int, Dict[str, Any]]:
+    """Records in an archive file by order id; files never change, so they are cached"""
+    if key in _file_cache:
+        _file_cache.move_to_end(key)
+        return _file_cache[key]
+    content = gzip.decompress(await s3_service.storage.get(key)).decode("utf-8")
+    records = {record["id"]: record for record in map(json.loads, content.splitlines()) if record}
+    _file_cache[key] = records
+    while len(_file_cache) > CACHED_FILES:
+        _file_cache.popitem(last=False)
+    return records
+
+
+async def get_archived_order(
+    session: AsyncSession, order_id: int, user_id: Optional[int] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Full record of an archived order, as stored when it was archived
+
+    Args:
+        session: Database session
+        order_id: Order.id the order had
+        user_id: Only return the order if it belongs to this user
+
+    Returns:
+        Order columns plus an "items" list, or None if no such archived order
+    """
+    query = select(ArchivedOrder.archive_key).where(ArchivedOrder.id == order_id)
+    if user_id is not None:
+        query = query.where(ArchivedOrder.user_id == user_id)
+    key = (await session.execute(query)).scalar_one_or_none()
+    if key is None:
+        return None
+    return (await _read_file(key)).get(order_id)
@@ -0,0 +1,160 @@
+"""
+Live order events for the admin panel
+
+Order writes publish small events (order created, status changed) once
+committed, and ``GET /admin/orders/events`` streams them to open admin
+pages as Server-Sent Events, so the Orders page refreshes when something
+changes instead of polling the order list.
+
+With ORDER_EVENTS_BACKEND="redis" events go through a Redis pub/sub channel
+and every API worker fans them out to its own streams; a worker only
+subscribes while it has streams open, so idle dashboards cost nothing.
+If Redis cannot be reached, events are delivered to this worker's streams
+only, and publishing skips Redis for ORDER_EVENTS_REDIS_COOLDOWN seconds, so
+order writes do not each wait out the connection timeout while it is down.
+"memory" skips Redis for single-process deployments and tests.
+"""
+import asyncio
+import contextvars
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+
+Event = Dict[str, Any]
+
+# Seconds to wait before re-subscribing after losing Redis
+RECONNECT_DELAY = 1.0
+
+
+def order_created(order: Any) -> Event:
+    return {
+        "type": "order.created",
+        "id": order.id,
+        "order_id": order.order_id,
+        "status": order.status.value,
+        "total_amount": order.total_amount,
+        "contact_name": order.contact_name,
+    }
+
+
+def status_changed(order_pk: int, order_id: int, status: Any, old_status: Any) -> Event:
+    return {
+        "type": "order.status_changed",
+        "id": order_pk,
+        "order_id": order_id,
+        "status": status.value,
+        "old_status": old_status.value,
+    }
+
+
+class OrderEventBus:
+    """Publishes order events and fans them out to the streams open in this process"""
+
+    def __init__(self):
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._client: Optional[redis.Redis] = None
+        self._listener: Optional[asyncio.Task] = None
+        # time.monotonic() until which publishing bypasses Redis after a failure
+        self._redis_down_until = 0.0
+
+    @property
+    def uses_redis(self) -> bool:
+        return settings.ORDER_EVENTS_BACKEND == "redis"
+
+    def _redis(self) -> redis.Redis:
+        if self._client is None:
+            self._client = redis.from_url(settings.REDIS_URL, socket_connect_timeout=1, socket_timeout=1)
+        return self._client
+
+    def _deliver(self, event: Event) -> None:
+        for queue in list(self._subscribers):
+            if queue.full():
+                # A slow stream loses its oldest events rather than holding up the rest
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def publish(self, *events: Event) -> None:
+        """Send events to every open stream; never raises, so writes do not fail over it"""
+        if not events:
+            return
+        if self.uses_redis and time.monotonic() >= self._redis_down_until:
+            try:
+                async with self._redis().pipeline(transaction=False) as pipe:
+                    for event in events:
+                        pipe.publish(settings.ORDER_EVENTS_CHANNEL, json.dumps(event, default=str))
+                    await pipe.execute()
+                return
+            except Exception as e:
+                self._redis_down_until = time.monotonic() + settings.ORDER_EVENTS_REDIS_COOLDOWN
+                print(
+                    f"Warning: could not publish order events to Redis, delivering locally "
+                    f"for {settings.ORDER_EVENTS_REDIS_COOLDOWN:g}s: {e}"
+                )
+        for event in events:
+            self._deliver(event)
+
+    async def _listen(self) -> None:
+        while self._subscribers:
+            try:
+                async with self._redis().pubsub() as pubsub:
+                    await pubsub.subscribe(settings.ORDER_EVENTS_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._deliver(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Warning: order event listener lost Redis: {e}")
+                await asyncio.sleep(RECONNECT_DELAY)
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator[asyncio.Queue]:
+        """Queue receiving every event published while the context is open"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.ORDER_EVENTS_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        if self.uses_redis and (self._listener is None or self._listener.done()):
+            # Started in an empty context so it does not keep the first stream's request state
+            loop = asyncio.get_running_loop()
+            self._listener = contextvars.Context().run(loop.create_task, self._listen())
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+            if not self._subscribers and self._listener is not None:
+                self._listener.cancel()
+                self._listener = None
+
+    async def stream(self, is_disconnected: Callable[[], Awaitable[bool]]) -> AsyncIterator[str]:
+        """
+        Server-Sent Events for one client
+
+        Args:
+            is_disconnected: Checked between events and heartbeats; the
+                stream ends once it returns True
+        """
+        async with self.subscribe() as queue:
+            yield "retry: 3000\n\n"
+            while not await is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), settings.ORDER_EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    async def shutdown(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Singleton instance
+order_events = OrderEventBus()
@@ -0,0 +1,94 @@
+"""
+Free-text search over orders for the admin order list
+
+On PostgreSQL the contact name, phone, comment and delivery address are
+matched through two expression indexes (see the add_order_search_indexes
+migration): a ``tsvector`` GIN index for whole words and a ``pg_trgm`` GIN
+index for fragments such as part of a phone number. Matches are ranked by
+``ts_rank`` plus trigram similarity. Elsewhere (SQLite in tests) every
+search term must appear somewhere in those fields and results keep the
+default newest-first order.
+
+The expressions below must stay identical to the indexed ones, or
+PostgreSQL will fall back to scanning the table.
+"""
+from typing import List, Optional
+
+from sqlalchemy import and_, func, literal_column, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.order import Order
+
+SEARCH_FIELDS = (Order.contact_name, Order.contact_phone, Order.comment, Order.delivery_address)
+
+# Constants are inlined rather than bound so the planner can match the indexes;
+# "simple" leaves names and addresses unstemmed
+TS_CONFIG = literal_column("'simple'::regconfig")
+_EMPTY = literal_column("''")
+_SPACE = literal_column("' '")
+
+MAX_QUERY_LENGTH = 200
+
+
+def search_terms(q: Optional[str]) -> List[str]:
+    """Whitespace separated terms of a search string"""
+    if not q:
+        return []
+    return q[:MAX_QUERY_LENGTH].split()
+
+
+def search_document():
+    """Searchable fields joined into one string, as indexed"""
+    document = func.coalesce(SEARCH_FIELDS[0], _EMPTY)
+    for field in SEARCH_FIELDS[1:]:
+        document = document.op("||")(_SPACE).op("||")(func.coalesce(field, _EMPTY))
+    return document
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def _is_postgresql(session: AsyncSession) -> bool:
+    return session.get_bind().dialect.name == "postgresql"
+
+
+def search_filter(session: AsyncSession, q: Optional[str]):
+    """
+    Condition matching orders for a search string
+
+    Args:
+        session: Database session, used to pick the dialect
+        q: Search string as typed by the operator
+
+    Returns:
+        SQL condition, or None if q has no terms
+    """
+    terms = search_terms(q)
+    if not terms:
+        return None
+
+    document = search_document()
+    fragments = and_(*[document.ilike(_like_pattern(term), escape="\\") for term in terms])
+    if not _is_postgresql(session):
+        return fragments
+
+    words = func.to_tsvector(TS_CONFIG, document).op("@@")(
+        func.websearch_to_tsquery(TS_CONFIG, " ".join(terms))
+    )
+    return or_(words, fragments)
+
+
+def search_rank(session: AsyncSession, q: Optional[str]):
+    """Relevance of an order to a search string, higher first; None where ranking is unavailable"""
+    terms = search_terms(q)
+    if not terms or not _is_postgresql(session):
+        return None
+
+    document = search_document()
+    text = " ".join(terms)
+    return (
+        func.ts_rank(func.to_tsvector(TS_CONFIG, document), func.websearch_to_tsquery(TS_CONFIG, text))
+        + func.similarity(document, text)
+    )
@@ -0,0 +1,107 @@
+"""
+Order status workflow and bulk transitions
+
+TRANSITIONS lists the statuses an order may move to from each status.
+Batch updates lock the listed orders that may reach the target status and
+move them with one conditional ``UPDATE ... RETURNING``, rather than loading
+and committing orders one at a time. The statement bypasses the ORM, so the
+rollup deltas are applied from the returned rows, client notifications go to
+the background queue as a single job and the admin event stream gets one
+event per order.
+"""
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.order import Order, OrderStatus
+from app.services import rollups
+from app.services.messaging import messaging_service
+from app.services.order_events import order_events, status_changed
+from app.services.tasks import task_queue
+
+_CANCELLABLE = {OrderStatus.CANCELLED}
+
+TRANSITIONS: Dict[OrderStatus, FrozenSet[OrderStatus]] = {
+    OrderStatus.PENDING: frozenset({OrderStatus.VERIFICATION, OrderStatus.CONFIRMED} | _CANCELLABLE),
+    OrderStatus.VERIFICATION: frozenset({OrderStatus.WEIGHING, OrderStatus.CONFIRMED} | _CANCELLABLE),
+    OrderStatus.WEIGHING: frozenset({OrderStatus.PRICE_CALCULATED} | _CANCELLABLE),
+    OrderStatus.PRICE_CALCULATED: frozenset({OrderStatus.AUTO_CONFIRMED, OrderStatus.MANUAL_CONFIRM} | _CANCELLABLE),
+    OrderStatus.AUTO_CONFIRMED: frozenset({OrderStatus.PREPARING, OrderStatus.DELIVERING} | _CANCELLABLE),
+    OrderStatus.MANUAL_CONFIRM: frozenset({OrderStatus.CONFIRMED} | _CANCELLABLE),
+    OrderStatus.CONFIRMED: frozenset({OrderStatus.PREPARING, OrderStatus.DELIVERING} | _CANCELLABLE),
+    OrderStatus.PREPARING: frozenset({OrderStatus.DELIVERING} | _CANCELLABLE),
+    OrderStatus.DELIVERING: frozenset({OrderStatus.DELIVERED} | _CANCELLABLE),
+    OrderStatus.DELIVERED: frozenset(),
+    OrderStatus.CANCELLED: frozenset(),
+}
+
+
+def sources(target: OrderStatus) -> List[OrderStatus]:
+    """Statuses an order may move to target from"""
+    return [status for status, targets in TRANSITIONS.items() if target in targets]
+
+
+async def update_statuses(
+    session: AsyncSession, order_ids: List[int], target: OrderStatus
+) -> Tuple[List[Dict[str, Any]], Dict[int, OrderStatus]]:
+    """
+    Move orders to target where the workflow allows it and commit
+
+    Args:
+        session: Session on the primary database
+        order_ids: Order.id values to update
+        target: New status
+
+    Returns:
+        The updated orders (id, order_id, user_id, old_status, status and the
+        fields rollups need) and the current status of each order that was
+        found but could not move
+    """
+    allowed = sources(target)
+    # Lock the orders that may move and keep their old status for the rollups
+    result = await session.execute(
+        select(Order.id, Order.status)
+        .where(Order.id.in_(order_ids), Order.status.in_(allowed))
+        .with_for_update()
+    )
+    old_statuses = dict(result.all())
+
+    changes = []
+    if old_statuses:
+        stmt = (
+            update(Order)
+            .where(Order.id.in_(old_statuses), Order.status.in_(allowed))
+            .values(status=target, updated_at=datetime.utcnow())
+            .returning(
+                Order.id, Order.order_id, Order.user_id, Order.district_id,
+                Order.total_amount, Order.discount_amount, Order.created_at, Order.status,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        changes = [
+            {**row, "old_status": old_statuses[row["id"]]}
+            for row in (await session.execute(stmt)).mappings()
+        ]
+    await rollups.record_status_changes(session, changes)
+
+    updated_ids = {change["id"] for change in changes}
+    rejected = {}
+    if len(updated_ids) < len(set(order_ids)):
+        result = await session.execute(
+            select(Order.id, Order.status).where(Order.id.in_(set(order_ids) - updated_ids))
+        )
+        rejected = dict(result.all())
+    await session.commit()
+
+    await order_events.publish(*[
+        status_changed(change["id"], change["order_id"], change["status"], change["old_status"])
+        for change in changes
+    ])
+    if changes:
+        task_queue.enqueue(messaging_service.send_status_updates, [
+            {"user_id": change["user_id"], "order_id": change["order_id"], "status": change["status"]}
+            for change in changes
+        ])
+    return changes, rejected
@@ -0,0 +1,183 @@
+"""
+Monthly range partitions of orders and order_items
+
+On PostgreSQL both tables are partitioned by month of the order's creation
+time (see the partition_orders_by_month migration): ``orders`` on
+``created_at`` and ``order_items`` on ``order_created_at``, a copy of its
+order's ``created_at``. Partitions are created ahead of time by
+maintain_partitions, which runs at startup and then periodically; a row
+outside every monthly partition lands in the DEFAULT partition, so a missed
+run never fails an insert. PostgreSQL refuses to create a partition while
+the DEFAULT one holds rows in its range, so those rows are moved into the new
+partition in the same transaction, and a warning is logged.
+
+PostgreSQL only skips partitions for conditions on the partition key, so
+queries joining items to orders match order_created_at as well as order_id
+(items_join), lookups of known orders' items bound order_created_at by their
+creation times (items_of) and date filters compare created_at directly.
+"""
+from datetime import date, datetime, timezone
+from typing import Collection, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.order import Order, OrderItem
+from app.db.session import AsyncSessionLocal
+
+# Partitioned table -> partition key column
+PARTITIONED_TABLES: Dict[str, str] = {
+    "orders": "created_at",
+    "order_items": "order_created_at",
+}
+
+# Held while creating partitions so concurrent API processes take turns
+PARTITION_LOCK_ID = 0x6F72_6470
+
+
+def default_partition(table: str) -> str:
+    return f"{table}_default"
+
+
+def items_join():
+    """Join condition between orders and their items that lets PostgreSQL prune item partitions"""
+    return and_(OrderItem.order_id == Order.id, OrderItem.order_created_at == Order.created_at)
+
+
+def items_of(orders: Collection[Tuple[int, datetime]]):
+    """
+    Condition selecting the items of known orders that lets PostgreSQL prune item partitions
+
+    Args:
+        orders: (Order.id, Order.created_at) of each order; must not be empty
+    """
+    created = [created_at for _, created_at in orders]
+    return and_(
+        OrderItem.order_id.in_([order_id for order_id, _ in orders]),
+        OrderItem.order_created_at.between(min(created), max(created)),
+    )
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Name of a table's partition for one month, e.g. orders_2026_10"""
+    return f"{table}_{month:%Y_%m}"
+
+
+def _month_range(table: str, month: date) -> str:
+    column = PARTITIONED_TABLES[table]
+    return (
+        f"{column} >= '{month.isoformat()} 00:00:00+00' "
+        f"AND {column} < '{add_months(month, 1).isoformat()} 00:00:00+00'"
+    )
+
+
+def partition_ddl(table: str, month: date) -> str:
+    """CREATE TABLE statement for a table's partition for one month, bounded in UTC"""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') "
+        f"TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+    )
+
+
+async def _is_partitioned(session: AsyncSession, table: str) -> bool:
+    result = await session.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+    )
+    return result.scalar() == "p"
+
+
+async def _exists(session: AsyncSession, name: str) -> bool:
+    result = await session.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})
+    return bool(result.scalar())
+
+
+def _moved_table(table: str, month: date) -> str:
+    return f"_moved_{partition_name(table, month)}"
+
+
+async def _take_from_default(session: AsyncSession, tables: List[str], month: date) -> Dict[str, int]:
+    """
+    Delete a month's rows from the DEFAULT partitions, keeping them in temp tables
+
+    Returns:
+        Rows taken per table; the rows are in _moved_table(table, month) until commit
+    """
+    moved = {}
+    # Children before parents: order_items references orders
+    for table in reversed(tables):
+        default = default_partition(table)
+        if not await _exists(session, default):
+            continue
+        await session.execute(text(
+            f"CREATE TEMP TABLE {_moved_table(table, month)} ON COMMIT DROP AS "
+            f"SELECT * FROM {default} WHERE {_month_range(table, month)}"
+        ))
+        result = await session.execute(text(f"DELETE FROM {default} WHERE {_month_range(table, month)}"))
+        moved[table] = result.rowcount
+    return {table: moved[table] for table in tables if table in moved}
+
+
+async def ensure_partitions(
+    session: AsyncSession,
+    months_ahead: int,
+    today: Optional[date] = None,
+) -> List[str]:
+    """
+    Create any missing monthly partitions from the current month on
+
+    Args:
+        session: Session on the primary database
+        months_ahead: Months after the current one to create partitions for
+        today: Date to count from, today (UTC) by default
+
+    Returns:
+        Names of the partitions created; empty unless on partitioned PostgreSQL tables
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return []
+
+    first = month_start(today or datetime.now(timezone.utc).date())
+    months = [add_months(first, n) for n in range(months_ahead + 1)]
+
+    await session.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": PARTITION_LOCK_ID})
+    tables = [table for table in PARTITIONED_TABLES if await _is_partitioned(session, table)]
+    created = []
+    for month in months:
+        missing = [table for table in tables if not await _exists(session, partition_name(table, month))]
+        if not missing:
+            continue
+        moved = await _take_from_default(session, missing, month)
+        for table in missing:
+            await session.execute(text(partition_ddl(table, month)))
+            created.append(partition_name(table, month))
+        # Parents before children, so order_items find their orders
+        for table in missing:
+            if moved.get(table):
+                await session.execute(text(f"INSERT INTO {table} SELECT * FROM {_moved_table(table, month)}"))
+        if any(moved.values()):
+            print(
+                f"Warning: partitions for {month:%Y-%m} were missing; moved "
+                + ", ".join(f"{count} {table} rows" for table, count in moved.items())
+                + " out of the default partitions"
+            )
+    await session.commit()
+    return created
+
+
+async def maintain_partitions() -> None:
+    """Scheduled job keeping ORDER_PARTITION_MONTHS_AHEAD months of partitions ready"""
+    async with AsyncSessionLocal() as session:
+        created = await ensure_partitions(session, settings.ORDER_PARTITION_MONTHS_AHEAD)
+    if created:
+        print(f"📦 Created order partitions: {', '.join(created)}")
@@ -0,0 +1,336 @@
+"""
+Daily rollups behind the dashboard statistics
+
+``order_daily_stats`` holds one row per UTC day, status and district with
+order count, revenue, discount and item quantity; ``order_category_daily_stats``
+splits the same orders by product category, and ``user_daily_signups`` counts
+new users. Order creation, status changes and sign-ups apply their delta in the
+same transaction as the row itself, so statistics read a few rows per day
+instead of scanning every order. If the tables ever drift (orders edited by
+hand, a failed deploy) they can be rebuilt from the source tables.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.order import ArchivedOrder, Order, OrderCategoryDailyStats, OrderDailyStats, OrderItem, OrderStatus
+from app.db.models.product import Product
+from app.db.models.user import User, UserDailySignups
+from app.services import partitions
+
+COUNTERS = {
+    OrderDailyStats: ("order_count", "revenue", "discount", "item_quantity"),
+    OrderCategoryDailyStats: ("order_count", "revenue", "item_quantity"),
+    UserDailySignups: ("new_users",),
+}
+
+
+def rollup_day(created_at: datetime) -> date:
+    """UTC day a row is counted under"""
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+async def _increment_rows(session: AsyncSession, model, key_names: List[str], rows: List[Dict[str, Any]]) -> None:
+    """Add each row's counters to the rollup row with its keys in one statement, creating rows if missing"""
+    if not rows:
+        return
+    dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(model).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_names,
+        set_={name: getattr(model, name) + stmt.excluded[name] for name in rows[0] if name not in key_names},
+    )
+    await session.execute(stmt)
+
+
+async def _increment(session: AsyncSession, model, keys: Dict[str, Any], counters: Dict[str, Any]) -> None:
+    """Add counters to the rollup row with the given keys, creating it if missing"""
+    await _increment_rows(session, model, list(keys), [{**keys, **counters}])
+
+
+async def _created_at(session: AsyncSession, row: Any) -> datetime:
+    # created_at is a server default, so it may not be loaded right after the insert
+    if row.__dict__.get("created_at") is None:
+        await session.refresh(row, ["created_at"])
+    return row.created_at
+
+
+def _category_shares(total_amount: float, categories: List[Tuple[str, int, float]]) -> Dict[str, Tuple[float, int]]:
+    """
+    Spread an order's total over its categories in proportion to item totals
+
+    Returns:
+        Dict of category_id to (revenue, item quantity); revenues add up to
+        the order total, so the discount is shared out too
+    """
+    items_total = sum(item_total or 0 for _, _, item_total in categories)
+    shares = {}
+    for category_id, quantity, item_total in categories:
+        if items_total:
+            revenue = (total_amount or 0) * (item_total or 0) / items_total
+        else:
+            revenue = (total_amount or 0) / len(categories)
+        shares[category_id] = (revenue, quantity or 0)
+    return shares
+
+
+async def _order_categories(session: AsyncSession, order_id: int, created_at: datetime) -> List[Tuple[str, int, float]]:
+    """(category_id, item quantity, item total) for each category in an order"""
+    query = (
+        select(Product.category_id, func.sum(OrderItem.quantity), func.sum(OrderItem.total_price))
+        .join(Product, Product.id == OrderItem.product_id)
+        # created_at picks the items' partition
+        .where(OrderItem.order_id == order_id, OrderItem.order_created_at == created_at)
+        .group_by(Product.category_id)
+    )
+    return [tuple(row) for row in (await session.execute(query)).all()]
+
+
+async def _apply_order(
+    session: AsyncSession,
+    order: Order,
+    day: date,
+    status: OrderStatus,
+    categories: List[Tuple[str, int, float]],
+    sign: int,
+) -> None:
+    """Add (sign=1) or remove (sign=-1) one order from its rollup rows"""
+    await _increment(session, OrderDailyStats, {
+        "day": day, "status": status, "district_id": order.district_id,
+    }, {
+        "order_count": sign,
+        "revenue": sign * (order.total_amount or 0),
+        "discount": sign * (order.discount_amount or 0),
+        "item_quantity": sign * sum(quantity or 0 for _, quantity, _ in categories),
+    })
+    await _increment_rows(session, OrderCategoryDailyStats, ["day", "status", "category_id"], [
+        {
+            "day": day, "status": status, "category_id": category_id,
+            "order_count": sign,
+            "revenue": sign * revenue,
+            "item_quantity": sign * quantity,
+        }
+        for category_id, (revenue, quantity) in _category_shares(order.total_amount, categories).items()
+    ])
+
+
+async def record_order_created(session: AsyncSession, order: Order) -> None:
+    """Count a new order and its items; commit together with the order"""
+    await session.flush()
+    created_at = await _created_at(session, order)
+    day = rollup_day(created_at)
+    categories = await _order_categories(session, order.id, created_at)
+    await _apply_order(session, order, day, order.status, categories, 1)
+
+
+async def record_status_changes(session: AsyncSession, changes: List[Dict[str, Any]]) -> None:
+    """
+    Move many orders between status rows in one statement per table
+
+    For updates that bypass the ORM; commit together with them.
+
+    Args:
+        session: Session holding the status update
+        changes: Dicts with the order's id, created_at, district_id,
+            total_amount, discount_amount, old_status and status
+    """
+    changes = [change for change in changes if change["old_status"] != change["status"]]
+    if not changes:
+        return
+
+    query = (
+        select(OrderItem.order_id, Product.category_id, func.sum(OrderItem.quantity), func.sum(OrderItem.total_price))
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(partitions.items_of([(change["id"], change["created_at"]) for change in changes]))
+        .group_by(OrderItem.order_id, Product.category_id)
+    )
+    categories = defaultdict(list)
+    for order_id, *category in (await session.execute(query)).all():
+        categories[order_id].append(tuple(category))
+
+    # Summed per key first: one upsert cannot touch the same row twice
+    district_rows = defaultdict(lambda: dict.fromkeys(COUNTERS[OrderDailyStats], 0))
+    category_rows = defaultdict(lambda: dict.fromkeys(COUNTERS[OrderCategoryDailyStats], 0))
+    for change in changes:
+        day = rollup_day(change["created_at"])
+        order_categories = categories[change["id"]]
+        for status, sign in ((change["old_status"], -1), (change["status"], 1)):
+            row = district_rows[(day, status, change["district_id"])]
+            row["order_count"] += sign
+            row["revenue"] += sign * (change["total_amount"] or 0)
+            row["discount"] += sign * (change["discount_amount"] or 0)
+            row["item_quantity"] += sign * sum(quantity or 0 for _, quantity, _ in order_categories)
+            if order_categories:
+                for category_id, (revenue, quantity) in _category_shares(change["total_amount"], order_categories).items():
+                    row = category_rows[(day, status, category_id)]
+                    row["order_count"] += sign
+                    row["revenue"] += sign * revenue
+                    row["item_quantity"] += sign * quantity
+
+    await _increment_rows(session, OrderDailyStats, ["day", "status", "district_id"], [
+        {"day": day, "status": status, "district_id": district_id, **counters}
+        for (day, status, district_id), counters in district_rows.items()
+    ])
+    await _increment_rows(session, OrderCategoryDailyStats, ["day", "status", "category_id"], [
+        {"day": day, "status": status, "category_id": category_id, **counters}
+        for (day, status, category_id), counters in category_rows.items()
+    ])
+
+
+async def record_user_created(session: AsyncSession, user: User) -> None:
+    """Count a new user; commit together with the user"""
+    await session.flush()
+    day = rollup_day(await _created_at(session, user))
+    await _increment(session, UserDailySignups, {"day": day}, {"new_users": 1})
+
+
+async def _replace_rows(session: AsyncSession, model, rows: Dict[tuple, Dict[str, Any]], key_names: tuple) -> None:
+    await session.execute(delete(model))
+    if rows:
+        await session.execute(
+            model.__table__.insert(),
+            [{**dict(zip(key_names, keys)), **counters} for keys, counters in rows.items()],
+        )
+
+
+async def rebuild_rollups(session: AsyncSession) -> Dict[str, int]:
+    """
+    Recompute every rollup table from orders, archived orders and users and commit
+
+    Returns:
+        Number of rows written per table
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        # Hold off concurrent deltas until the rebuilt rows are committed
+        await session.execute(text(
+            "LOCK TABLE order_daily_stats, order_category_daily_stats, user_daily_signups IN EXCLUSIVE MODE"
+        ))
+
+    def counters(model):
+        return defaultdict(lambda: dict.fromkeys(COUNTERS[model], 0))
+
+    district_rows = counters(OrderDailyStats)
+    category_rows = counters(OrderCategoryDailyStats)
+    signup_rows = counters(UserDailySignups)
+
+    # One row per order and category, in order id order so each order's categories arrive together
+    query = (
+        select(
+            Order.id, Order.created_at, Order.status, Order.district_id,
+            Order.total_amount, Order.discount_amount,
+            Product.category_id, func.sum(OrderItem.quantity), func.sum(OrderItem.total_price),
+        )
+        .outerjoin(OrderItem, partitions.items_join())
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+        .where(Order.status.is_not(None))
+        .group_by(
+            Order.id, Order.created_at, Order.status, Order.district_id,
+            Order.total_amount, Order.discount_amount, Product.category_id,
+        )
+        .order_by(Order.id)
+    )
+
+    # Grouped here rather than in SQL so days are cut exactly like the deltas
+    def add_order(order_row, categories) -> None:
+        _, created_at, status, district_id, total_amount, discount_amount = order_row
+        day = rollup_day(created_at)
+        row = district_rows[(day, status, district_id)]
+        row["order_count"] += 1
+        row["revenue"] += total_amount or 0
+        row["discount"] += discount_amount or 0
+        row["item_quantity"] += sum(quantity or 0 for _, quantity, _ in categories)
+        if categories:
+            for category_id, (revenue, quantity) in _category_shares(total_amount, categories).items():
+                row = category_rows[(day, status, category_id)]
+                row["order_count"] += 1
+                row["revenue"] += revenue
+                row["item_quantity"] += quantity
+
+    current, categories = None, []
+    result = await session.stream(query.execution_options(yield_per=1000))
+    async for row in result:
+        order_row, category = tuple(row[:6]), tuple(row[6:])
+        if current is not None and current[0] != order_row[0]:
+            add_order(current, categories)
+            categories = []
+        current = order_row
+        if category[0] is not None:
+            categories.append(category)
+    if current is not None:
+        add_order(current, categories)
+
+    # Archived orders keep what the rollups need in their index rows
+    result = await session.stream(
+        select(
+            ArchivedOrder.id, ArchivedOrder.created_at, ArchivedOrder.status, ArchivedOrder.district_id,
+            ArchivedOrder.total_amount, ArchivedOrder.discount_amount, ArchivedOrder.categories,
+        ).execution_options(yield_per=1000)
+    )
+    async for row in result:
+        add_order(tuple(row[:6]), [tuple(category) for category in row[6]])
+
+    result = await session.stream(select(User.created_at).execution_options(yield_per=1000))
+    async for (created_at,) in result:
+        if created_at is not None:
+            signup_rows[(rollup_day(created_at),)]["new_users"] += 1
+
+    await _replace_rows(session, OrderDailyStats, district_rows, ("day", "status", "district_id"))
+    await _replace_rows(session, OrderCategoryDailyStats, category_rows, ("day", "status", "category_id"))
+    await _replace_rows(session, UserDailySignups, signup_rows, ("day",))
+    await session.commit()
+    return {
+        OrderDailyStats.__tablename__: len(district_rows),
+        OrderCategoryDailyStats.__tablename__: len(category_rows),
+        UserDailySignups.__tablename__: len(signup_rows),
+    }
+
+
+async def order_stats(
+    session: AsyncSession,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+) -> Dict[str, Any]:
+    """
+    Order totals between two UTC days, both inclusive
+
+    Returns:
+        Dict with ``total_orders``, ``total_revenue`` and ``orders_by_status``
+    """
+    filters = []
+    if start_day:
+        filters.append(OrderDailyStats.day >= start_day)
+    if end_day:
+        filters.append(OrderDailyStats.day <= end_day)
+
+    query = (
+        select(
+            OrderDailyStats.status,
+            func.sum(OrderDailyStats.order_count),
+            func.sum(OrderDailyStats.revenue),
+        )
+        .group_by(OrderDailyStats.status)
+    )
+    if filters:
+        query = query.where(and_(*filters))
+
+    total_orders = 0
+    total_revenue = 0
+    orders_by_status = {}
+    for status, count, revenue in (await session.execute(query)).all():
+        if not count:
+            continue
+        total_orders += count
+        total_revenue += revenue or 0
+        orders_by_status[status.value] = count
+
+    return {
+        "total_orders": total_orders,
+        "total_revenue": total_revenue,
+        "orders_by_status": orders_by_status,
+    }
@@ -1,26 +1,136 @@
-import os
+import asyncio
+import hashlib
+import re
 import uuid
-from typing import Optional
-import boto3
-from botocore.exceptions import ClientError
-from PIL import Image
-import io
+from typing import Any, Dict, Iterable, List, Optional
 from fastapi import HTTPException, UploadFile
+from PIL import Image, UnidentifiedImageError
 
 from app.core.config import settings
+from app.services.images import (
+    IMAGE_FORMATS, ImageSource, image_pool, process_image_variants, spool_upload, upload_source
+)
+from app.services.storage import StorageBackend, StorageError, storage
+
+# Variant keys look like "products/<content hash>/640w.webp"
+VARIANT_KEY_RE = re.compile(r"^(?P<base>.+)/(?P<width>\d+)w\.(?P<ext>jpg|webp)$")
+
+# Presigned uploads land here until they are processed
+STAGING_PREFIX = "incoming/"
+
+# Variant keys never get rewritten, so browsers and CDNs may cache them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
 
 class S3Service:
-    def __init__(self):
-        self.s3_client = boto3.client(
-            's3',
-            endpoint_url=settings.S3_ENDPOINT_URL,
-            aws_access_key_id=settings.S3_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
-            region_name=settings.S3_REGION
+    def __init__(self, backend: StorageBackend):
+        self.storage = backend
+    
+    @property
+    def public_url(self) -> Optional[str]:
+        return self.storage.public_url
+    
+    def _variant_key(self, base_key: str, width: int, fmt: str) -> str:
+        """Deterministic object key for one image variant"""
+        extension = IMAGE_FORMATS[fmt][1]
+        return f"{base_key}/{width}w.{extension}"
+    
+    def _keys_for_url(self, image_url: str) -> List[str]:
+        """
+        Object keys belonging to an uploaded image URL
+        
+        Images uploaded with variants live under ``<base>/<width>w.<ext>``,
+        so every configured variant of the same base is returned. Legacy
+        single-file uploads map to their own key only.
+        """
+        key = self.storage.key_for_url(image_url)
+        if key is None:
+            return []
+        
+        match = VARIANT_KEY_RE.match(key)
+        if not match:
+            return [key]
+        
+        # The canonical URL carries the upload's max width, which may not be a configured width
+        base_key = match.group("base")
+        widths = set(settings.IMAGE_VARIANT_WIDTHS) | {int(match.group("width"))}
+        return [
+            self._variant_key(base_key, width, fmt)
+            for width in sorted(widths)
+            for fmt in settings.IMAGE_VARIANT_FORMATS
+        ]
+    
+    async def _put_variant(self, key: str, variant: Dict[str, Any]) -> None:
+        """Store one rendered image variant"""
+        await self.storage.put(
+            key,
+            variant["content"],
+            content_type=IMAGE_FORMATS[variant["format"]][2],
+            cache_control=IMMUTABLE_CACHE_CONTROL,
         )
-        self.bucket_name = settings.S3_BUCKET_NAME
-        self.public_url = settings.S3_PUBLIC_URL
+    
+    async def _store_image(self, source: ImageSource, folder: str, max_width: int, max_height: int) -> Dict[str, Any]:
+        """Render variants of an image (bytes or file path) and store them under a content-addressed key"""
+        # Decode once and render every width/format in a worker process
+        widths = [width for width in settings.IMAGE_VARIANT_WIDTHS if width < max_width] + [max_width]
+        try:
+            rendered = await image_pool.run(
+                process_image_variants, source, widths, max_height, settings.IMAGE_VARIANT_FORMATS
+            )
+        except (Image.DecompressionBombError, Image.DecompressionBombWarning):
+            raise HTTPException(status_code=400, detail="Image dimensions too large")
+        except UnidentifiedImageError:
+            raise HTTPException(status_code=400, detail="File is not a valid image")
+        
+        # Content-addressed keys: the same processed image always lands on the same URL
+        digest = hashlib.sha256()
+        for variant in rendered:
+            digest.update(variant["content"])
+        base_key = f"{folder}/{digest.hexdigest()[:40]}"
+        canonical_key = self._variant_key(base_key, max_width, "jpeg")
+        
+        variants = [
+            {
+                "url": self.storage.url_for(self._variant_key(base_key, variant["width"], variant["format"])),
+                "width": variant["pixel_width"],
+                "height": variant["height"],
+                "format": variant["format"],
+            }
+            for variant in rendered
+        ]
+        
+        # The canonical JPEG is written last, so its presence means the whole set is stored
+        if await self.storage.exists(canonical_key):
+            # A reused set may have no references left; restarting its age keeps
+            # release_images and the orphan GC off it until the client saves it
+            await asyncio.gather(*(
+                self.storage.touch(
+                    self._variant_key(base_key, variant["width"], variant["format"]),
+                    IMAGE_FORMATS[variant["format"]][2],
+                    IMMUTABLE_CACHE_CONTROL,
+                )
+                for variant in rendered
+            ))
+        else:
+            uploads = []
+            canonical = None
+            for variant in rendered:
+                key = self._variant_key(base_key, variant["width"], variant["format"])
+                if key == canonical_key:
+                    canonical = variant
+                    continue
+                uploads.append(self._put_variant(key, variant))
+            
+            # Upload to storage
+            await asyncio.gather(*uploads)
+            if canonical is not None:
+                await self._put_variant(canonical_key, canonical)
+        
+        # The full-size JPEG stays the canonical image_url for older clients
+        return {
+            "url": self.storage.url_for(canonical_key),
+            "variants": sorted(variants, key=lambda v: (v["width"], v["format"])),
+        }
     
     async def upload_image(
         self, 
@@ -29,75 +139,117 @@ class S3Service:
         max_size_mb: int = 5,
         max_width: int = 1200,
         max_height: int = 1200
-    ) -> str:
+    ) -> Dict[str, Any]:
         """
-        Upload and optimize image to S3
+        Upload image to storage as a set of resized WebP/JPEG variants
         
         Args:
             file: FastAPI UploadFile
-            folder: S3 folder name
+            folder: Storage folder name
             max_size_mb: Maximum file size in MB
             max_width: Maximum image width in pixels
             max_height: Maximum image height in pixels
             
         Returns:
-            Public URL of uploaded image
+            Dict with ``url`` of the largest JPEG and the list of ``variants``
         """
         try:
             # Validate file type
             if not file.content_type or not file.content_type.startswith('image/'):
                 raise HTTPException(status_code=400, detail="File must be an image")
             
-            # Read file content
-            content = await file.read()
-            
-            # Validate file size
-            if len(content) > max_size_mb * 1024 * 1024:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"File size too large. Maximum {max_size_mb}MB allowed"
-                )
-            
-            # Process image with Pillow
-            image = Image.open(io.BytesIO(content))
-            
-            # Convert to RGB if necessary
-            if image.mode in ('RGBA', 'LA', 'P'):
-                image = image.convert('RGB')
-            
-            # Resize if too large
-            if image.width > max_width or image.height > max_height:
-                image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+            # Stream the upload into a bounded buffer, rejecting oversized files early;
+            # the worker decodes a large one from its temp file, which lives until it is done
+            with await spool_upload(file, max_size_mb * 1024 * 1024) as buffer:
+                return await self._store_image(upload_source(buffer), folder, max_width, max_height)
             
-            # Generate unique filename
-            file_extension = 'jpg'  # Always convert to JPG for consistency
-            filename = f"{folder}/{uuid.uuid4().hex}.{file_extension}"
-            
-            # Convert to bytes
-            output_buffer = io.BytesIO()
-            image.save(output_buffer, format='JPEG', quality=85, optimize=True)
-            optimized_content = output_buffer.getvalue()
+        except HTTPException:
+            raise
+        except StorageError as e:
+            raise HTTPException(status_code=500, detail=f"Storage upload failed: {str(e)}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Image processing failed: {str(e)}")
+    
+    def presign_upload(self, content_type: str, max_size_mb: int) -> Dict[str, Any]:
+        """
+        Issue a target for uploading an original image straight to storage
+        
+        The file lands under ``incoming/`` and is only turned into variants
+        once process_staged_upload runs for it.
+        
+        Args:
+            content_type: MIME type the client will upload
+            max_size_mb: Maximum file size in MB
             
-            # Upload to S3
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=filename,
-                Body=optimized_content,
-                ContentType='image/jpeg',
-                ACL='public-read'
+        Returns:
+            Dict with ``upload_id``, ``key`` and the presigned request
+            (``method``, ``url``, ``fields``, ``headers``)
+        """
+        if not content_type.startswith('image/'):
+            raise HTTPException(status_code=400, detail="File must be an image")
+        
+        upload_id = uuid.uuid4().hex
+        key = f"{STAGING_PREFIX}{upload_id}"
+        try:
+            target = self.storage.presigned_upload(
+                key, content_type, max_size_mb * 1024 * 1024, settings.DIRECT_UPLOAD_EXPIRES
             )
+        except StorageError as e:
+            raise HTTPException(status_code=500, detail=f"Failed to presign upload: {str(e)}")
+        return {"upload_id": upload_id, "key": key, "expires_in": settings.DIRECT_UPLOAD_EXPIRES, **target}
+    
+    async def process_staged_upload(
+        self,
+        upload_id: str,
+        folder: str = "products",
+        max_width: int = 1200,
+        max_height: int = 1200
+    ) -> Dict[str, Any]:
+        """
+        Turn a directly uploaded original into stored variants
+        
+        The staged original is removed afterwards, whether processing
+        succeeded or not.
+        
+        Returns:
+            Same shape as upload_image
+        """
+        key = f"{STAGING_PREFIX}{upload_id}"
+        try:
+            content = await self.storage.get(key)
+        except StorageError:
+            raise HTTPException(status_code=404, detail="Uploaded file not found")
+        
+        try:
+            return await self._store_image(content, folder, max_width, max_height)
+        finally:
+            try:
+                await self.storage.delete_many([key])
+            except StorageError as e:
+                print(f"Warning: Failed to delete staged upload {key}: {e}")
+    
+    async def delete_images(self, image_urls: Iterable[str]) -> int:
+        """
+        Delete several images and all of their variants in batched requests
+        
+        Objects are shared between rows with the same content, so callers
+        should go through image_usage.release_images instead of calling this
+        directly.
+        
+        Returns:
+            Number of objects requested for deletion
             
-            # Return public URL
-            return f"{self.public_url}/{filename}"
-            
-        except ClientError as e:
-            raise HTTPException(status_code=500, detail=f"S3 upload failed: {str(e)}")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Image processing failed: {str(e)}")
+        Raises:
+            StorageError: if any object could not be deleted
+        """
+        keys = sorted({key for image_url in image_urls for key in self._keys_for_url(image_url)})
+        if keys:
+            await self.storage.delete_many(keys)
+        return len(keys)
     
     async def delete_image(self, image_url: str) -> bool:
         """
-        Delete image from S3 by URL
+        Delete image and all of its variants from storage by URL
         
         Args:
             image_url: Full public URL of the image
@@ -106,44 +258,30 @@ class S3Service:
             True if deleted successfully
         """
         try:
-            # Extract key from URL
-            if not image_url.startswith(self.public_url):
-                return False
-            
-            key = image_url.replace(f"{self.public_url}/", "")
-            
-            # Delete from S3
-            self.s3_client.delete_object(
-                Bucket=self.bucket_name,
-                Key=key
-            )
-            
-            return True
-            
-        except ClientError:
+            return await self.delete_images([image_url]) > 0
+        except StorageError:
             return False
     
+    def shutdown(self) -> None:
+        """Release storage I/O threads"""
+        self.storage.shutdown()
+    
     def get_presigned_url(self, key: str, expiration: int = 3600) -> str:
         """
         Generate presigned URL for private file access
         
         Args:
-            key: S3 object key
+            key: Object key
             expiration: URL expiration time in seconds
             
         Returns:
             Presigned URL
         """
         try:
-            response = self.s3_client.generate_presigned_url(
-                'get_object',
-                Params={'Bucket': self.bucket_name, 'Key': key},
-                ExpiresIn=expiration
-            )
-            return response
-        except ClientError as e:
+            return self.storage.presigned_url(key, expiration)
+        except StorageError as e:
             raise HTTPException(status_code=500, detail=f"Failed to generate presigned URL: {str(e)}")
 
 
 # Global instance
-s3_service = S3Service()
\ No newline at end of file
+s3_service = S3Service(storage)
@@ -0,0 +1,57 @@
+"""
+Periodic maintenance jobs
+
+Jobs run on the API's event loop, each in its own task that runs the job
+and then sleeps for its interval, starting when the application starts.
+Failures are logged and the job is retried at the next interval. Every API
+process runs every job, so jobs must be safe to run concurrently.
+"""
+import asyncio
+import contextvars
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+Job = Callable[[], Awaitable[None]]
+
+
+class Scheduler:
+    """Runs registered coroutine functions every few seconds"""
+
+    def __init__(self):
+        self._jobs: List[Tuple[float, Job]] = []
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def every(self, seconds: float, job: Job) -> None:
+        """Run ``await job()`` at start-up and then every ``seconds``"""
+        self._jobs.append((seconds, job))
+
+    async def _run(self, seconds: float, job: Job) -> None:
+        while True:
+            try:
+                await job()
+            except Exception as e:
+                print(f"Warning: Scheduled job {job.__name__} failed: {e}")
+            await asyncio.sleep(seconds)
+
+    def start(self) -> None:
+        """Start every registered job on the running loop"""
+        loop = asyncio.get_running_loop()
+        # Empty context, like the task queue workers
+        self._tasks = [
+            contextvars.Context().run(loop.create_task, self._run(seconds, job))
+            for seconds, job in self._jobs
+        ]
+        self._loop = loop
+
+    async def shutdown(self) -> None:
+        """Stop the jobs, interrupting any that are running"""
+        tasks, self._tasks = self._tasks, []
+        if self._loop is asyncio.get_running_loop():
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop = None
+
+
+# Global instance
+scheduler = Scheduler()
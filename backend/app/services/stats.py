@@ -0,0 +1,104 @@
+"""
+Counts behind the admin dashboard
+
+Each table is read in a single pass: conditional counts are
+``COUNT(*) FILTER (WHERE ...)`` on PostgreSQL and the equivalent
+``COUNT(CASE WHEN ... THEN 1 END)`` elsewhere, so SQLite runs the same
+queries in tests. User and bot statistics share one scan of the users table.
+Results sit in a short-TTL cache shared by the stats endpoints and the
+dashboard summary.
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models.product import Category, Product
+from app.db.models.user import User
+from app.services import rollups
+from app.services.cache import TTLCache
+
+stats_cache = TTLCache(ttl=settings.STATS_CACHE_TTL)
+
+
+def count_where(session: AsyncSession, condition):
+    """Rows matching condition, counted within a larger aggregate query"""
+    if session.get_bind().dialect.name == "postgresql":
+        return func.count().filter(condition)
+    return func.count(case((condition, 1)))
+
+
+async def _product_stats(session: AsyncSession) -> Dict[str, int]:
+    query = select(
+        func.count(),
+        count_where(session, Product.is_featured == True),
+        count_where(session, Product.is_active == True),
+        select(func.count()).select_from(Category).scalar_subquery(),
+    ).select_from(Product)
+    total_products, featured_products, active_products, total_categories = (await session.execute(query)).one()
+    return {
+        "total_products": total_products,
+        "total_categories": total_categories,
+        "featured_products": featured_products,
+        "active_products": active_products,
+    }
+
+
+async def _user_counts(session: AsyncSession) -> Dict[str, Any]:
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    query = select(
+        func.count(),
+        count_where(session, User.is_blocked == False),
+        count_where(session, User.is_gold_client == True),
+        count_where(session, User.is_blocked == True),
+        count_where(session, User.bot_interactions_count > 0),
+        func.coalesce(func.sum(User.bot_interactions_count), 0),
+        count_where(session, User.last_bot_interaction >= week_ago),
+    ).select_from(User)
+    row = (await session.execute(query)).one()
+    return dict(zip(
+        ("total", "active", "gold_clients", "blocked", "bot_users", "total_bot_interactions", "active_last_7_days"),
+        row,
+    ))
+
+
+async def product_stats(session: AsyncSession) -> Dict[str, int]:
+    """Product and category counts"""
+    return await stats_cache.get_or_set("products", lambda: _product_stats(session))
+
+
+async def user_stats(session: AsyncSession) -> Dict[str, int]:
+    """User counts by state"""
+    counts = await stats_cache.get_or_set("users", lambda: _user_counts(session))
+    return {name: counts[name] for name in ("total", "active", "gold_clients", "blocked")}
+
+
+async def bot_stats(session: AsyncSession) -> Dict[str, Any]:
+    """Bot usage counts"""
+    counts = await stats_cache.get_or_set("users", lambda: _user_counts(session))
+    bot_users = counts["bot_users"]
+    total_interactions = counts["total_bot_interactions"]
+    return {
+        "total_users": counts["total"],
+        "bot_users": bot_users,
+        "total_bot_interactions": total_interactions,
+        "active_users_last_7_days": counts["active_last_7_days"],
+        "average_interactions_per_user": total_interactions / bot_users if bot_users > 0 else 0,
+    }
+
+
+async def order_stats(
+    session: AsyncSession,
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+) -> Dict[str, Any]:
+    """Order totals from the daily rollup with the average order value"""
+    async def load() -> Dict[str, Any]:
+        stats = await rollups.order_stats(session, start_day, end_day)
+        total_orders = stats["total_orders"]
+        stats["avg_order_value"] = stats["total_revenue"] / total_orders if total_orders > 0 else 0
+        return stats
+
+    return await stats_cache.get_or_set(("orders", start_day, end_day), load)
@@ -0,0 +1,475 @@
+"""
+Object storage backends
+
+Image uploads and other generated files go through a StorageBackend, so the
+same code runs against S3-compatible services in production and a local
+directory in development, tests and benchmarks. The backend is chosen with
+``STORAGE_BACKEND`` ("s3" or "local").
+"""
+import asyncio
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, Iterable, List, NamedTuple, Optional, TypeVar
+from urllib.parse import quote, urlencode
+
+from app.core.config import settings
+from app.core.metrics import track_outbound
+
+T = TypeVar("T")
+
+
+# Largest page a listing yields and largest batch of a single DeleteObjects call
+PAGE_SIZE = 1000
+
+# Bytes read per step when streaming an object
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+class StorageError(Exception):
+    """Raised when the storage backend rejects or fails an operation"""
+
+
+class StoredObject(NamedTuple):
+    key: str
+    size: int
+    last_modified: datetime
+
+
+class StorageBackend(ABC):
+    """Key/value object store with public URLs"""
+
+    def __init__(self, public_url: Optional[str]):
+        self.public_url = public_url.rstrip("/") if public_url else public_url
+        # Storage clients are blocking, so calls run on their own threads
+        self._io_executor: Optional[ThreadPoolExecutor] = None
+
+    async def _run_io(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking storage call without blocking the event loop"""
+        if self._io_executor is None:
+            self._io_executor = ThreadPoolExecutor(
+                max_workers=settings.STORAGE_IO_WORKERS,
+                thread_name_prefix="storage-io",
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._io_executor, lambda: func(*args, **kwargs))
+
+    def url_for(self, key: str) -> str:
+        """Public URL of an object"""
+        return f"{self.public_url}/{key}"
+
+    def key_for_url(self, url: str) -> Optional[str]:
+        """Object key behind a public URL, or None if the URL is not ours"""
+        if not self.public_url or not url.startswith(f"{self.public_url}/"):
+            return None
+        return url[len(self.public_url) + 1:]
+
+    @abstractmethod
+    async def put(self, key: str, body: bytes, content_type: str, cache_control: Optional[str] = None) -> None:
+        """Store an object, replacing any existing one"""
+
+    @abstractmethod
+    async def put_file(self, key: str, path: str, content_type: str, cache_control: Optional[str] = None) -> None:
+        """Store a local file as an object without reading it into memory"""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes:
+        """Read an object; raises StorageError if it does not exist"""
+
+    @abstractmethod
+    async def open_stream(self, key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """
+        Open an object for reading in chunks, so it is never held in memory whole
+
+        Raises StorageError here if the object does not exist; the returned
+        iterator closes the object once exhausted.
+        """
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Check whether an object is stored"""
+
+    @abstractmethod
+    async def stat(self, key: str) -> Optional[StoredObject]:
+        """Size and last-modified time of an object, or None if it is not stored"""
+
+    @abstractmethod
+    async def touch(self, key: str, content_type: str, cache_control: Optional[str] = None) -> None:
+        """Reset an object's last-modified time to now without uploading it again"""
+
+    @abstractmethod
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        """Delete objects; missing keys are ignored, any other failure raises StorageError"""
+
+    @abstractmethod
+    def list_pages(self, prefix: str = "") -> AsyncIterator[List[StoredObject]]:
+        """Iterate over stored objects under a prefix, at most PAGE_SIZE at a time"""
+
+    def presigned_url(self, key: str, expiration: int = 3600) -> str:
+        """Temporary URL for reading a private object"""
+        return self.url_for(key)
+
+    @abstractmethod
+    def presigned_upload(self, key: str, content_type: str, max_bytes: int, expiration: int = 900) -> Dict[str, Any]:
+        """
+        Target a client can upload one object to without going through the API
+
+        Returns:
+            Dict with HTTP ``method``, ``url``, form ``fields`` (POST) and
+            ``headers`` the client has to send
+        """
+
+    def shutdown(self) -> None:
+        """Release storage I/O threads"""
+        if self._io_executor is not None:
+            self._io_executor.shutdown(wait=False)
+            self._io_executor = None
+
+
+class S3StorageBackend(StorageBackend):
+    """S3-compatible storage (DigitalOcean Spaces, MinIO, AWS)"""
+
+    def __init__(
+        self,
+        bucket_name: Optional[str],
+        public_url: Optional[str],
+        endpoint_url: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        region: Optional[str] = None,
+    ):
+        super().__init__(public_url)
+        self.bucket_name = bucket_name
+        self._client_options = {
+            "endpoint_url": endpoint_url,
+            "aws_access_key_id": access_key_id,
+            "aws_secret_access_key": secret_access_key,
+            "region_name": region,
+        }
+        self._client = None
+
+    @property
+    def client(self):
+        # Created on first use so importing the app needs neither boto3 setup nor credentials
+        if self._client is None:
+            import boto3
+            self._client = boto3.client("s3", **self._client_options)
+        return self._client
+
+    @client.setter
+    def client(self, value) -> None:
+        self._client = value
+
+    async def _call(self, method: str, **kwargs: Any) -> Any:
+        from botocore.exceptions import ClientError
+
+        try:
+            async with track_outbound("s3", method):
+                return await self._run_io(getattr(self.client, method), Bucket=self.bucket_name, **kwargs)
+        except ClientError as e:
+            raise StorageError(str(e)) from e
+
+    async def put(self, key: str, body: bytes, content_type: str, cache_control: Optional[str] = None) -> None:
+        extra = {"CacheControl": cache_control} if cache_control else {}
+        await self._call(
+            "put_object", Key=key, Body=body, ContentType=content_type, ACL="public-read", **extra
+        )
+
+    async def put_file(self, key: str, path: str, content_type: str, cache_control: Optional[str] = None) -> None:
+        from boto3.exceptions import S3UploadFailedError
+
+        extra = {"ContentType": content_type, "ACL": "public-read"}
+        if cache_control:
+            extra["CacheControl"] = cache_control
+        # upload_file streams from disk and switches to multipart for large files
+        try:
+            await self._call("upload_file", Filename=path, Key=key, ExtraArgs=extra)
+        except S3UploadFailedError as e:
+            raise StorageError(str(e)) from e
+
+    async def get(self, key: str) -> bytes:
+        response = await self._call("get_object", Key=key)
+        return await self._run_io(response["Body"].read)
+
+    async def open_stream(self, key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        body = (await self._call("get_object", Key=key))["Body"]
+
+        async def chunks() -> AsyncIterator[bytes]:
+            try:
+                while chunk := await self._run_io(body.read, chunk_size):
+                    yield chunk
+            finally:
+                body.close()
+
+        return chunks()
+
+    async def _head(self, key: str) -> Optional[Dict[str, Any]]:
+        """HeadObject response, or None if the object does not exist"""
+        try:
+            return await self._call("head_object", Key=key)
+        except StorageError as e:
+            if e.__cause__.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    async def exists(self, key: str) -> bool:
+        return await self._head(key) is not None
+
+    async def stat(self, key: str) -> Optional[StoredObject]:
+        response = await self._head(key)
+        if response is None:
+            return None
+        return StoredObject(key, response["ContentLength"], response["LastModified"])
+
+    async def touch(self, key: str, content_type: str, cache_control: Optional[str] = None) -> None:
+        # S3 only allows copying an object onto itself when its metadata is replaced
+        extra = {"CacheControl": cache_control} if cache_control else {}
+        await self._call(
+            "copy_object", Key=key, CopySource={"Bucket": self.bucket_name, "Key": key},
+            MetadataDirective="REPLACE", ContentType=content_type, ACL="public-read", **extra
+        )
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        objects = [{"Key": key} for key in keys]
+        failed = []
+        # DeleteObjects accepts at most 1000 keys per request
+        for start in range(0, len(objects), PAGE_SIZE):
+            response = await self._call(
+                "delete_objects", Delete={"Objects": objects[start:start + PAGE_SIZE], "Quiet": True}
+            )
+            # Quiet mode only reports the keys that could not be deleted
+            failed.extend(error["Key"] for error in (response or {}).get("Errors", []))
+        if failed:
+            raise StorageError(f"Failed to delete {len(failed)} objects, e.g. {failed[0]}")
+
+    async def list_pages(self, prefix: str = "") -> AsyncIterator[List[StoredObject]]:
+        kwargs: Dict[str, Any] = {"Prefix": prefix, "MaxKeys": PAGE_SIZE}
+        while True:
+            response = await self._call("list_objects_v2", **kwargs)
+            page = [
+                StoredObject(item["Key"], item["Size"], item["LastModified"])
+                for item in response.get("Contents", [])
+            ]
+            if page:
+                yield page
+            if not response.get("IsTruncated"):
+                return
+            kwargs["ContinuationToken"] = response["NextContinuationToken"]
+
+    def presigned_upload(self, key: str, content_type: str, max_bytes: int, expiration: int = 900) -> Dict[str, Any]:
+        from botocore.exceptions import ClientError
+
+        # POST policies let S3 enforce the size limit, which presigned PUTs cannot
+        try:
+            target = self.client.generate_presigned_post(
+                Bucket=self.bucket_name,
+                Key=key,
+                Fields={"Content-Type": content_type},
+                Conditions=[{"Content-Type": content_type}, ["content-length-range", 1, max_bytes]],
+                ExpiresIn=expiration,
+            )
+        except ClientError as e:
+            raise StorageError(str(e)) from e
+        return {"method": "POST", "url": target["url"], "fields": target["fields"], "headers": {}}
+
+    def presigned_url(self, key: str, expiration: int = 3600) -> str:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.generate_presigned_url(
+                "get_object",
+                Params={"Bucket": self.bucket_name, "Key": key},
+                ExpiresIn=expiration,
+            )
+        except ClientError as e:
+            raise StorageError(str(e)) from e
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Objects stored as files under a directory
+
+    Meant to sit below the ``/static`` mount, so stored files are served by
+    the API itself without any external service.
+    """
+
+    def __init__(self, root: str, public_url: str, upload_url: Optional[str] = None, signing_key: str = ""):
+        super().__init__(public_url)
+        self.root = os.path.abspath(root)
+        # Presigned uploads are PUT to an API route that checks an HMAC signature
+        self.upload_url = upload_url
+        self._signing_key = signing_key.encode()
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise StorageError(f"Invalid object key: {key}")
+        return path
+
+    def _signature(self, key: str, content_type: str, max_bytes: int, expires: int) -> str:
+        message = f"{key}\n{content_type}\n{max_bytes}\n{expires}".encode()
+        return hmac.new(self._signing_key, message, hashlib.sha256).hexdigest()
+
+    def presigned_upload(self, key: str, content_type: str, max_bytes: int, expiration: int = 900) -> Dict[str, Any]:
+        if not self.upload_url or not self._signing_key:
+            raise StorageError("Direct uploads are not configured for local storage")
+        expires = int(time.time()) + expiration
+        query = urlencode({
+            "content_type": content_type,
+            "max_bytes": max_bytes,
+            "expires": expires,
+            "signature": self._signature(key, content_type, max_bytes, expires),
+        })
+        return {
+            "method": "PUT",
+            "url": f"{self.upload_url}/{quote(key)}?{query}",
+            "fields": {},
+            "headers": {"Content-Type": content_type},
+        }
+
+    def verify_upload(self, key: str, content_type: str, max_bytes: int, expires: int, signature: str) -> bool:
+        """Check a presigned upload URL produced by presigned_upload"""
+        if not self._signing_key or expires < time.time():
+            return False
+        return hmac.compare_digest(signature, self._signature(key, content_type, max_bytes, expires))
+
+    def _write(self, path: str, fill: Callable[[BinaryIO], Any]) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so readers never see a partial object; the name is
+        # unique per call, so threads writing the same key do not share a temp file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            # mkstemp creates the file 0600; objects are served as static files
+            os.fchmod(fd, 0o644)
+            with os.fdopen(fd, "wb") as f:
+                fill(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def _read(self, path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _remove(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    async def put(self, key: str, body: bytes, content_type: str, cache_control: Optional[str] = None) -> None:
+        try:
+            await self._run_io(self._write, self._path(key), lambda f: f.write(body))
+        except OSError as e:
+            raise StorageError(str(e)) from e
+
+    async def put_file(self, key: str, path: str, content_type: str, cache_control: Optional[str] = None) -> None:
+        def copy(f: BinaryIO) -> None:
+            with open(path, "rb") as source:
+                shutil.copyfileobj(source, f)
+
+        try:
+            await self._run_io(self._write, self._path(key), copy)
+        except OSError as e:
+            raise StorageError(str(e)) from e
+
+    async def get(self, key: str) -> bytes:
+        try:
+            return await self._run_io(self._read, self._path(key))
+        except OSError as e:
+            raise StorageError(str(e)) from e
+
+    async def open_stream(self, key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        try:
+            f = await self._run_io(open, self._path(key), "rb")
+        except OSError as e:
+            raise StorageError(str(e)) from e
+
+        async def chunks() -> AsyncIterator[bytes]:
+            try:
+                while chunk := await self._run_io(f.read, chunk_size):
+                    yield chunk
+            finally:
+                f.close()
+
+        return chunks()
+
+    async def exists(self, key: str) -> bool:
+        return await self._run_io(os.path.isfile, self._path(key))
+
+    async def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            stat = await self._run_io(os.stat, self._path(key))
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            raise StorageError(str(e)) from e
+        return StoredObject(key, stat.st_size, datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc))
+
+    async def touch(self, key: str, content_type: str, cache_control: Optional[str] = None) -> None:
+        try:
+            await self._run_io(os.utime, self._path(key))
+        except OSError as e:
+            raise StorageError(str(e)) from e
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        try:
+            await self._run_io(self._remove, [self._path(key) for key in keys])
+        except OSError as e:
+            raise StorageError(str(e)) from e
+
+    def _scan(self, prefix: str) -> List[StoredObject]:
+        objects = []
+        directory = os.path.join(self.root, os.path.dirname(prefix))
+        for dirpath, _, filenames in os.walk(directory):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                if not key.startswith(prefix) or name.endswith(".tmp"):
+                    continue
+                stat = os.stat(path)
+                modified = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+                objects.append(StoredObject(key, stat.st_size, modified))
+        return sorted(objects)
+
+    async def list_pages(self, prefix: str = "") -> AsyncIterator[List[StoredObject]]:
+        # Local trees are small, so one scan is fine; pages keep the interface the same as S3
+        objects = await self._run_io(self._scan, prefix)
+        for start in range(0, len(objects), PAGE_SIZE):
+            yield objects[start:start + PAGE_SIZE]
+
+
+def create_storage_backend() -> StorageBackend:
+    """Build the backend selected by STORAGE_BACKEND"""
+    if settings.STORAGE_BACKEND == "local":
+        return LocalStorageBackend(
+            settings.LOCAL_STORAGE_DIR,
+            settings.LOCAL_STORAGE_URL,
+            upload_url=f"{settings.API_V1_STR}/storage/upload",
+            signing_key=settings.SECRET_KEY,
+        )
+    if settings.STORAGE_BACKEND == "s3":
+        return S3StorageBackend(
+            bucket_name=settings.S3_BUCKET_NAME,
+            public_url=settings.S3_PUBLIC_URL,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            access_key_id=settings.S3_ACCESS_KEY_ID,
+            secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            region=settings.S3_REGION,
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
+
+
+# Global instance
+storage = create_storage_backend()
@@ -0,0 +1,92 @@
+"""
+In-process background job queue
+
+Work that should not hold up a response (image post-processing,
+notifications) is queued here and run by a few worker coroutines on the
+API's event loop. CPU-heavy steps still go to their own pools from inside
+the job.
+"""
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, List, Optional
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+
+
+class TaskQueue:
+    """
+    Bounded queue of coroutine jobs
+
+    Jobs are fire-and-forget: failures are logged, not raised to the caller.
+    Once ``max_size`` jobs are waiting, enqueue refuses new ones with 503.
+    """
+
+    def __init__(self, name: str, workers: int, max_size: int):
+        self.name = name
+        self.workers = workers
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_workers(self) -> asyncio.Queue:
+        # Workers are bound to the loop they were started on, so restart them if it changed
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+            # Workers start in an empty context so they do not inherit the
+            # per-request state (metrics, query trackers) of whoever started them
+            self._tasks = [
+                contextvars.Context().run(loop.create_task, self._worker(self._queue))
+                for _ in range(self.workers)
+            ]
+            self._loop = loop
+        return self._queue
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            func, args = await queue.get()
+            try:
+                await func(*args)
+            except Exception as e:
+                print(f"Warning: {self.name} job {func.__name__} failed: {e}")
+            finally:
+                queue.task_done()
+
+    def enqueue(self, func: Callable[..., Awaitable[Any]], *args: Any) -> None:
+        """Schedule ``await func(*args)`` on a worker"""
+        queue = self._ensure_workers()
+        try:
+            queue.put_nowait((func, args))
+        except asyncio.QueueFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many background jobs queued, please retry shortly",
+                headers={"Retry-After": "5"},
+            )
+
+    @property
+    def depth(self) -> int:
+        """Jobs waiting for a worker"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def join(self) -> None:
+        """Wait until every queued job has finished"""
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    async def shutdown(self) -> None:
+        """Stop the workers; jobs still queued are dropped"""
+        tasks, self._tasks = self._tasks, []
+        if self._loop is asyncio.get_running_loop():
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._queue = None
+        self._loop = None
+
+
+# Global instance
+task_queue = TaskQueue("background", workers=settings.BACKGROUND_WORKERS, max_size=settings.BACKGROUND_QUEUE_SIZE)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark image upload throughput and latency against local storage.
+
+Pushes a batch of distinct images through S3Service.upload_image with the
+local filesystem backend in a temporary directory, so the whole pipeline
+(spooling, variant rendering in the image pool, storage writes) runs without
+any S3-compatible service.
+
+Usage (from backend/, with the usual .env or environment in place):
+    python -m benchmarks.image_upload_throughput --uploads 32 --concurrency 4
+"""
+import argparse
+import asyncio
+import io
+import statistics
+import tempfile
+import time
+from typing import List
+
+from fastapi import UploadFile
+from PIL import Image
+
+from app.services.images import image_pool
+from app.services.s3 import S3Service
+from app.services.storage import LocalStorageBackend
+
+
+def make_image(index: int, width: int, height: int) -> bytes:
+    """Distinct JPEG per upload, so content addressing does not dedupe the batch"""
+    buffer = io.BytesIO()
+    color = (index * 37 % 256, index * 91 % 256, index * 53 % 256)
+    Image.new("RGB", (width, height), color=color).save(buffer, format="JPEG", quality=95)
+    return buffer.getvalue()
+
+
+async def main(uploads: int, concurrency: int, width: int, height: int) -> None:
+    images = [make_image(i, width, height) for i in range(uploads)]
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    with tempfile.TemporaryDirectory() as root:
+        service = S3Service(LocalStorageBackend(root, "/static/uploads"))
+
+        async def upload(content: bytes) -> None:
+            async with semaphore:
+                file = UploadFile(io.BytesIO(content), size=len(content), filename="photo.jpg",
+                                  headers={"content-type": "image/jpeg"})
+                started = time.perf_counter()
+                await service.upload_image(file, folder="products")
+                latencies.append(time.perf_counter() - started)
+
+        # Warm up the worker processes so the first uploads do not pay for forking
+        await upload(make_image(uploads, 64, 64))
+        latencies.clear()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(upload(content) for content in images))
+        elapsed = time.perf_counter() - started
+        service.shutdown()
+
+    image_pool.shutdown()
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    print(f"📤 {uploads} uploads of {width}x{height} JPEG, concurrency {concurrency}")
+    print(
+        f"throughput {uploads / elapsed:.1f} uploads/s, "
+        f"latency p50 {statistics.median(latencies_ms):.0f}ms, "
+        f"p95 {latencies_ms[min(len(latencies_ms) - 1, int(len(latencies_ms) * 0.95))]:.0f}ms, "
+        f"max {latencies_ms[-1]:.0f}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--uploads", type=int, default=32, help="Number of images to upload")
+    parser.add_argument("--concurrency", type=int, default=4, help="Uploads in flight at once")
+    parser.add_argument("--width", type=int, default=3000, help="Source image width")
+    parser.add_argument("--height", type=int, default=2000, help="Source image height")
+    args = parser.parse_args()
+    asyncio.run(main(args.uploads, args.concurrency, args.width, args.height))
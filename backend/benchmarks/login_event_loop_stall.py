@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark event-loop stall caused by concurrent admin logins.
+
+Runs a burst of concurrent logins against an in-memory SQLite database while a
+ticker coroutine measures how late the event loop wakes it up. The "before"
+run verifies bcrypt inline (the old behaviour), the "after" run uses
+authenticate_admin, which verifies on the password pool.
+
+Usage (from backend/, with the usual .env or environment in place):
+    python -m benchmarks.login_event_loop_stall --logins 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.core.security import authenticate_admin, get_password_hash, verify_password
+from app.db.base import Base
+from app.db.models.admin import AdminUser
+
+TICK_INTERVAL = 0.005  # 5ms, roughly what a cheap public request needs
+
+
+async def authenticate_admin_inline(session: AsyncSession, username: str, password: str) -> Optional[AdminUser]:
+    """Previous implementation: bcrypt runs directly on the event loop"""
+    result = await session.execute(
+        select(AdminUser).where(AdminUser.username == username, AdminUser.is_active == True)
+    )
+    admin = result.scalar_one_or_none()
+    if not admin or not verify_password(password, admin.password_hash):
+        return None
+    return admin
+
+
+async def ticker(stop: asyncio.Event, lags: List[float]) -> None:
+    """Record how late each tick fires compared to its schedule"""
+    while not stop.is_set():
+        expected = time.perf_counter() + TICK_INTERVAL
+        await asyncio.sleep(TICK_INTERVAL)
+        lags.append(max(0.0, time.perf_counter() - expected))
+
+
+async def run_burst(session_factory, authenticate, logins: int) -> dict:
+    """Run concurrent logins and collect loop lag statistics"""
+    lags: List[float] = []
+    stop = asyncio.Event()
+    tick_task = asyncio.create_task(ticker(stop, lags))
+
+    async def login(i: int):
+        async with session_factory() as session:
+            # Alternate good and bad passwords, like a brute-force attempt mixed with real logins
+            password = "admin123" if i % 2 == 0 else "wrong-password"
+            return await authenticate(session, "admin", password)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login(i) for i in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await tick_task
+
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    return {
+        "elapsed_s": elapsed,
+        "ticks": len(lags),
+        "lag_p50_ms": statistics.median(lags_ms),
+        "lag_p99_ms": lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))],
+        "lag_max_ms": lags_ms[-1],
+    }
+
+
+async def main(logins: int) -> None:
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_factory() as session:
+        session.add(AdminUser(
+            username="admin",
+            email="admin@example.com",
+            password_hash=get_password_hash("admin123"),
+            is_active=True,
+        ))
+        await session.commit()
+
+    print(f"🔐 {logins} concurrent logins, ticker every {TICK_INTERVAL * 1000:.0f}ms")
+    for label, authenticate in (("before (inline bcrypt)", authenticate_admin_inline),
+                                ("after (password pool)", authenticate_admin)):
+        stats = await run_burst(session_factory, authenticate, logins)
+        print(
+            f"{label:>24}: total {stats['elapsed_s']:.2f}s, ticks {stats['ticks']}, "
+            f"lag p50 {stats['lag_p50_ms']:.1f}ms, p99 {stats['lag_p99_ms']:.1f}ms, "
+            f"max {stats['lag_max_ms']:.1f}ms"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--logins", type=int, default=20, help="Number of concurrent logins")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins))
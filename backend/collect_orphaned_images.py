@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Script to find and delete stored images that no product or package uses
+
+Runs a dry run by default; pass --delete to remove the orphans.
+"""
+import argparse
+import asyncio
+from datetime import timedelta
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.image_gc import collect_orphaned_images
+from app.services.s3 import s3_service
+
+
+async def main(delete: bool, min_age_hours: int):
+    async with AsyncSessionLocal() as session:
+        print("🧹 Scanning storage for orphaned images...")
+        report = await collect_orphaned_images(
+            session, dry_run=not delete, min_age=timedelta(hours=min_age_hours)
+        )
+
+    s3_service.shutdown()
+
+    for key in report["sample"]:
+        print(f"   {key}")
+    print(f"📦 Scanned {report['scanned']} objects")
+    print(f"🗑️  Orphaned: {report['orphaned']} ({report['orphaned_bytes'] / (1024 * 1024):.1f} MB)")
+    if delete:
+        print(f"✅ Deleted: {report['deleted']}, failed: {report['failed']}")
+    else:
+        print("ℹ️  Dry run, nothing deleted. Pass --delete to remove orphans")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete stored images no product or package uses")
+    parser.add_argument("--delete", action="store_true", help="Delete orphans instead of only reporting them")
+    parser.add_argument(
+        "--min-age-hours", type=int, default=settings.IMAGE_GC_MIN_AGE_HOURS, help="Keep objects younger than this"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.delete, args.min_age_hours))
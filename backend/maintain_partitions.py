@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Script to create the monthly partitions of orders and order_items ahead of time
+
+The API does this at start-up and every ORDER_PARTITION_CHECK_HOURS; run it
+by hand (or from cron) to create partitions further ahead, e.g. before a
+long deploy freeze.
+"""
+import argparse
+import asyncio
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.services.partitions import ensure_partitions
+
+
+async def main(months_ahead: int):
+    async with AsyncSessionLocal() as session:
+        print(f"📦 Creating order partitions {months_ahead} months ahead...")
+        created = await ensure_partitions(session, months_ahead)
+    if created:
+        for name in created:
+            print(f"✅ {name}")
+    else:
+        print("✅ All partitions already exist")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--months-ahead", type=int, default=settings.ORDER_PARTITION_MONTHS_AHEAD)
+    asyncio.run(main(parser.parse_args().months_ahead))
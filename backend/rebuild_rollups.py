@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Script to rebuild the daily rollups behind the dashboard statistics
+
+Recomputes order_daily_stats, order_category_daily_stats and
+user_daily_signups from the orders and users tables. Run it after editing
+orders or users outside the API or if the statistics look off.
+"""
+import asyncio
+
+from app.db.session import AsyncSessionLocal
+from app.services.rollups import rebuild_rollups
+
+
+async def main():
+    async with AsyncSessionLocal() as session:
+        print("📊 Rebuilding daily rollups...")
+        written = await rebuild_rollups(session)
+    for table, rows in written.items():
+        print(f"✅ {table}: {rows} rows")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,20 +2,28 @@
 import pytest
 import pytest_asyncio
 import asyncio
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Generator
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import StaticPool
 import base64
 
 from app.main import app
-from app.db.session import Base, get_async_session
+from app.db.session import Base, get_async_session, get_read_session, read_router
 from app.db.models.product import Category, Product, District, PromoCode
 from app.db.models.user import User
 from app.db.models.order import Order, OrderItem
 from app.db.models.admin import AdminUser
 from app.core.security import get_password_hash
 from app.core.config import settings
+from app.core import query_tracker
+from app.core.metrics import instrument_engine
+from app.services import image_jobs
+from app.services.analytics import analytics_cache
+from app.services.s3 import s3_service
+from app.services.storage import LocalStorageBackend
+from app.services.stats import stats_cache
+from app.services.tasks import task_queue
 
 
 # Test database URL - using in-memory SQLite for faster tests
@@ -23,6 +31,7 @@ TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 # Set testing flag for the entire test session
 settings.TESTING = True
+settings.ORDER_EVENTS_BACKEND = "memory"
 
 # Create test engine with proper settings for SQLite
 test_engine = create_async_engine(
@@ -33,6 +42,9 @@ test_engine = create_async_engine(
         "check_same_thread": False,
     },
 )
+# Count statements like the application engines so request metrics and query budgets see them
+instrument_engine(test_engine, "test")
+query_tracker.install(test_engine)
 
 TestSessionLocal = async_sessionmaker(
     bind=test_engine,
@@ -41,6 +53,37 @@ TestSessionLocal = async_sessionmaker(
 )
 
 
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries=None, max_repeats=1): fail if the test body runs more SQL "
+        "statements than max_queries or any one statement more than max_repeats times",
+    )
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """Enforce query_budget markers over the test body; fixture setup is not counted."""
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        yield
+        return
+
+    with query_tracker.track_queries() as tracker:
+        outcome = yield
+    problems = tracker.problems(*marker.args, **{"max_repeats": 1, **marker.kwargs})
+    if outcome.excinfo is None and problems:
+        outcome.force_exception(query_tracker.QueryBudgetExceeded(
+            "Query budget exceeded:\n  " + "\n  ".join(problems)
+        ))
+
+
+@pytest.fixture
+def query_budget():
+    """Context manager failing a block that overruns its budget: ``with query_budget(3): ...``"""
+    return query_tracker.query_budget
+
+
 @pytest_asyncio.fixture
 async def test_session() -> AsyncGenerator[AsyncSession, None]:
     """Create a test database session."""
@@ -71,12 +114,14 @@ async def test_session() -> AsyncGenerator[AsyncSession, None]:
 
 
 @pytest_asyncio.fixture
-async def unauthenticated_client(test_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
+async def unauthenticated_client(test_session: AsyncSession, monkeypatch) -> AsyncGenerator[AsyncClient, None]:
     """Create a test client WITHOUT authentication for testing auth failures."""
     def override_get_db():
         return test_session
     
+    monkeypatch.setattr(read_router, "primary", TestSessionLocal)
     app.dependency_overrides[get_async_session] = override_get_db
+    app.dependency_overrides[get_read_session] = override_get_db
     # Explicitly do NOT mock get_current_user for auth tests
     
     try:
@@ -87,17 +132,27 @@ async def unauthenticated_client(test_session: AsyncSession) -> AsyncGenerator[A
 
 
 @pytest_asyncio.fixture
-async def client(test_session: AsyncSession, sample_user: User) -> AsyncGenerator[AsyncClient, None]:
+async def client(test_session: AsyncSession, sample_user: User, monkeypatch) -> AsyncGenerator[AsyncClient, None]:
     """Create a test client with database override and authenticated user."""
     def override_get_db():
         return test_session
     
+    # Background jobs and streamed responses open their own sessions
+    monkeypatch.setattr(image_jobs, "AsyncSessionLocal", TestSessionLocal)
+    monkeypatch.setattr(read_router, "primary", TestSessionLocal)
+    
+    # Cached counts from an earlier test would hide this test's data
+    stats_cache.clear()
+    analytics_cache.clear()
+    
     # Mock the get_current_user dependency for tests that need authentication
     def mock_get_current_user():
         return sample_user
     
-    from app.api.deps import get_current_user
+    from app.api.deps import get_current_user, get_user_read_session
     app.dependency_overrides[get_async_session] = override_get_db
+    app.dependency_overrides[get_read_session] = override_get_db
+    app.dependency_overrides[get_user_read_session] = override_get_db
     app.dependency_overrides[get_current_user] = mock_get_current_user
     
     try:
@@ -105,6 +160,7 @@ async def client(test_session: AsyncSession, sample_user: User) -> AsyncGenerato
             yield ac
     finally:
         app.dependency_overrides.clear()
+        await task_queue.shutdown()
 
 
 @pytest_asyncio.fixture
@@ -256,6 +312,20 @@ async def sample_order(
     return order
 
 
+@pytest.fixture
+def local_storage(tmp_path, monkeypatch) -> Generator[LocalStorageBackend, None, None]:
+    """Store uploaded objects in a temporary directory."""
+    backend = LocalStorageBackend(
+        str(tmp_path / "storage"),
+        "https://cdn.test",
+        upload_url="/api/v1/storage/upload",
+        signing_key="test-signing-key",
+    )
+    monkeypatch.setattr(s3_service, "storage", backend)
+    yield backend
+    backend.shutdown()
+
+
 # Valid Telegram init data for testing
 @pytest.fixture
 def valid_telegram_init_data():
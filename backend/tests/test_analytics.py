@@ -0,0 +1,134 @@
+"""Tests for the dashboard time series."""
+from datetime import date
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from app.db.models.order import OrderCategoryDailyStats, OrderDailyStats, OrderStatus
+from app.db.models.user import UserDailySignups
+from app.services.analytics import analytics_cache, periods
+
+
+@pytest_asyncio.fixture
+async def rollup_data(test_session, sample_district, sample_category):
+    """Daily rollup rows across two months, including a cancelled order."""
+    rows = [
+        (date(2026, 1, 30), OrderStatus.DELIVERED, 2, 300.0),
+        (date(2026, 1, 31), OrderStatus.PENDING, 1, 100.0),
+        (date(2026, 2, 2), OrderStatus.DELIVERED, 3, 600.0),
+        (date(2026, 2, 2), OrderStatus.CANCELLED, 1, 999.0),
+    ]
+    for day, status, count, revenue in rows:
+        test_session.add(OrderDailyStats(
+            day=day, status=status, district_id=sample_district.id,
+            order_count=count, revenue=revenue, discount=0, item_quantity=count,
+        ))
+        test_session.add(OrderCategoryDailyStats(
+            day=day, status=status, category_id=sample_category.id,
+            order_count=count, revenue=revenue, item_quantity=count,
+        ))
+    test_session.add(UserDailySignups(day=date(2026, 2, 1), new_users=4))
+    await test_session.commit()
+
+
+def values(data: dict, series: int = 0) -> list:
+    return [point["value"] for point in data["series"][series]["points"]]
+
+
+@pytest.mark.asyncio
+class TestTimeseries:
+    """Test GET /admin/analytics/timeseries."""
+
+    async def test_daily_revenue_fills_gaps(self, client: AsyncClient, admin_headers, rollup_data):
+        """Test one point per day, zeros on quiet days and cancelled orders left out."""
+        response = await client.get(
+            "/api/v1/admin/analytics/timeseries?metric=revenue&start_date=2026-01-30&end_date=2026-02-02",
+            headers=admin_headers
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [point["period"] for point in data["series"][0]["points"]] == [
+            "2026-01-30", "2026-01-31", "2026-02-01", "2026-02-02"
+        ]
+        assert values(data) == [300.0, 100.0, 0, 600.0]
+
+    async def test_monthly_and_weekly_buckets(self, client: AsyncClient, admin_headers, rollup_data):
+        """Test that days are summed into months and Monday-based weeks."""
+        base = "/api/v1/admin/analytics/timeseries?start_date=2026-01-01&end_date=2026-02-28"
+
+        monthly = (await client.get(f"{base}&metric=orders&granularity=month", headers=admin_headers)).json()
+        assert values(monthly) == [3, 3]
+
+        aov = (await client.get(f"{base}&metric=aov&granularity=month", headers=admin_headers)).json()
+        assert values(aov) == [133.33, 200.0]
+
+        weekly = (await client.get(f"{base}&metric=orders&granularity=week", headers=admin_headers)).json()
+        points = {point["period"]: point["value"] for point in weekly["series"][0]["points"]}
+        assert points["2026-01-26"] == 3
+        assert points["2026-02-02"] == 3
+
+    async def test_group_by_district_and_category(
+        self, client: AsyncClient, admin_headers, rollup_data, sample_district, sample_category
+    ):
+        """Test a labelled series per group."""
+        base = "/api/v1/admin/analytics/timeseries?metric=revenue&granularity=month&start_date=2026-01-01&end_date=2026-02-28"
+
+        by_district = (await client.get(f"{base}&group_by=district", headers=admin_headers)).json()
+        assert [(s["key"], s["label"]) for s in by_district["series"]] == [
+            (str(sample_district.id), sample_district.name)
+        ]
+        assert values(by_district) == [400.0, 600.0]
+
+        by_category = (await client.get(f"{base}&group_by=category", headers=admin_headers)).json()
+        assert by_category["series"][0]["key"] == sample_category.id
+        assert values(by_category) == [400.0, 600.0]
+
+    async def test_new_users(self, client: AsyncClient, admin_headers, rollup_data):
+        """Test sign-ups per month and that they cannot be grouped."""
+        base = "/api/v1/admin/analytics/timeseries?metric=new_users&granularity=month&start_date=2026-01-01&end_date=2026-02-28"
+
+        data = (await client.get(base, headers=admin_headers)).json()
+        assert values(data) == [0, 4]
+
+        response = await client.get(f"{base}&group_by=district", headers=admin_headers)
+        assert response.status_code == 400
+
+    async def test_results_are_cached(self, client: AsyncClient, admin_headers, rollup_data, test_session):
+        """Test that a repeated request is answered from the cache."""
+        url = "/api/v1/admin/analytics/timeseries?metric=orders&start_date=2026-02-02&end_date=2026-02-02"
+        first = (await client.get(url, headers=admin_headers)).json()
+
+        test_session.add(OrderDailyStats(
+            day=date(2026, 2, 2), status=OrderStatus.CONFIRMED, district_id=99,
+            order_count=5, revenue=50.0, discount=0, item_quantity=5,
+        ))
+        await test_session.commit()
+
+        assert (await client.get(url, headers=admin_headers)).json() == first
+        analytics_cache.clear()
+        assert values((await client.get(url, headers=admin_headers)).json()) == [8]
+
+    async def test_rejects_bad_ranges(self, client: AsyncClient, admin_headers):
+        """Test date validation."""
+        base = "/api/v1/admin/analytics/timeseries?metric=orders"
+        assert (await client.get(f"{base}&start_date=soon", headers=admin_headers)).status_code == 400
+        assert (await client.get(
+            f"{base}&start_date=2026-02-01&end_date=2026-01-01", headers=admin_headers
+        )).status_code == 400
+        assert (await client.get(
+            f"{base}&start_date=2000-01-01&end_date=2026-01-01", headers=admin_headers
+        )).status_code == 400
+        assert (await client.get(f"{base}&granularity=hour", headers=admin_headers)).status_code == 422
+
+    async def test_default_range(self, client: AsyncClient, admin_headers):
+        """Test that the range defaults to the last 30 days."""
+        data = (await client.get("/api/v1/admin/analytics/timeseries?metric=orders", headers=admin_headers)).json()
+        assert len(data["series"][0]["points"]) == 30
+
+
+def test_month_periods_cross_year_end():
+    """Test month stepping over December."""
+    assert periods(date(2025, 11, 15), date(2026, 1, 3), "month") == [
+        date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1)
+    ]
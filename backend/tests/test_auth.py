@@ -44,6 +44,43 @@ class TestJWTAuth:
         assert response.status_code == 200
 
 
+class TestPasswordHashing:
+    """Test bcrypt hashing on the password pool."""
+    
+    async def test_verify_password_async(self):
+        """Test async verification matches the sync implementation."""
+        from app.core.security import get_password_hash_async, verify_password_async
+        
+        password_hash = await get_password_hash_async("secret-pass")
+        assert await verify_password_async("secret-pass", password_hash) is True
+        assert await verify_password_async("wrong-pass", password_hash) is False
+    
+    async def test_verify_runs_on_password_pool(self, monkeypatch):
+        """Test that verification runs on the password pool while other coroutines proceed."""
+        import asyncio
+        import threading
+        from app.core import security
+        
+        released = threading.Event()
+        seen = {}
+        
+        def blocking_verify(plain_password, hashed_password):
+            seen["thread"] = threading.current_thread().name
+            # Only returns once the event loop has run the coroutine below
+            seen["released"] = released.wait(timeout=5)
+            return True
+        
+        monkeypatch.setattr(security, "verify_password", blocking_verify)
+        verify_task = asyncio.create_task(security.verify_password_async("admin123", "hash"))
+        # Let the task hand off to the pool, then keep running on the loop
+        await asyncio.sleep(0)
+        released.set()
+        
+        assert await verify_task is True
+        assert seen["thread"].startswith("password-hash")
+        assert seen["released"] is True
+
+
 class TestTelegramAuth:
     """Test Telegram Web App authentication."""
     
@@ -0,0 +1,86 @@
+"""Tests for dashboard counts and the combined summary."""
+from datetime import datetime, timedelta
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.db.models.product import Product
+from app.db.models.user import User
+from app.services.stats import count_where, stats_cache
+
+
+@pytest_asyncio.fixture
+async def dashboard_data(test_session, sample_product, sample_user):
+    """Products and users in every state the counts distinguish."""
+    test_session.add_all([
+        Product(id="featured", category_id=sample_product.category_id, name="Featured",
+                price_per_kg=1.0, is_featured=True, is_active=True),
+        Product(id="hidden", category_id=sample_product.category_id, name="Hidden",
+                price_per_kg=1.0, is_featured=False, is_active=False),
+        User(id=2, first_name="Gold", is_gold_client=True, bot_interactions_count=4,
+             last_bot_interaction=datetime.utcnow()),
+        User(id=3, first_name="Blocked", is_blocked=True, bot_interactions_count=2,
+             last_bot_interaction=datetime.utcnow() - timedelta(days=30)),
+    ])
+    await test_session.commit()
+
+
+@pytest.mark.asyncio
+class TestDashboardStats:
+    """Test the single-scan stats endpoints."""
+
+    async def test_product_stats(self, client: AsyncClient, admin_headers, dashboard_data):
+        """Test product counts."""
+        response = await client.get("/api/v1/admin/products/stats", headers=admin_headers)
+        assert response.json() == {
+            "total_products": 3, "total_categories": 1, "featured_products": 1, "active_products": 2
+        }
+
+    async def test_user_and_bot_stats(self, client: AsyncClient, admin_headers, dashboard_data):
+        """Test user and bot counts served from one scan."""
+        users = (await client.get("/api/v1/admin/users/stats", headers=admin_headers)).json()
+        assert users == {"total": 3, "active": 2, "gold_clients": 1, "blocked": 1}
+
+        bot = (await client.get("/api/v1/bot/stats")).json()
+        assert bot["total_users"] == 3
+        assert bot["bot_users"] == 2
+        assert bot["total_bot_interactions"] == 6
+        assert bot["active_users_last_7_days"] == 1
+        assert bot["average_interactions_per_user"] == 3
+
+    async def test_counts_are_cached(self, client: AsyncClient, admin_headers, dashboard_data, test_session):
+        """Test that counts are reused until the cache is cleared."""
+        first = (await client.get("/api/v1/admin/users/stats", headers=admin_headers)).json()
+        test_session.add(User(id=4, first_name="Late"))
+        await test_session.commit()
+
+        assert (await client.get("/api/v1/admin/users/stats", headers=admin_headers)).json() == first
+        stats_cache.clear()
+        assert (await client.get("/api/v1/admin/users/stats", headers=admin_headers)).json()["total"] == 4
+
+    async def test_dashboard_summary(self, client: AsyncClient, admin_headers, dashboard_data, sample_order):
+        """Test that the summary bundles every dashboard section."""
+        response = await client.get("/api/v1/admin/dashboard/summary?recent=3", headers=admin_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["products"]["total_products"] == 3
+        assert data["users"]["gold_clients"] == 1
+        assert data["bot"]["bot_users"] == 2
+        assert set(data["orders"]) == {"total_orders", "total_revenue", "avg_order_value", "orders_by_status"}
+        assert [order["id"] for order in data["recent_orders"]] == [sample_order.id]
+        assert len(data["last_7_days"]) == 7
+        assert data["last_7_days"][-1]["day"] == datetime.utcnow().date().isoformat()
+
+
+def test_count_where_uses_filter_on_postgresql():
+    """Test that PostgreSQL gets an aggregate FILTER clause."""
+    class Session:
+        def get_bind(self):
+            return type("Bind", (), {"dialect": postgresql.dialect()})()
+
+    query = select(count_where(Session(), User.is_blocked == True)).select_from(User)
+    sql = str(query.compile(dialect=postgresql.dialect()))
+    assert "count(*) FILTER (WHERE users.is_blocked = true)" in sql
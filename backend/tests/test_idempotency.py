@@ -0,0 +1,126 @@
+"""Tests for idempotent order submission."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from app.api.endpoints import orders
+from app.core.config import settings
+from app.db.models.order import IdempotencyKey, Order
+from app.schemas.order import OrderCreate
+from app.services.idempotency import request_hash
+from tests.test_rollups import order_payload
+
+pytestmark = pytest.mark.asyncio
+
+URL = "/api/v1/orders/"
+
+
+async def order_count(session) -> int:
+    return (await session.execute(select(func.count(Order.id)))).scalar()
+
+
+class TestIdempotencyKey:
+    """Test retries of POST /orders/ with an Idempotency-Key."""
+
+    async def test_retry_returns_same_order(self, client: AsyncClient, test_session, sample_product, sample_district):
+        """Test that a retried request replays the first order instead of creating another."""
+        payload = order_payload(sample_product, sample_district)
+        headers = {"Idempotency-Key": "retry-1"}
+
+        first = await client.post(URL, json=payload, headers=headers)
+        second = await client.post(URL, json=payload, headers=headers)
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert second.json() == first.json()
+        assert await order_count(test_session) == 1
+
+    async def test_key_reused_for_different_request(self, client: AsyncClient, sample_product, sample_district):
+        """Test that a key cannot be reused with a different body."""
+        headers = {"Idempotency-Key": "retry-2"}
+        first, changed = order_payload(sample_product, sample_district), order_payload(sample_product, sample_district, 3)
+        await client.post(URL, json=first, headers=headers)
+
+        response = await client.post(URL, json=changed, headers=headers)
+        assert response.status_code == 422
+
+    async def test_without_key(self, client: AsyncClient, test_session, sample_product, sample_district):
+        """Test that requests without a key each create an order."""
+        payload = order_payload(sample_product, sample_district)
+        for _ in range(2):
+            response = await client.post(URL, json=payload)
+            assert response.status_code == 200
+            assert "Idempotent-Replayed" not in response.headers
+        assert await order_count(test_session) == 2
+
+    async def test_failed_request_releases_key(
+        self, client: AsyncClient, test_session, sample_user, sample_product, sample_district
+    ):
+        """Test that a key is freed when its request fails, so a corrected retry goes through."""
+        headers = {"Idempotency-Key": "retry-3"}
+        valid = order_payload(sample_product, sample_district)
+        invalid = order_payload(sample_product, sample_district)
+        invalid["delivery"]["time_slot"] = "midnight"
+
+        assert (await client.post(URL, json=invalid, headers=headers)).status_code == 400
+        await test_session.refresh(sample_user)  # Expired by the release's rollback in the shared session
+        response = await client.post(URL, json=valid, headers=headers)
+        assert response.status_code == 200
+        assert "Idempotent-Replayed" not in response.headers
+        assert await order_count(test_session) == 1
+
+    async def test_request_in_progress(
+        self, client: AsyncClient, test_session, sample_user, sample_product, sample_district, monkeypatch
+    ):
+        """Test that a retry gives up with 409 while the first request holds the key."""
+        payload = order_payload(sample_product, sample_district)
+        test_session.add(IdempotencyKey(
+            user_id=sample_user.id, key="retry-4",
+            request_hash=request_hash(OrderCreate(**payload).model_dump(mode="json")),
+            expires_at=datetime.now(timezone.utc) + timedelta(hours=1),
+        ))
+        await test_session.commit()
+        monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0)
+
+        response = await client.post(URL, json=payload, headers={"Idempotency-Key": "retry-4"})
+        assert response.status_code == 409
+        assert response.headers["Retry-After"] == "1"
+        assert await order_count(test_session) == 0
+
+    async def test_stale_claim_is_taken_over(
+        self, client: AsyncClient, test_session, sample_user, sample_product, sample_district
+    ):
+        """Test that a retry takes over a key whose request died without releasing it."""
+        payload = order_payload(sample_product, sample_district)
+        now = datetime.now(timezone.utc)
+        test_session.add(IdempotencyKey(
+            user_id=sample_user.id, key="retry-5",
+            request_hash=request_hash(OrderCreate(**payload).model_dump(mode="json")),
+            claimed_at=now - timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS + 1),
+            expires_at=now + timedelta(hours=1),
+        ))
+        await test_session.commit()
+
+        response = await client.post(URL, json=payload, headers={"Idempotency-Key": "retry-5"})
+        assert response.status_code == 200
+        assert await order_count(test_session) == 1
+
+    async def test_cancelled_request_releases_key(
+        self, client: AsyncClient, test_session, sample_product, sample_district, monkeypatch
+    ):
+        """Test that a request cancelled mid-way frees its key."""
+        payload = order_payload(sample_product, sample_district)
+
+        async def cancelled(*args):
+            raise asyncio.CancelledError()
+
+        monkeypatch.setattr(orders, "_create_order", cancelled)
+        with pytest.raises(asyncio.CancelledError):
+            await client.post(URL, json=payload, headers={"Idempotency-Key": "retry-6"})
+
+        keys = (await test_session.execute(select(IdempotencyKey.key))).scalars().all()
+        assert keys == []
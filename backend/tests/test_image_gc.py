@@ -0,0 +1,142 @@
+"""Tests for orphaned image cleanup."""
+import os
+import time
+from datetime import datetime, timezone
+import pytest
+from httpx import AsyncClient
+from unittest.mock import MagicMock
+
+from app.services.storage import S3StorageBackend, StorageError
+
+pytestmark = pytest.mark.asyncio
+
+WIDTHS_AND_FORMATS = [(320, "webp"), (320, "jpg"), (1200, "webp"), (1200, "jpg")]
+
+
+async def store_image(storage, base_key: str, age_hours: float = 48) -> str:
+    """Write a fake variant set and backdate it; returns the canonical URL."""
+    for width, ext in WIDTHS_AND_FORMATS:
+        key = f"{base_key}/{width}w.{ext}"
+        await storage.put(key, b"x" * 10, "image/jpeg")
+        backdate(storage, key, age_hours)
+    return storage.url_for(f"{base_key}/1200w.jpg")
+
+
+def backdate(storage, key: str, age_hours: float) -> None:
+    """Set a local object's modification time into the past."""
+    timestamp = time.time() - age_hours * 3600
+    os.utime(os.path.join(storage.root, key), (timestamp, timestamp))
+
+
+class TestImageGC:
+    """Test the orphaned image collector."""
+
+    async def test_dry_run_reports_orphans_only(
+        self, client: AsyncClient, admin_headers, sample_product, local_storage
+    ):
+        """Test that referenced, fresh and unrelated objects are not reported."""
+        used_url = await store_image(local_storage, "products/used")
+        await store_image(local_storage, "products/orphan")
+        await store_image(local_storage, "products/fresh", age_hours=1)
+        await local_storage.put("exports/report.csv", b"data", "text/csv")
+        backdate(local_storage, "exports/report.csv", 48)
+        await local_storage.put("incoming/abandoned", b"data", "image/png")
+        backdate(local_storage, "incoming/abandoned", 48)
+
+        await client.put(
+            f"/api/v1/admin/products/{sample_product.id}",
+            json={"image_url": used_url},
+            headers=admin_headers
+        )
+
+        response = await client.post("/api/v1/admin/images/gc", headers=admin_headers)
+
+        assert response.status_code == 200
+        report = response.json()
+        assert report["dry_run"] is True
+        assert report["scanned"] == 13
+        assert report["orphaned"] == 5
+        assert report["deleted"] == 0
+        assert set(report["sample"]) == {
+            f"products/orphan/{width}w.{ext}" for width, ext in WIDTHS_AND_FORMATS
+        } | {"incoming/abandoned"}
+        assert await local_storage.exists("products/orphan/1200w.jpg")
+
+    async def test_deletes_orphans(
+        self, client: AsyncClient, admin_headers, sample_product, local_storage
+    ):
+        """Test that a real run removes orphans and keeps used images."""
+        used_url = await store_image(local_storage, "packages/used")
+        await store_image(local_storage, "packages/orphan")
+        await client.put(
+            f"/api/v1/admin/products/{sample_product.id}",
+            json={"image_url": used_url},
+            headers=admin_headers
+        )
+
+        response = await client.post("/api/v1/admin/images/gc?dry_run=false", headers=admin_headers)
+
+        assert response.json()["deleted"] == 4
+        assert not await local_storage.exists("packages/orphan/320w.webp")
+        assert await local_storage.exists("packages/used/320w.webp")
+
+    async def test_delete_product_releases_package_images(
+        self, client: AsyncClient, admin_headers, sample_product, local_storage
+    ):
+        """Test that deleting a product also removes its packages' images."""
+        product_url = await store_image(local_storage, "products/main")
+        package_url = await store_image(local_storage, "packages/pack")
+        await client.put(
+            f"/api/v1/admin/products/{sample_product.id}",
+            json={"image_url": product_url},
+            headers=admin_headers
+        )
+        response = await client.post(
+            f"/api/v1/admin/products/{sample_product.id}/packages",
+            json={"package_id": "1kg", "name": "1 кг", "weight": 1, "unit": "кг", "price": 100},
+            headers=admin_headers
+        )
+        await client.put(
+            f"/api/v1/admin/products/{sample_product.id}/packages/{response.json()['id']}",
+            json={"image_url": package_url},
+            headers=admin_headers
+        )
+
+        response = await client.delete(f"/api/v1/admin/products/{sample_product.id}", headers=admin_headers)
+
+        assert response.status_code == 200
+        assert not await local_storage.exists("products/main/1200w.jpg")
+        assert not await local_storage.exists("packages/pack/1200w.jpg")
+
+
+class TestS3Batching:
+    """Test S3 listing and delete batching."""
+
+    async def test_lists_every_page(self):
+        """Test that continuation tokens are followed page by page."""
+        backend = S3StorageBackend(bucket_name="bucket", public_url="https://cdn.test")
+        backend.client = MagicMock()
+        modified = datetime.now(timezone.utc)
+        backend.client.list_objects_v2.side_effect = [
+            {"Contents": [{"Key": "products/a", "Size": 1, "LastModified": modified}],
+             "IsTruncated": True, "NextContinuationToken": "next"},
+            {"Contents": [{"Key": "products/b", "Size": 2, "LastModified": modified}], "IsTruncated": False},
+        ]
+        try:
+            pages = [page async for page in backend.list_pages("products/")]
+        finally:
+            backend.shutdown()
+
+        assert [[obj.key for obj in page] for page in pages] == [["products/a"], ["products/b"]]
+        assert backend.client.list_objects_v2.call_args.kwargs["ContinuationToken"] == "next"
+
+    async def test_delete_failures_are_raised(self):
+        """Test that per-key errors from DeleteObjects are not swallowed."""
+        backend = S3StorageBackend(bucket_name="bucket", public_url="https://cdn.test")
+        backend.client = MagicMock()
+        backend.client.delete_objects.return_value = {"Errors": [{"Key": "products/a", "Code": "AccessDenied"}]}
+        try:
+            with pytest.raises(StorageError):
+                await backend.delete_many(["products/a", "products/b"])
+        finally:
+            backend.shutdown()
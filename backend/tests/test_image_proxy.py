@@ -0,0 +1,156 @@
+"""Tests for the on-the-fly image resizing proxy."""
+import asyncio
+import io
+import pytest
+from httpx import AsyncClient
+from PIL import Image
+
+from app.api.endpoints import images as images_endpoint
+from app.services.image_cache import DiskLRUCache
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_jpeg(width: int = 1200, height: int = 800) -> bytes:
+    """Create an in-memory JPEG."""
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color=(10, 120, 200)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def image_cache(tmp_path, monkeypatch) -> DiskLRUCache:
+    """Use a fresh cache directory for the proxy."""
+    cache = DiskLRUCache(str(tmp_path / "cache"), max_bytes=10 * 1024 * 1024)
+    monkeypatch.setattr(images_endpoint, "image_cache", cache)
+    return cache
+
+
+class TestDiskLRUCache:
+    """Test the size-bounded disk cache."""
+
+    async def test_evicts_least_recently_used(self, tmp_path):
+        """Test that entries beyond the size budget are dropped oldest first."""
+        cache = DiskLRUCache(str(tmp_path), max_bytes=250)
+        await cache.put("a", b"a" * 100, "jpg")
+        await cache.put("b", b"b" * 100, "jpg")
+        await cache.get("a")
+        await cache.put("c", b"c" * 100, "jpg")
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") is not None
+        assert await cache.get("c") is not None
+        assert cache.total_bytes == 200
+        assert len(list(tmp_path.iterdir())) == 2
+
+    async def test_rebuilds_index_from_disk(self, tmp_path):
+        """Test that a new instance picks up files written by a previous one."""
+        first = DiskLRUCache(str(tmp_path), max_bytes=1000)
+        entry = await first.put("key", b"content", "webp")
+
+        second = DiskLRUCache(str(tmp_path), max_bytes=1000)
+        restored = await second.get("key")
+        assert restored is not None
+        assert restored.etag == entry.etag
+        assert restored.size == len(b"content")
+        assert second.total_bytes == len(b"content")
+
+    async def test_coalesces_concurrent_misses(self, tmp_path):
+        """Test that simultaneous misses for one key render it once."""
+        cache = DiskLRUCache(str(tmp_path), max_bytes=1000)
+        calls = 0
+
+        async def create():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return b"rendered", "jpg"
+
+        results = await asyncio.gather(*(cache.get_or_create("key", create) for _ in range(10)))
+
+        assert calls == 1
+        assert {content for _, content in results} == {b"rendered"}
+        assert len({entry.etag for entry, _ in results}) == 1
+
+    async def test_failed_render_is_not_cached(self, tmp_path):
+        """Test that errors reach every waiter and the next call retries."""
+        cache = DiskLRUCache(str(tmp_path), max_bytes=1000)
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *(cache.get_or_create("key", fail) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(result, ValueError) for result in results)
+
+        async def succeed():
+            return b"ok", "jpg"
+
+        _, content = await cache.get_or_create("key", succeed)
+        assert content == b"ok"
+
+
+class TestImageProxy:
+    """Test GET /img/{w}x{h}/{key}."""
+
+    async def test_resizes_to_requested_box(self, client: AsyncClient, local_storage, image_cache):
+        """Test that the original is scaled to fit and served as WebP when accepted."""
+        await local_storage.put("products/abc/1200w.jpg", make_jpeg(), "image/jpeg")
+
+        response = await client.get(
+            "/img/240x240/products/abc/1200w.jpg", headers={"Accept": "image/webp,image/*"}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/webp"
+        assert response.headers["vary"] == "Accept"
+        assert "immutable" in response.headers["cache-control"]
+        assert Image.open(io.BytesIO(response.content)).size == (240, 160)
+
+    async def test_falls_back_to_jpeg(self, client: AsyncClient, local_storage, image_cache):
+        """Test that clients without WebP support get JPEG."""
+        await local_storage.put("products/abc/1200w.jpg", make_jpeg(), "image/jpeg")
+
+        response = await client.get("/img/80x80/products/abc/1200w.jpg", headers={"Accept": "image/*"})
+
+        assert response.headers["content-type"] == "image/jpeg"
+        assert Image.open(io.BytesIO(response.content)).size == (80, 53)
+
+    async def test_cover_crops_to_box(self, client: AsyncClient, local_storage, image_cache):
+        """Test that fit=cover fills the requested box exactly."""
+        await local_storage.put("products/abc/1200w.jpg", make_jpeg(), "image/jpeg")
+
+        response = await client.get("/img/160x160/products/abc/1200w.jpg?fit=cover")
+
+        assert Image.open(io.BytesIO(response.content)).size == (160, 160)
+
+    async def test_serves_cached_copy_with_etag(self, client: AsyncClient, local_storage, image_cache):
+        """Test that repeat requests come from the cache and honour If-None-Match."""
+        await local_storage.put("products/abc/1200w.jpg", make_jpeg(), "image/jpeg")
+        first = await client.get("/img/240x240/products/abc/1200w.jpg")
+
+        # The original is gone, so only the cache can answer now
+        await local_storage.delete_many(["products/abc/1200w.jpg"])
+        second = await client.get("/img/240x240/products/abc/1200w.jpg")
+        assert second.status_code == 200
+        assert second.content == first.content
+        assert second.headers["etag"] == first.headers["etag"]
+
+        response = await client.get(
+            "/img/240x240/products/abc/1200w.jpg", headers={"If-None-Match": first.headers["etag"]}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+
+    async def test_rejects_unknown_and_private_keys(self, client: AsyncClient, local_storage, image_cache):
+        """Test missing images, staged uploads and boxes outside the allowlist."""
+        await local_storage.put("incoming/abc", make_jpeg(), "image/jpeg")
+
+        assert (await client.get("/img/80x80/products/missing.jpg")).status_code == 404
+        assert (await client.get("/img/80x80/incoming/abc")).status_code == 404
+        assert (await client.get("/img/80x80/products/../incoming/abc")).status_code == 404
+        assert (await client.get("/img/5000x100/products/abc/1200w.jpg")).status_code == 400
+        assert (await client.get("/img/100x100/products/abc/1200w.jpg")).status_code == 400
+        assert (await client.get("/img/large/products/abc/1200w.jpg")).status_code == 404
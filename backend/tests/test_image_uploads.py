@@ -0,0 +1,577 @@
+"""Tests for the image upload pipeline."""
+import asyncio
+import io
+import os
+import time
+import pytest
+from httpx import AsyncClient
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+from PIL import Image
+
+from app.core.config import settings
+from app.core.metrics import OUTBOUND_LATENCY
+from app.services.images import (
+    ImageProcessingPool, process_image, process_image_variants, spool_upload, upload_source
+)
+from app.services.storage import LocalStorageBackend, S3StorageBackend, StorageError
+from app.services.tasks import task_queue
+
+
+def make_image_bytes(width: int = 1600, height: int = 900, fmt: str = "PNG", mode: str = "RGBA") -> bytes:
+    """Create an in-memory test image."""
+    buffer = io.BytesIO()
+    Image.new(mode, (width, height), color=(200, 80, 40, 255)[:len(mode)]).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class TestProcessImage:
+    """Test Pillow processing done in worker processes."""
+
+    def test_resizes_and_converts_to_jpeg(self):
+        """Test that large RGBA images are downscaled to JPEG."""
+        result = process_image(make_image_bytes(), 1200, 1200)
+
+        image = Image.open(io.BytesIO(result))
+        assert image.format == "JPEG"
+        assert image.mode == "RGB"
+        assert image.size == (1200, 675)
+
+    def test_keeps_small_images(self):
+        """Test that small images are not upscaled."""
+        result = process_image(make_image_bytes(300, 200, fmt="JPEG", mode="RGB"), 1200, 1200)
+        assert Image.open(io.BytesIO(result)).size == (300, 200)
+
+    def test_renders_every_width_and_format(self):
+        """Test that variants are produced per width and format."""
+        variants = process_image_variants(make_image_bytes(), [320, 640, 1200], 1200, ["webp", "jpeg"])
+
+        assert [(v["width"], v["format"]) for v in variants] == [
+            (1200, "webp"), (1200, "jpeg"),
+            (640, "webp"), (640, "jpeg"),
+            (320, "webp"), (320, "jpeg"),
+        ]
+        for variant in variants:
+            image = Image.open(io.BytesIO(variant["content"]))
+            assert image.format == variant["format"].upper()
+            assert image.size == (variant["pixel_width"], variant["height"])
+        assert variants[-1]["pixel_width"] == 320
+
+
+def age_stored_images(backend: LocalStorageBackend, hours: int = 48) -> None:
+    """Backdate every stored file past the image GC grace period."""
+    timestamp = time.time() - hours * 3600
+    for dirpath, _, filenames in os.walk(backend.root):
+        for name in filenames:
+            os.utime(os.path.join(dirpath, name), (timestamp, timestamp))
+
+
+@pytest.mark.asyncio
+class TestSpoolUpload:
+    """Test bounded upload buffering."""
+
+    def make_upload(self, content: bytes, size=None):
+        from fastapi import UploadFile
+        return UploadFile(io.BytesIO(content), size=size, filename="photo.jpg")
+
+    async def test_copies_small_upload(self):
+        """Test that uploads under the limit are buffered in full."""
+        with await spool_upload(self.make_upload(b"x" * 1000), max_bytes=1000) as buffer:
+            assert buffer.read() == b"x" * 1000
+            assert upload_source(buffer) == b"x" * 1000
+
+    async def test_large_upload_is_decoded_from_disk(self, monkeypatch):
+        """Test that uploads over the memory limit reach the worker as a file path."""
+        monkeypatch.setattr(settings, "UPLOAD_SPOOL_MAX_MEMORY", 1000)
+        content = make_image_bytes()
+        with await spool_upload(self.make_upload(content), max_bytes=len(content)) as buffer:
+            source = upload_source(buffer)
+            assert isinstance(source, str) and os.path.getsize(source) == len(content)
+            variants = process_image_variants(source, [320], 1200, ["jpeg"])
+        assert variants[0]["pixel_width"] == 320
+        assert not os.path.exists(source)
+
+    async def test_rejects_declared_oversize_without_reading(self):
+        """Test that a known size over the limit is rejected up front."""
+        upload = self.make_upload(b"x" * 10, size=5000)
+        with pytest.raises(HTTPException) as exc_info:
+            await spool_upload(upload, max_bytes=1000)
+        assert exc_info.value.status_code == 413
+        assert upload.file.tell() == 0
+
+    async def test_stops_reading_once_limit_exceeded(self, monkeypatch):
+        """Test that streaming stops at the first chunk over the limit."""
+        monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 100)
+        upload = self.make_upload(b"x" * 10_000)
+        with pytest.raises(HTTPException) as exc_info:
+            await spool_upload(upload, max_bytes=250)
+        assert exc_info.value.status_code == 413
+        assert upload.file.tell() == 300
+
+
+@pytest.mark.asyncio
+class TestImageProcessingPool:
+    """Test the bounded process pool."""
+
+    async def test_runs_in_worker_process(self):
+        """Test that work is executed and returned from the pool."""
+        pool = ImageProcessingPool(workers=1, max_pending=2, queue_timeout=5)
+        try:
+            result = await pool.run(process_image, make_image_bytes(100, 100), 50, 50)
+            assert Image.open(io.BytesIO(result)).size == (50, 50)
+        finally:
+            pool.shutdown()
+
+    async def test_rejects_when_saturated(self):
+        """Test that callers get 503 once the queue is full."""
+        pool = ImageProcessingPool(workers=1, max_pending=1, queue_timeout=0.1)
+        try:
+            busy = asyncio.create_task(pool.run(time.sleep, 1))
+            await asyncio.sleep(0.05)
+
+            with pytest.raises(HTTPException) as exc_info:
+                await pool.run(time.sleep, 0)
+            assert exc_info.value.status_code == 503
+            assert "Retry-After" in exc_info.value.headers
+
+            await busy
+        finally:
+            pool.shutdown()
+
+
+class TestStorageBackends:
+    """Test the storage backends used for uploads."""
+
+    @pytest.mark.asyncio
+    async def test_local_backend_round_trip(self, tmp_path):
+        """Test that the local backend stores, finds and deletes files."""
+        backend = LocalStorageBackend(str(tmp_path), "/static/uploads")
+        try:
+            await backend.put("products/abc/320w.webp", b"data", "image/webp")
+            assert (tmp_path / "products/abc/320w.webp").read_bytes() == b"data"
+            assert await backend.exists("products/abc/320w.webp")
+            assert await backend.get("products/abc/320w.webp") == b"data"
+            chunks = await backend.open_stream("products/abc/320w.webp", chunk_size=3)
+            assert [chunk async for chunk in chunks] == [b"dat", b"a"]
+
+            source = tmp_path / "report.csv"
+            source.write_bytes(b"a,b\n")
+            await backend.put_file("exports/report.csv", str(source), "text/csv")
+            assert await backend.get("exports/report.csv") == b"a,b\n"
+            assert backend.url_for("products/abc/320w.webp") == "/static/uploads/products/abc/320w.webp"
+            assert backend.key_for_url("/static/uploads/products/abc/320w.webp") == "products/abc/320w.webp"
+
+            await backend.delete_many(["products/abc/320w.webp", "products/missing.jpg"])
+            assert not await backend.exists("products/abc/320w.webp")
+            with pytest.raises(StorageError):
+                await backend.open_stream("products/abc/320w.webp")
+        finally:
+            backend.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_local_backend_concurrent_writes_to_one_key(self, tmp_path):
+        """Test that parallel writes of the same key do not share a temp file."""
+        backend = LocalStorageBackend(str(tmp_path), "/static/uploads")
+        bodies = [bytes([i]) * 200_000 for i in range(8)]
+        try:
+            await asyncio.gather(*(backend.put("products/abc/320w.webp", body, "image/webp") for body in bodies))
+            assert (tmp_path / "products/abc/320w.webp").read_bytes() in bodies
+            assert os.listdir(tmp_path / "products/abc") == ["320w.webp"]
+        finally:
+            backend.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_local_backend_rejects_escaping_keys(self, tmp_path):
+        """Test that keys cannot point outside the storage directory."""
+        backend = LocalStorageBackend(str(tmp_path / "storage"), "/static/uploads")
+        with pytest.raises(StorageError):
+            await backend.put("../outside.jpg", b"data", "image/jpeg")
+
+    @pytest.mark.asyncio
+    async def test_s3_backend_client_is_lazy(self):
+        """Test that boto3 is only touched on first use."""
+        backend = S3StorageBackend(bucket_name="bucket", public_url="https://cdn.test")
+        assert backend._client is None
+
+        mock_client = MagicMock()
+        mock_client.head_object.side_effect = ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        backend.client = mock_client
+        heads = OUTBOUND_LATENCY.count(service="s3", operation="head_object", outcome="error")
+        try:
+            assert not await backend.exists("products/a.jpg")
+            assert OUTBOUND_LATENCY.count(service="s3", operation="head_object", outcome="error") == heads + 1
+            await backend.put("products/a.jpg", b"data", "image/jpeg", "public, max-age=60")
+            await backend.put_file("exports/a.csv", "/tmp/a.csv", "text/csv")
+            await backend.delete_many(f"products/{i}.jpg" for i in range(1500))
+        finally:
+            backend.shutdown()
+
+        put_kwargs = mock_client.put_object.call_args.kwargs
+        assert put_kwargs["Bucket"] == "bucket"
+        assert put_kwargs["CacheControl"] == "public, max-age=60"
+        upload_kwargs = mock_client.upload_file.call_args.kwargs
+        assert upload_kwargs["Filename"] == "/tmp/a.csv"
+        assert upload_kwargs["ExtraArgs"]["ContentType"] == "text/csv"
+        assert mock_client.delete_objects.call_count == 2
+
+    def test_s3_presigned_upload_enforces_size(self):
+        """Test that S3 direct uploads use a POST policy with a size range."""
+        backend = S3StorageBackend(bucket_name="bucket", public_url="https://cdn.test")
+        backend.client = MagicMock()
+        backend.client.generate_presigned_post.return_value = {"url": "https://s3.test/bucket", "fields": {"key": "k"}}
+
+        target = backend.presigned_upload("incoming/abc", "image/png", 1000)
+
+        assert target["method"] == "POST"
+        assert target["fields"] == {"key": "k"}
+        conditions = backend.client.generate_presigned_post.call_args.kwargs["Conditions"]
+        assert ["content-length-range", 1, 1000] in conditions
+
+
+@pytest.mark.asyncio
+class TestUploadEndpoint:
+    """Test the admin upload endpoint."""
+
+    async def test_upload_image(self, client: AsyncClient, admin_headers, local_storage):
+        """Test uploading a valid image stores WebP/JPEG variants."""
+        response = await client.post(
+            "/api/v1/admin/upload/image",
+            files={"image": ("photo.png", make_image_bytes(), "image/png")},
+            headers=admin_headers
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["url"].startswith("https://cdn.test/products/")
+        assert data["url"].endswith("/1200w.jpg")
+        assert {(v["width"], v["format"]) for v in data["variants"]} == {
+            (w, f) for w in (320, 640, 1200) for f in ("webp", "jpeg")
+        }
+
+        base_dir = os.path.join(local_storage.root, local_storage.key_for_url(data["url"]).rsplit("/", 1)[0])
+        assert sorted(os.listdir(base_dir)) == [
+            "1200w.jpg", "1200w.webp", "320w.jpg", "320w.webp", "640w.jpg", "640w.webp"
+        ]
+        assert Image.open(os.path.join(base_dir, "320w.webp")).format == "WEBP"
+        assert Image.open(os.path.join(base_dir, "1200w.jpg")).width == 1200
+
+    async def test_upload_package_image_sets_variants(
+        self, client: AsyncClient, admin_headers, sample_product, local_storage
+    ):
+        """Test that package uploads persist and expose variants."""
+        response = await client.post(
+            f"/api/v1/admin/products/{sample_product.id}/packages",
+            json={"package_id": "1kg", "name": "1 кг", "weight": 1, "unit": "кг", "price": 100},
+            headers=admin_headers
+        )
+        package_id = response.json()["id"]
+
+        response = await client.post(
+            f"/api/v1/admin/products/{sample_product.id}/packages/{package_id}/image",
+            files={"image": ("photo.jpg", make_image_bytes(800, 800, "JPEG", "RGB"), "image/jpeg")},
+            headers=admin_headers
+        )
+        assert response.status_code == 200
+
+        response = await client.get(f"/api/v1/packages/{package_id}")
+        package = response.json()
+        assert package["image_url"].endswith("/1200w.jpg")
+        # The source is 800px wide, so the 1200 variants keep the original size
+        assert {v["width"] for v in package["image_variants"]} == {320, 640, 800}
+
+    async def test_update_package_image_releases_old_one(
+        self, client: AsyncClient, admin_headers, sample_product, local_storage
+    ):
+        """Test that replacing a package's image keeps the sent variants and deletes the old image once unused."""
+        response = await client.post(
+            f"/api/v1/admin/products/{sample_product.id}/packages",
+            json={"package_id": "1kg", "name": "1 кг", "weight": 1, "unit": "кг", "price": 100},
+            headers=admin_headers
+        )
+        package_url = f"/api/v1/admin/products/{sample_product.id}/packages/{response.json()['id']}"
+        response = await client.post(
+            f"{package_url}/image",
+            files={"image": ("photo.png", make_image_bytes(400, 300), "image/png")},
+            headers=admin_headers
+        )
+        image_key = local_storage.key_for_url(response.json()["url"])
+
+        age_stored_images(local_storage)
+        variants = [{"url": "https://cdn.test/packages/other/320w.webp", "width": 320, "height": 240, "format": "webp"}]
+        response = await client.put(
+            package_url,
+            json={"image_url": "https://cdn.test/packages/other/1200w.jpg", "image_variants": variants},
+            headers=admin_headers
+        )
+        assert response.status_code == 200
+        assert response.json()["image_variants"] == variants
+        assert not await local_storage.exists(image_key)
+
+    async def test_duplicate_upload_reuses_stored_objects(
+        self, client: AsyncClient, admin_headers, local_storage
+    ):
+        """Test that identical images map to one key and are stored once."""
+        content = make_image_bytes(400, 300)
+        first = await client.post(
+            "/api/v1/admin/upload/image",
+            files={"image": ("a.png", content, "image/png")},
+            headers=admin_headers
+        )
+
+        with patch.object(local_storage, "put", wraps=local_storage.put) as put:
+            second = await client.post(
+                "/api/v1/admin/upload/image",
+                files={"image": ("b.png", content, "image/png")},
+                headers=admin_headers
+            )
+
+        assert first.json()["url"] == second.json()["url"]
+        assert second.json()["variants"] == first.json()["variants"]
+        put.assert_not_called()
+
+    async def test_shared_image_kept_until_last_reference(
+        self, client: AsyncClient, admin_headers, sample_product, sample_category, local_storage
+    ):
+        """Test that deleting one user of an image leaves it for the others."""
+        response = await client.post(
+            "/api/v1/admin/upload/image",
+            files={"image": ("photo.png", make_image_bytes(400, 300), "image/png")},
+            headers=admin_headers
+        )
+        image_url = response.json()["url"]
+        image_key = local_storage.key_for_url(image_url)
+
+        response = await client.post(
+            "/api/v1/admin/products",
+            json={
+                "id": "salmon-copy",
+                "name": "Salmon copy",
+                "category_id": sample_category.id,
+                "price_per_kg": 100,
+                "image_url": image_url,
+            },
+            headers=admin_headers
+        )
+        assert response.status_code == 200
+        await client.put(
+            f"/api/v1/admin/products/{sample_product.id}",
+            json={"image_url": image_url},
+            headers=admin_headers
+        )
+
+        await client.delete("/api/v1/admin/products/salmon-copy", headers=admin_headers)
+        assert await local_storage.exists(image_key)
+
+        age_stored_images(local_storage)
+        await client.put(
+            f"/api/v1/admin/products/{sample_product.id}",
+            json={"image_url": "https://cdn.test/products/other/1200w.jpg"},
+            headers=admin_headers
+        )
+        assert not await local_storage.exists(image_key)
+        assert not os.listdir(os.path.dirname(os.path.join(local_storage.root, image_key)))
+
+    async def test_reused_upload_survives_release(
+        self, client: AsyncClient, admin_headers, sample_product, local_storage
+    ):
+        """Test that an old image handed out again by an upload is not deleted before it is saved."""
+        content = make_image_bytes(400, 300)
+        upload = lambda: client.post(
+            "/api/v1/admin/upload/image",
+            files={"image": ("photo.png", content, "image/png")},
+            headers=admin_headers
+        )
+        image_url = (await upload()).json()["url"]
+        await client.put(
+            f"/api/v1/admin/products/{sample_product.id}", json={"image_url": image_url}, headers=admin_headers
+        )
+        age_stored_images(local_storage)
+
+        # The same file is uploaded for another product, then the first one drops it
+        assert (await upload()).json()["url"] == image_url
+        await client.put(
+            f"/api/v1/admin/products/{sample_product.id}",
+            json={"image_url": "https://cdn.test/products/other/1200w.jpg"},
+            headers=admin_headers
+        )
+        assert await local_storage.exists(local_storage.key_for_url(image_url))
+
+    async def test_update_product_image_clears_stale_variants(
+        self, client: AsyncClient, admin_headers, sample_product
+    ):
+        """Test that replacing image_url without variants drops the old ones."""
+        variants = [{"url": "https://cdn.test/products/a/320w.webp", "width": 320, "height": 180, "format": "webp"}]
+        response = await client.put(
+            f"/api/v1/admin/products/{sample_product.id}",
+            json={"image_url": "https://cdn.test/products/a/1200w.jpg", "image_variants": variants},
+            headers=admin_headers
+        )
+        assert response.json()["image_variants"] == variants
+
+        response = await client.put(
+            f"/api/v1/admin/products/{sample_product.id}",
+            json={"image_url": "https://elsewhere.test/photo.jpg"},
+            headers=admin_headers
+        )
+        assert response.json()["image_variants"] == []
+
+    async def test_upload_rejects_oversized_file(self, client: AsyncClient, admin_headers):
+        """Test that files over the size limit are refused with 413."""
+        response = await client.post(
+            "/api/v1/admin/upload/image",
+            files={"image": ("huge.jpg", b"\xff" * (5 * 1024 * 1024 + 1), "image/jpeg")},
+            headers=admin_headers
+        )
+        assert response.status_code == 413
+
+    async def test_upload_rejects_decompression_bomb(self, client: AsyncClient, admin_headers):
+        """Test that images with too many pixels are refused before decoding."""
+        import struct
+        import zlib
+
+        def chunk(kind: bytes, data: bytes) -> bytes:
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+        # Tiny file whose header claims 30000x30000 pixels
+        bomb = (
+            b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", 30000, 30000, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(b"\x00" * 100))
+            + chunk(b"IEND", b"")
+        )
+        response = await client.post(
+            "/api/v1/admin/upload/image",
+            files={"image": ("bomb.png", bomb, "image/png")},
+            headers=admin_headers
+        )
+        assert response.status_code == 400
+        assert "too large" in response.json()["detail"]
+
+    async def test_upload_rejects_corrupt_image(self, client: AsyncClient, admin_headers):
+        """Test that undecodable files are a client error."""
+        response = await client.post(
+            "/api/v1/admin/upload/image",
+            files={"image": ("photo.jpg", b"not really a jpeg", "image/jpeg")},
+            headers=admin_headers
+        )
+        assert response.status_code == 400
+
+    async def test_upload_rejects_non_image(self, client: AsyncClient, admin_headers):
+        """Test that validation errors keep their status code."""
+        response = await client.post(
+            "/api/v1/admin/upload/image",
+            files={"image": ("notes.txt", b"hello", "text/plain")},
+            headers=admin_headers
+        )
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+class TestDirectUpload:
+    """Test presigned uploads processed in the background."""
+
+    async def upload_original(self, client: AsyncClient, admin_headers, content: bytes) -> str:
+        response = await client.post(
+            "/api/v1/admin/upload/presign",
+            json={"content_type": "image/png"},
+            headers=admin_headers
+        )
+        assert response.status_code == 200
+        target = response.json()
+        assert target["method"] == "PUT"
+
+        response = await client.put(target["url"], content=content, headers=target["headers"])
+        assert response.status_code == 204
+        return target["upload_id"]
+
+    async def test_complete_attaches_image_to_product(
+        self, client: AsyncClient, admin_headers, sample_product, local_storage, test_session
+    ):
+        """Test that a finished direct upload replaces the product image."""
+        upload_id = await self.upload_original(client, admin_headers, make_image_bytes(800, 600))
+        assert await local_storage.exists(f"incoming/{upload_id}")
+
+        response = await client.post(
+            "/api/v1/admin/upload/complete",
+            json={"upload_id": upload_id, "product_id": sample_product.id},
+            headers=admin_headers
+        )
+        assert response.status_code == 202
+        assert response.json()["status"] in ("queued", "processing")
+
+        await task_queue.join()
+
+        response = await client.get(f"/api/v1/admin/upload/{upload_id}", headers=admin_headers)
+        job = response.json()
+        assert job["status"] == "done"
+        assert job["url"].endswith("/1200w.jpg")
+        assert not await local_storage.exists(f"incoming/{upload_id}")
+        assert await local_storage.exists(local_storage.key_for_url(job["url"]))
+
+        # The job committed through its own session
+        await test_session.refresh(sample_product)
+        response = await client.get(f"/api/v1/admin/products/{sample_product.id}", headers=admin_headers)
+        product = response.json()
+        assert product["image_url"] == job["url"]
+        assert {v["width"] for v in product["image_variants"]} == {320, 640, 800}
+
+    async def test_invalid_image_fails_job(
+        self, client: AsyncClient, admin_headers, sample_product, local_storage
+    ):
+        """Test that a broken upload is reported and leaves the product alone."""
+        upload_id = await self.upload_original(client, admin_headers, b"not an image")
+
+        await client.post(
+            "/api/v1/admin/upload/complete",
+            json={"upload_id": upload_id, "product_id": sample_product.id},
+            headers=admin_headers
+        )
+        await task_queue.join()
+
+        response = await client.get(f"/api/v1/admin/upload/{upload_id}", headers=admin_headers)
+        assert response.json()["status"] == "failed"
+        assert response.json()["error"] == "File is not a valid image"
+
+        response = await client.get(f"/api/v1/admin/products/{sample_product.id}", headers=admin_headers)
+        assert response.json()["image_url"] is None
+
+    async def test_rejects_tampered_signature(self, client: AsyncClient, admin_headers, local_storage):
+        """Test that the local upload target checks its signature."""
+        response = await client.post(
+            "/api/v1/admin/upload/presign",
+            json={"content_type": "image/png"},
+            headers=admin_headers
+        )
+        target = response.json()
+
+        response = await client.put(
+            target["url"].replace("max_bytes=", "max_bytes=9"),
+            content=b"data",
+            headers=target["headers"]
+        )
+        assert response.status_code == 403
+
+    async def test_complete_validates_target(self, client: AsyncClient, admin_headers, local_storage):
+        """Test that completion refuses unknown products and dangling package ids."""
+        upload_id = "0" * 32
+        response = await client.post(
+            "/api/v1/admin/upload/complete",
+            json={"upload_id": upload_id, "package_id": 1},
+            headers=admin_headers
+        )
+        assert response.status_code == 400
+
+        response = await client.post(
+            "/api/v1/admin/upload/complete",
+            json={"upload_id": upload_id, "product_id": "missing"},
+            headers=admin_headers
+        )
+        assert response.status_code == 404
+
+        response = await client.post(
+            "/api/v1/admin/upload/complete",
+            json={"upload_id": "../etc/passwd"},
+            headers=admin_headers
+        )
+        assert response.status_code == 422
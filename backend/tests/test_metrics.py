@@ -0,0 +1,95 @@
+"""Tests for the Prometheus metrics endpoint."""
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.metrics import HTTP_QUERIES, HTTP_REQUESTS, OUTBOUND_LATENCY, Histogram, Metric, track_outbound
+
+
+class TestMetrics:
+    """Test request, query and outbound call metrics."""
+
+    @pytest.mark.asyncio
+    async def test_requests_are_labelled_by_route_template(self, client: AsyncClient, sample_product):
+        """Test counts per route template rather than per URL."""
+        route = "/api/v1/products/{product_id}"
+        before = HTTP_REQUESTS.value(method="GET", route=route, status="200")
+        missing = HTTP_REQUESTS.value(method="GET", route=route, status="404")
+
+        await client.get(f"/api/v1/products/{sample_product.id}")
+        await client.get("/api/v1/products/no-such-product")
+
+        assert HTTP_REQUESTS.value(method="GET", route=route, status="200") == before + 1
+        assert HTTP_REQUESTS.value(method="GET", route=route, status="404") == missing + 1
+
+    @pytest.mark.asyncio
+    async def test_queries_are_counted_per_request(self, client: AsyncClient, sample_product):
+        """Test that the statements of a request land in its route's histogram."""
+        route = "/api/v1/products/{product_id}"
+        count = HTTP_QUERIES.count(method="GET", route=route)
+        total = HTTP_QUERIES.sum(method="GET", route=route)
+
+        await client.get(f"/api/v1/products/{sample_product.id}")
+
+        assert HTTP_QUERIES.count(method="GET", route=route) == count + 1
+        assert HTTP_QUERIES.sum(method="GET", route=route) > total
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self, client: AsyncClient, monkeypatch):
+        """Test the text exposition."""
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-token")
+        await client.get("/health")
+        response = await client.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert "# TYPE http_request_duration_seconds histogram" in body
+        assert 'http_requests_total{method="GET",route="/health",status="200"}' in body
+        assert 'background_queue_depth{queue="background"} 0' in body
+        assert "http_requests_in_flight 1" in body
+
+    @pytest.mark.asyncio
+    async def test_metrics_require_token(self, client: AsyncClient, monkeypatch):
+        """Test that /metrics is hidden without the configured bearer token."""
+        assert (await client.get("/metrics")).status_code == 404
+
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-token")
+        assert (await client.get("/metrics")).status_code == 404
+        response = await client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+        assert response.status_code == 404
+
+    def test_metric_requires_samples(self):
+        """Test that a metric type must implement samples."""
+        with pytest.raises(TypeError):
+            Metric("incomplete_metric", "No samples")
+
+    @pytest.mark.asyncio
+    async def test_outbound_outcome(self):
+        """Test that failed outbound calls are recorded as errors."""
+        errors = OUTBOUND_LATENCY.count(service="test", operation="call", outcome="error")
+        with pytest.raises(RuntimeError):
+            async with track_outbound("test", "call"):
+                raise RuntimeError("boom")
+        async with track_outbound("test", "call"):
+            pass
+
+        assert OUTBOUND_LATENCY.count(service="test", operation="call", outcome="error") == errors + 1
+        assert OUTBOUND_LATENCY.count(service="test", operation="call", outcome="ok") >= 1
+
+
+def test_histogram_buckets_are_cumulative():
+    """Test bucket, sum and count lines."""
+    histogram = Histogram("example_seconds", "Example", ("route",), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value, route="/x")
+
+    assert histogram.render() == [
+        "# HELP example_seconds Example",
+        "# TYPE example_seconds histogram",
+        'example_seconds_bucket{route="/x",le="0.1"} 1',
+        'example_seconds_bucket{route="/x",le="1"} 2',
+        'example_seconds_bucket{route="/x",le="+Inf"} 3',
+        'example_seconds_sum{route="/x"} 5.55',
+        'example_seconds_count{route="/x"} 3',
+    ]
@@ -0,0 +1,126 @@
+"""Tests for archiving finished orders to storage and reading them back."""
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.db.models.order import ArchivedOrder, DeliveryTimeSlot, Order, OrderItem, OrderStatus
+from app.services.order_archive import ARCHIVE_PREFIX, archive_orders
+from app.services.rollups import rebuild_rollups, rollup_day
+from tests.test_rollups import order_payload, rollup_rows
+
+pytestmark = pytest.mark.asyncio
+
+OLD = datetime.now(timezone.utc) - timedelta(days=400)
+
+
+@pytest_asyncio.fixture
+async def old_orders(test_session, sample_user, sample_district, sample_product):
+    """A delivered and a pending order from over a year ago, each with one item."""
+    orders = {}
+    for order_id, status in ((7001, OrderStatus.DELIVERED), (7002, OrderStatus.PENDING)):
+        order = Order(
+            order_id=order_id, user_id=sample_user.id, district_id=sample_district.id,
+            status=status, total_amount=90.0, discount_amount=10.0,
+            delivery_time_slot=DeliveryTimeSlot.MORNING, delivery_date=OLD,
+            contact_name="Old Customer", created_at=OLD,
+        )
+        order.items.append(OrderItem(
+            product_id=sample_product.id, product_name=sample_product.name, package_id="1kg",
+            weight=1.0, unit="кг", quantity=4, price_per_unit=25.0, total_price=100.0,
+        ))
+        test_session.add(order)
+        orders[status] = order
+    await test_session.commit()
+    return orders
+
+
+class TestArchiver:
+    """Test moving orders out of the hot tables."""
+
+    async def test_archives_old_finished_orders(self, test_session, old_orders, sample_order, local_storage):
+        """Test that only old delivered or cancelled orders move, with their items."""
+        delivered = old_orders[OrderStatus.DELIVERED]
+
+        assert await archive_orders(test_session, older_than_days=365) == 1
+
+        remaining = (await test_session.execute(select(Order.order_id))).scalars().all()
+        assert sorted(remaining) == sorted([7002, sample_order.order_id])
+        items = (await test_session.execute(
+            select(OrderItem).where(OrderItem.order_id == delivered.id)
+        )).scalars().all()
+        assert items == []
+
+        archived = (await test_session.execute(select(ArchivedOrder))).scalar_one()
+        assert (archived.id, archived.order_id, archived.item_quantity) == (delivered.id, 7001, 4)
+        assert archived.archive_key.startswith(f"{ARCHIVE_PREFIX}{OLD:%Y/%m}/")
+
+        lines = gzip.decompress(await local_storage.get(archived.archive_key)).decode().splitlines()
+        record = json.loads(lines[0])
+        assert record["order_id"] == 7001
+        assert record["status"] == "delivered"
+        assert [item["quantity"] for item in record["items"]] == [4]
+
+    async def test_nothing_to_archive(self, test_session, sample_order, local_storage):
+        """Test that recent orders stay put."""
+        assert await archive_orders(test_session, older_than_days=365) == 0
+
+    async def test_archived_numbers_are_not_reused(
+        self, client: AsyncClient, admin_headers, test_session, sample_product, sample_district, local_storage
+    ):
+        """Test that new orders do not take the numbers of archived ones, even when none are left hot."""
+        payload = order_payload(sample_product, sample_district)
+        first = (await client.post("/api/v1/orders/", json=payload)).json()
+        await client.put(f"/api/v1/admin/orders/{first['id']}/status", json={"status": "cancelled"}, headers=admin_headers)
+
+        assert await archive_orders(test_session, older_than_days=1, now=datetime.now(timezone.utc) + timedelta(days=2)) == 1
+        assert (await test_session.execute(select(Order.id))).scalars().all() == []
+
+        second = (await client.post("/api/v1/orders/", json=payload)).json()
+        assert second["order_id"] == first["order_id"] + 1
+
+
+class TestArchiveReads:
+    """Test that reads fall back to the archive."""
+
+    async def test_customer_history(self, client: AsyncClient, test_session, old_orders, local_storage):
+        """Test that archived orders stay in the customer's order list and details."""
+        delivered_id = old_orders[OrderStatus.DELIVERED].id
+        await archive_orders(test_session, older_than_days=365)
+
+        orders = (await client.get("/api/v1/orders/")).json()
+        assert sorted(order["order_id"] for order in orders) == [7001, 7002]
+        assert {order["order_id"]: order["items_count"] for order in orders}[7001] == 4
+
+        response = await client.get(f"/api/v1/orders/{delivered_id}")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["order_id"] == 7001
+        assert data["status"] == "delivered"
+        assert data["items"][0]["product_name"] == "Test Product"
+
+    async def test_admin_lookup(self, client: AsyncClient, admin_headers, test_session, old_orders, local_storage):
+        """Test that the admin order page finds archived orders."""
+        delivered_id = old_orders[OrderStatus.DELIVERED].id
+        await archive_orders(test_session, older_than_days=365)
+
+        response = await client.get(f"/api/v1/admin/orders/{delivered_id}", headers=admin_headers)
+        assert response.status_code == 200
+        assert response.json()["order_id"] == 7001
+
+        missing = await client.get("/api/v1/admin/orders/999999", headers=admin_headers)
+        assert missing.status_code == 404
+
+    async def test_rollup_rebuild_counts_archived_orders(self, test_session, old_orders, local_storage):
+        """Test that a rebuild still counts orders that were archived."""
+        await archive_orders(test_session, older_than_days=365)
+        await rebuild_rollups(test_session)
+
+        rows = await rollup_rows(test_session)
+        assert rows[(rollup_day(OLD), OrderStatus.DELIVERED, old_orders[OrderStatus.DELIVERED].district_id)] == (
+            1, 90.0, 4
+        )
@@ -0,0 +1,106 @@
+"""Tests for the live order event stream."""
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.services.order_events import OrderEventBus, order_events
+from tests.test_rollups import order_payload
+
+pytestmark = pytest.mark.asyncio
+
+
+def drain(queue: asyncio.Queue) -> list:
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+class TestEventBus:
+    """Test in-process fan-out and the SSE stream."""
+
+    async def test_fan_out(self):
+        """Test that every open subscription gets each event and closed ones stop receiving."""
+        bus = OrderEventBus()
+        async with bus.subscribe() as first, bus.subscribe() as second:
+            await bus.publish({"type": "order.created", "id": 1})
+            assert drain(first) == drain(second) == [{"type": "order.created", "id": 1}]
+        await bus.publish({"type": "order.created", "id": 2})
+        assert drain(first) == []
+
+    async def test_slow_subscriber_drops_oldest(self, monkeypatch):
+        """Test that a full queue loses its oldest events."""
+        monkeypatch.setattr(settings, "ORDER_EVENTS_QUEUE_SIZE", 2)
+        bus = OrderEventBus()
+        async with bus.subscribe() as queue:
+            await bus.publish(*({"type": "order.created", "id": i} for i in range(3)))
+            assert [event["id"] for event in drain(queue)] == [1, 2]
+
+    async def test_redis_unavailable_falls_back(self, monkeypatch, capsys):
+        """Test that events still reach local streams when Redis cannot be reached, without retrying it per write."""
+        monkeypatch.setattr(settings, "ORDER_EVENTS_BACKEND", "redis")
+        monkeypatch.setattr(settings, "REDIS_URL", "redis://127.0.0.1:1")
+        bus = OrderEventBus()
+        async with bus.subscribe() as queue:
+            await bus.publish({"type": "order.created", "id": 1})
+            assert drain(queue) == [{"type": "order.created", "id": 1}]
+        assert "could not publish order events to Redis" in capsys.readouterr().out
+
+        # Within the cooldown, writes do not try Redis again
+        await bus.publish({"type": "order.created", "id": 2})
+        assert capsys.readouterr().out == ""
+        await bus.shutdown()
+
+    async def test_stream_format(self, monkeypatch):
+        """Test the SSE framing, heartbeats and disconnect handling."""
+        monkeypatch.setattr(settings, "ORDER_EVENTS_HEARTBEAT", 0.01)
+        bus = OrderEventBus()
+        checks = iter([False, False, True])
+
+        async def is_disconnected():
+            return next(checks)
+
+        stream = bus.stream(is_disconnected)
+        assert await stream.__anext__() == "retry: 3000\n\n"
+        assert await stream.__anext__() == ": ping\n\n"
+        await bus.publish({"type": "order.created", "id": 5})
+        assert await stream.__anext__() == 'event: order.created\ndata: {"type": "order.created", "id": 5}\n\n'
+        with pytest.raises(StopAsyncIteration):
+            await stream.__anext__()
+        assert not bus._subscribers
+
+
+class TestOrderWrites:
+    """Test that order writes publish events."""
+
+    async def test_created_and_status_changes(
+        self, client: AsyncClient, admin_headers, sample_product, sample_district
+    ):
+        """Test events from order creation, single and bulk status updates."""
+        payload = order_payload(sample_product, sample_district)
+        async with order_events.subscribe() as queue:
+            order = (await client.post("/api/v1/orders/", json=payload)).json()
+            created = drain(queue)
+            assert [(event["type"], event["order_id"], event["status"]) for event in created] == [
+                ("order.created", order["order_id"], "pending")
+            ]
+
+            await client.put(
+                f"/api/v1/admin/orders/{order['id']}/status", json={"status": "verification"}, headers=admin_headers
+            )
+            await client.post(
+                "/api/v1/admin/orders/status:batch",
+                json={"order_ids": [order["id"]], "status": "cancelled"}, headers=admin_headers
+            )
+            changes = drain(queue)
+            assert [(event["type"], event["old_status"], event["status"]) for event in changes] == [
+                ("order.status_changed", "pending", "verification"),
+                ("order.status_changed", "verification", "cancelled"),
+            ]
+
+    async def test_stream_requires_admin(self, client: AsyncClient):
+        """Test that the stream is admin-only."""
+        response = await client.get("/api/v1/admin/orders/events")
+        assert response.status_code == 403
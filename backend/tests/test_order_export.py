@@ -0,0 +1,234 @@
+"""Tests for the streaming order export and background export jobs."""
+import csv
+import io
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+import pytest
+from httpx import AsyncClient
+from openpyxl import load_workbook
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.order import Order, OrderItem, OrderStatus, DeliveryTimeSlot
+from app.services import export, export_jobs
+from app.services.export import ORDER_EXPORT_HEADERS, iter_order_rows
+from app.services.tasks import task_queue
+
+pytestmark = pytest.mark.asyncio
+
+
+def export_range() -> str:
+    start_date = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    end_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    return f"start_date={start_date}&end_date={end_date}"
+
+
+async def add_orders(session: AsyncSession, sample_order: Order, count: int) -> None:
+    """Add more orders like sample_order, each with two items."""
+    for index in range(count):
+        order = Order(
+            order_id=2000 + index,
+            user_id=sample_order.user_id,
+            district_id=sample_order.district_id,
+            status=OrderStatus.DELIVERED,
+            total_amount=100.0 + index,
+            delivery_time_slot=DeliveryTimeSlot.EVENING,
+            delivery_date=datetime.now() + timedelta(days=1),
+            contact_name=f"Customer {index}",
+            comment="Leave at the door" if index % 2 else None,
+        )
+        session.add(order)
+        await session.flush()
+        for _ in range(2):
+            session.add(OrderItem(
+                order_id=order.id, product_id="test_product", product_name="Test Product",
+                package_id="1kg", weight=1.0, unit="кг", quantity=1, price_per_unit=50.0, total_price=50.0
+            ))
+    await session.commit()
+
+
+def export_dates() -> dict:
+    return {
+        "start_date": (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d"),
+        "end_date": (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d"),
+    }
+
+
+@pytest.fixture
+def job_registry(monkeypatch) -> OrderedDict:
+    """Start every test with no known export jobs."""
+    registry = OrderedDict()
+    monkeypatch.setattr(export_jobs, "export_jobs", registry)
+    return registry
+
+
+class TestOrderExport:
+    """Test CSV and XLSX order reports."""
+
+    async def test_xlsx_contains_every_order(
+        self, client: AsyncClient, admin_headers, sample_order, test_session
+    ):
+        """Test that the workbook has a header, one row per order and sized columns."""
+        await add_orders(test_session, sample_order, 5)
+
+        response = await client.get(f"/api/v1/admin/orders/export?{export_range()}", headers=admin_headers)
+
+        assert response.status_code == 200
+        assert "attachment" in response.headers["content-disposition"]
+        sheet = load_workbook(io.BytesIO(response.content)).active
+        rows = list(sheet.iter_rows(values_only=True))
+        assert list(rows[0]) == ORDER_EXPORT_HEADERS
+        assert len(rows) == 7
+        assert sheet["A1"].font.bold
+        # Header, sample order's item count, then the added orders' item counts
+        assert [row[9] for row in rows[1:]].count(2) == 5
+        assert sheet.column_dimensions["L"].width == len("Leave at the door") + 2
+
+    async def test_csv_streams_rows(self, client: AsyncClient, admin_headers, sample_order, test_session):
+        """Test that CSV export includes every order with Excel-friendly encoding."""
+        await add_orders(test_session, sample_order, 3)
+
+        response = await client.get(
+            f"/api/v1/admin/orders/export?{export_range()}&format=csv", headers=admin_headers
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        text = response.content.decode("utf-8-sig")
+        rows = list(csv.reader(io.StringIO(text)))
+        assert rows[0] == ORDER_EXPORT_HEADERS
+        assert len(rows) == 5
+        assert {row[3] for row in rows[1:]} == {"pending", "delivered"}
+
+    async def test_rows_arrive_in_chunks(self, sample_order, test_session):
+        """Test that the cursor is read in bounded chunks."""
+        await add_orders(test_session, sample_order, 7)
+        start = datetime.now() - timedelta(days=1)
+        end = datetime.now() + timedelta(days=1)
+
+        chunks = [chunk async for chunk in iter_order_rows(test_session, start, end, chunk_size=3)]
+
+        assert [len(chunk) for chunk in chunks] == [3, 3, 2]
+
+    async def test_rejects_unknown_format(self, client: AsyncClient, admin_headers):
+        """Test that only xlsx and csv are accepted."""
+        response = await client.get(
+            f"/api/v1/admin/orders/export?{export_range()}&format=pdf", headers=admin_headers
+        )
+        assert response.status_code == 422
+
+    async def test_bad_dates_and_failures(self, client: AsyncClient, admin_headers, monkeypatch, capsys):
+        """Test that bad dates answer 400 and internal errors are not sent to the client."""
+        response = await client.get(
+            "/api/v1/admin/orders/export?start_date=yesterday&end_date=today", headers=admin_headers
+        )
+        assert response.status_code == 400
+
+        async def fail(*args):
+            raise RuntimeError("connection string with secrets")
+
+        monkeypatch.setattr(export, "write_orders_xlsx", fail)
+        response = await client.get(f"/api/v1/admin/orders/export?{export_range()}", headers=admin_headers)
+        assert response.status_code == 500
+        assert response.json()["detail"] == "Export failed"
+        assert "connection string with secrets" in capsys.readouterr().out
+
+
+class TestExportJobs:
+    """Test reports rendered in the background and kept in storage."""
+
+    async def test_job_renders_report_to_storage(
+        self, client: AsyncClient, admin_headers, sample_order, test_session, local_storage, job_registry
+    ):
+        """Test that a job reports progress and its report can be downloaded."""
+        await add_orders(test_session, sample_order, 5)
+
+        response = await client.post("/api/v1/admin/exports", json=export_dates(), headers=admin_headers)
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        assert response.json()["status"] == "queued"
+
+        await task_queue.join()
+
+        job = (await client.get(f"/api/v1/admin/exports/{job_id}", headers=admin_headers)).json()
+        assert job["status"] == "done"
+        assert job["progress"] == 100
+        assert job["rows_total"] == job["rows_done"] == 6
+        assert job["expires_at"] is not None
+        assert await local_storage.exists(f"exports/{job_id}.xlsx")
+
+        download = await client.get(f"/api/v1/admin/exports/{job_id}/download", headers=admin_headers)
+        assert download.status_code == 200
+        assert "attachment" in download.headers["content-disposition"]
+        assert int(download.headers["content-length"]) == len(download.content)
+        rows = list(load_workbook(io.BytesIO(download.content)).active.iter_rows(values_only=True))
+        assert list(rows[0]) == ORDER_EXPORT_HEADERS
+        assert len(rows) == 7
+
+    async def test_csv_job(self, client: AsyncClient, admin_headers, sample_order, local_storage, job_registry):
+        """Test that jobs can render CSV too."""
+        response = await client.post(
+            "/api/v1/admin/exports", json={**export_dates(), "format": "csv"}, headers=admin_headers
+        )
+        job_id = response.json()["job_id"]
+        await task_queue.join()
+
+        download = await client.get(f"/api/v1/admin/exports/{job_id}/download", headers=admin_headers)
+        assert download.headers["content-type"].startswith("text/csv")
+        rows = list(csv.reader(io.StringIO(download.content.decode("utf-8-sig"))))
+        assert rows[0] == ORDER_EXPORT_HEADERS
+        assert len(rows) == 2
+
+    async def test_identical_requests_share_a_job(
+        self, client: AsyncClient, admin_headers, local_storage, job_registry
+    ):
+        """Test that a request matching a running job joins it."""
+        first = await client.post("/api/v1/admin/exports", json=export_dates(), headers=admin_headers)
+        second = await client.post("/api/v1/admin/exports", json=export_dates(), headers=admin_headers)
+        other = await client.post(
+            "/api/v1/admin/exports", json={**export_dates(), "format": "csv"}, headers=admin_headers
+        )
+
+        assert first.json()["job_id"] == second.json()["job_id"]
+        assert other.json()["job_id"] != first.json()["job_id"]
+
+        await task_queue.join()
+        # Once finished, the same request starts a fresh job
+        third = await client.post("/api/v1/admin/exports", json=export_dates(), headers=admin_headers)
+        assert third.json()["job_id"] != first.json()["job_id"]
+
+    async def test_download_before_done_and_after_expiry(
+        self, client: AsyncClient, admin_headers, local_storage, job_registry
+    ):
+        """Test that unfinished jobs answer 409 and expired ones 410."""
+        response = await client.post("/api/v1/admin/exports", json=export_dates(), headers=admin_headers)
+        job_id = response.json()["job_id"]
+
+        pending = await client.get(f"/api/v1/admin/exports/{job_id}/download", headers=admin_headers)
+        assert pending.status_code == 409
+
+        await task_queue.join()
+        job_registry[job_id]["expires_at"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+
+        expired = await client.get(f"/api/v1/admin/exports/{job_id}/download", headers=admin_headers)
+        assert expired.status_code == 410
+        status_response = await client.get(f"/api/v1/admin/exports/{job_id}", headers=admin_headers)
+        assert status_response.json()["status"] == "expired"
+
+    async def test_purges_expired_reports(self, local_storage, monkeypatch):
+        """Test that reports past their TTL are removed from storage."""
+        await local_storage.put("exports/old.xlsx", b"report", "application/octet-stream")
+        await local_storage.put("products/keep.jpg", b"image", "image/jpeg")
+        monkeypatch.setattr(export_jobs.settings, "EXPORT_TTL_HOURS", 0)
+
+        assert await export_jobs.purge_expired_exports() == 1
+        assert not await local_storage.exists("exports/old.xlsx")
+        assert await local_storage.exists("products/keep.jpg")
+
+    async def test_rejects_bad_requests(self, client: AsyncClient, admin_headers, job_registry):
+        """Test date validation and unknown jobs."""
+        response = await client.post(
+            "/api/v1/admin/exports", json={"start_date": "yesterday", "end_date": "today"}, headers=admin_headers
+        )
+        assert response.status_code == 400
+        response = await client.get("/api/v1/admin/exports/unknown", headers=admin_headers)
+        assert response.status_code == 404
@@ -0,0 +1,56 @@
+"""Tests for the admin order list views."""
+from datetime import datetime
+import pytest
+from httpx import AsyncClient
+
+from app.db.models.order import DeliveryTimeSlot, Order, OrderStatus
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestOrderListViews:
+    """Test the view parameter of GET /admin/orders."""
+
+    async def test_summary_view(
+        self, client: AsyncClient, admin_headers, sample_order, sample_district
+    ):
+        """Test list columns with item count and district name, without nested objects."""
+        response = await client.get("/api/v1/admin/orders?view=summary", headers=admin_headers)
+
+        assert response.status_code == 200
+        item = response.json()["items"][0]
+        assert item["order_id"] == sample_order.order_id
+        assert item["status"] == "pending"
+        assert item["delivery_time_slot"] == "morning"
+        assert item["items_count"] == 1
+        assert item["district_name"] == sample_district.name
+        assert "items" not in item
+        assert "user" not in item
+
+    async def test_full_is_the_default(self, client: AsyncClient, admin_headers, sample_order, sample_user):
+        """Test that the default view keeps items and user."""
+        response = await client.get("/api/v1/admin/orders", headers=admin_headers)
+
+        assert response.status_code == 200
+        item = response.json()["items"][0]
+        assert len(item["items"]) == 1
+        assert item["user"]["id"] == sample_user.id
+
+    async def test_summary_counts_orders_without_items(
+        self, client: AsyncClient, admin_headers, test_session, sample_user, sample_district
+    ):
+        """Test a zero item count for an order with no items."""
+        test_session.add(Order(
+            order_id=3001, user_id=sample_user.id, district_id=sample_district.id,
+            status=OrderStatus.PENDING, total_amount=0, delivery_time_slot=DeliveryTimeSlot.EVENING,
+            delivery_date=datetime.now(), contact_name="Empty",
+        ))
+        await test_session.commit()
+
+        response = await client.get("/api/v1/admin/orders?order_id=3001&view=summary", headers=admin_headers)
+        assert response.json()["items"][0]["items_count"] == 0
+
+    async def test_rejects_unknown_view(self, client: AsyncClient, admin_headers):
+        """Test view validation."""
+        response = await client.get("/api/v1/admin/orders?view=compact", headers=admin_headers)
+        assert response.status_code == 422
@@ -0,0 +1,92 @@
+"""Tests for the admin order search."""
+from datetime import datetime, timedelta
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.db.models.order import DeliveryTimeSlot, Order, OrderStatus
+from app.services.order_search import search_filter, search_rank
+
+
+@pytest_asyncio.fixture
+async def searchable_orders(test_session, sample_user, sample_district):
+    """Orders with distinct contact details, comments and addresses."""
+    details = [
+        (2001, "Olena Kovalenko", "+380671112233", "Call before delivery", "Khreshchatyk 1"),
+        (2002, "Ivan Petrenko", "+380509998877", None, "Sadova 15, flat 100%"),
+        (2003, "Petro Ivanov", None, "Leave at the door", None),
+    ]
+    for order_id, name, phone, comment, address in details:
+        test_session.add(Order(
+            order_id=order_id, user_id=sample_user.id, district_id=sample_district.id,
+            status=OrderStatus.PENDING, total_amount=100.0,
+            delivery_time_slot=DeliveryTimeSlot.MORNING,
+            delivery_date=datetime.now() + timedelta(days=1),
+            contact_name=name, contact_phone=phone, comment=comment, delivery_address=address,
+            created_at=datetime.utcnow() - timedelta(minutes=order_id - 2000),
+        ))
+    await test_session.commit()
+
+
+async def search(client: AsyncClient, headers, q: str) -> list:
+    response = await client.get("/api/v1/admin/orders", params={"q": q}, headers=headers)
+    assert response.status_code == 200
+    return [order["order_id"] for order in response.json()["items"]]
+
+
+@pytest.mark.asyncio
+class TestOrderSearch:
+    """Test the q parameter of GET /admin/orders."""
+
+    async def test_matches_each_field(self, client: AsyncClient, admin_headers, searchable_orders):
+        """Test name, phone fragment, comment and address matches."""
+        assert await search(client, admin_headers, "kovalenko") == [2001]
+        assert await search(client, admin_headers, "99988") == [2002]
+        assert await search(client, admin_headers, "door") == [2003]
+        assert await search(client, admin_headers, "Sadova") == [2002]
+
+    async def test_all_terms_must_match(self, client: AsyncClient, admin_headers, searchable_orders):
+        """Test that several terms narrow the results."""
+        assert await search(client, admin_headers, "ivan") == [2002, 2003]
+        assert await search(client, admin_headers, "ivan petrenko") == [2002]
+        assert await search(client, admin_headers, "ivan nobody") == []
+
+    async def test_like_wildcards_are_literal(self, client: AsyncClient, admin_headers, searchable_orders):
+        """Test that % and _ in the query are not wildcards."""
+        assert await search(client, admin_headers, "100%") == [2002]
+        assert await search(client, admin_headers, "_") == []
+
+    async def test_combines_with_filters(self, client: AsyncClient, admin_headers, searchable_orders):
+        """Test that the search count respects other filters."""
+        response = await client.get(
+            "/api/v1/admin/orders", params={"q": "ivan", "status": "delivered"}, headers=admin_headers
+        )
+        assert response.json()["total"] == 0
+
+        response = await client.get("/api/v1/admin/orders", params={"q": "ivan", "size": 1}, headers=admin_headers)
+        assert response.json()["total"] == 2
+        assert len(response.json()["items"]) == 1
+
+    async def test_blank_query_returns_everything(self, client: AsyncClient, admin_headers, searchable_orders):
+        """Test that a whitespace-only query does not filter."""
+        assert len(await search(client, admin_headers, "   ")) == 3
+
+
+def test_postgresql_uses_indexed_expressions():
+    """Test full-text and trigram expressions with inlined constants on PostgreSQL."""
+    class Session:
+        def get_bind(self):
+            return type("Bind", (), {"dialect": postgresql.dialect()})()
+
+    query = (
+        select(Order.id)
+        .where(search_filter(Session(), "ivan"))
+        .order_by(search_rank(Session(), "ivan").desc())
+    )
+    sql = str(query.compile(dialect=postgresql.dialect()))
+    assert "to_tsvector('simple'::regconfig, (((((coalesce(orders.contact_name, '') || ' ')" in sql
+    assert "@@ websearch_to_tsquery('simple'::regconfig" in sql
+    assert "ILIKE" in sql
+    assert "similarity(" in sql
@@ -0,0 +1,115 @@
+"""Tests for the order status workflow and bulk status updates."""
+from datetime import datetime, timezone
+
+import pytest
+from httpx import AsyncClient
+
+from app.db.models.order import OrderStatus
+from app.services import order_status
+from app.services.order_status import TRANSITIONS, sources
+from app.services.rollups import rebuild_rollups
+from tests.test_rollups import category_rows, order_payload, rollup_rows
+
+BATCH_URL = "/api/v1/admin/orders/status:batch"
+
+
+class TestWorkflow:
+    """Test the transition map."""
+
+    def test_every_status_listed(self):
+        """Test that every status has an entry and finished orders cannot move."""
+        assert set(TRANSITIONS) == set(OrderStatus)
+        assert TRANSITIONS[OrderStatus.DELIVERED] == frozenset()
+        assert TRANSITIONS[OrderStatus.CANCELLED] == frozenset()
+
+    def test_sources(self):
+        """Test the statuses an order may be delivered from."""
+        assert sources(OrderStatus.DELIVERED) == [OrderStatus.DELIVERING]
+        assert OrderStatus.PENDING in sources(OrderStatus.CANCELLED)
+
+
+@pytest.mark.asyncio
+class TestSingleUpdate:
+    """Test PUT /admin/orders/{id}/status."""
+
+    async def test_follows_workflow(self, client: AsyncClient, admin_headers, sample_product, sample_district):
+        """Test that disallowed moves are refused and repeating the current status is a no-op."""
+        payload = order_payload(sample_product, sample_district)
+        order_id = (await client.post("/api/v1/orders/", json=payload)).json()["id"]
+        url = f"/api/v1/admin/orders/{order_id}/status"
+
+        response = await client.put(url, json={"status": "delivered"}, headers=admin_headers)
+        assert response.status_code == 409
+
+        response = await client.put(url, json={"status": "confirmed"}, headers=admin_headers)
+        assert response.status_code == 200
+        assert response.json()["status"] == "confirmed"
+        assert len(response.json()["items"]) == 1
+
+        response = await client.put(url, json={"status": "confirmed"}, headers=admin_headers)
+        assert response.status_code == 200
+
+        response = await client.put(url, json={"status": "pending"}, headers=admin_headers)
+        assert response.status_code == 409
+
+        response = await client.put(
+            "/api/v1/admin/orders/999999/status", json={"status": "confirmed"}, headers=admin_headers
+        )
+        assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+class TestBatchUpdate:
+    """Test POST /admin/orders/status:batch."""
+
+    async def test_moves_allowed_orders(
+        self, client: AsyncClient, admin_headers, test_session, sample_product, sample_district, monkeypatch
+    ):
+        """Test that allowed orders move in one go, the rest are reported and rollups follow."""
+        payload = order_payload(sample_product, sample_district)
+        category_id, district_id = sample_product.category_id, sample_district.id
+        ids = [(await client.post("/api/v1/orders/", json=payload)).json()["id"] for _ in range(3)]
+        await client.put(f"/api/v1/admin/orders/{ids[2]}/status", json={"status": "cancelled"}, headers=admin_headers)
+
+        jobs = []
+        monkeypatch.setattr(order_status.task_queue, "enqueue", lambda func, *args: jobs.append((func, args)))
+
+        response = await client.post(
+            BATCH_URL, json={"order_ids": ids + [999999], "status": "confirmed"}, headers=admin_headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "confirmed"
+        assert data["updated"] == ids[:2]
+        assert data["skipped"] == [
+            {"id": ids[2], "status": "cancelled", "reason": "invalid_transition"},
+            {"id": 999999, "status": None, "reason": "not_found"},
+        ]
+
+        today = datetime.now(timezone.utc).date()
+        expected = {
+            (today, OrderStatus.CONFIRMED, district_id): (2, 400.0, 4),
+            (today, OrderStatus.CANCELLED, district_id): (1, 200.0, 2),
+        }
+        assert await rollup_rows(test_session) == expected
+        assert await category_rows(test_session) == {
+            (today, OrderStatus.CONFIRMED, category_id): (2, 400.0, 4),
+            (today, OrderStatus.CANCELLED, category_id): (1, 200.0, 2),
+        }
+        await rebuild_rollups(test_session)
+        assert await rollup_rows(test_session) == expected
+
+        # One notification job for the whole batch
+        assert len(jobs) == 1
+        assert [update["status"] for update in jobs[0][1][0]] == [OrderStatus.CONFIRMED] * 2
+
+        order = (await client.get(f"/api/v1/admin/orders/{ids[0]}", headers=admin_headers)).json()
+        assert order["status"] == "confirmed"
+
+    async def test_invalid_requests(self, client: AsyncClient, admin_headers):
+        """Test unknown statuses and empty batches."""
+        response = await client.post(BATCH_URL, json={"order_ids": [1], "status": "shipped"}, headers=admin_headers)
+        assert response.status_code == 400
+
+        response = await client.post(BATCH_URL, json={"order_ids": [], "status": "confirmed"}, headers=admin_headers)
+        assert response.status_code == 422
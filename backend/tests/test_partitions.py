@@ -0,0 +1,164 @@
+"""Tests for monthly order partitions and the scheduler that maintains them."""
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.db.models.order import Order, OrderItem, OrderNumber
+from app.services.partitions import (
+    add_months, ensure_partitions, items_join, items_of, partition_ddl, partition_name
+)
+from app.services.scheduler import Scheduler
+from tests.test_rollups import order_payload
+
+
+class RecordingSession:
+    """Stands in for a PostgreSQL session, recording the DDL and DML ensure_partitions runs."""
+
+    def __init__(self, existing: set, default_rows: int):
+        self.existing = existing
+        self.default_rows = default_rows
+        self.statements = []
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=SimpleNamespace(name="postgresql"))
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        if "relkind" in sql:
+            return SimpleNamespace(scalar=lambda: "p")
+        if "to_regclass(:name)" in sql:
+            return SimpleNamespace(scalar=lambda: params["name"] in self.existing)
+        if "pg_advisory_xact_lock" not in sql:
+            self.statements.append(sql)
+        return SimpleNamespace(rowcount=self.default_rows if sql.startswith("DELETE") else 0)
+
+    async def commit(self):
+        pass
+
+
+class TestPartitionNames:
+    """Test partition naming and bounds."""
+
+    def test_add_months(self):
+        """Test month arithmetic across year ends."""
+        assert add_months(date(2026, 11, 1), 1) == date(2026, 12, 1)
+        assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+        assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+    def test_partition_ddl(self):
+        """Test that a month's partition is bounded at UTC month starts."""
+        assert partition_name("orders", date(2026, 12, 1)) == "orders_2026_12"
+        assert partition_ddl("order_items", date(2026, 12, 1)) == (
+            "CREATE TABLE IF NOT EXISTS order_items_2026_12 PARTITION OF order_items "
+            "FOR VALUES FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')"
+        )
+
+    def test_items_join_uses_partition_key(self):
+        """Test that item lookups constrain the items' partition key."""
+        query = select(OrderItem.id).where(items_join())
+        sql = str(query.compile(dialect=postgresql.dialect()))
+        assert "order_items.order_created_at = orders.created_at" in sql
+
+    @pytest.mark.asyncio
+    async def test_ensure_partitions_skips_other_databases(self, test_session):
+        """Test that maintenance does nothing outside PostgreSQL."""
+        assert await ensure_partitions(test_session, months_ahead=3) == []
+
+    @pytest.mark.asyncio
+    async def test_missing_month_takes_rows_from_default(self, capsys):
+        """Test that rows stranded in the default partitions move into the new month's partitions."""
+        session = RecordingSession(existing={"orders_default", "order_items_default"}, default_rows=2)
+
+        created = await ensure_partitions(session, months_ahead=0, today=date(2026, 12, 5))
+
+        assert created == ["orders_2026_12", "order_items_2026_12"]
+        statements = [sql.split(" WHERE ")[0] for sql in session.statements]
+        assert statements == [
+            "CREATE TEMP TABLE _moved_order_items_2026_12 ON COMMIT DROP AS SELECT * FROM order_items_default",
+            "DELETE FROM order_items_default",
+            "CREATE TEMP TABLE _moved_orders_2026_12 ON COMMIT DROP AS SELECT * FROM orders_default",
+            "DELETE FROM orders_default",
+            partition_ddl("orders", date(2026, 12, 1)),
+            partition_ddl("order_items", date(2026, 12, 1)),
+            "INSERT INTO orders SELECT * FROM _moved_orders_2026_12",
+            "INSERT INTO order_items SELECT * FROM _moved_order_items_2026_12",
+        ]
+        assert "order_created_at >= '2026-12-01 00:00:00+00'" in session.statements[0]
+        assert "Warning: partitions for 2026-12 were missing" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+class TestItemPartitionKey:
+    """Test that items always carry their order's created_at."""
+
+    async def test_fixture_items(self, test_session, sample_order):
+        """Test items added by order id alone."""
+        item = (await test_session.execute(
+            select(OrderItem).where(OrderItem.order_id == sample_order.id)
+        )).scalar_one()
+        await test_session.refresh(item)
+        assert item.order_created_at == sample_order.created_at
+
+    async def test_created_orders(self, client: AsyncClient, test_session, sample_product, sample_district):
+        """Test items inserted by order creation."""
+        response = await client.post("/api/v1/orders/", json=order_payload(sample_product, sample_district))
+        assert response.status_code == 200
+
+        rows = (await test_session.execute(
+            select(Order.created_at, OrderItem.order_created_at).join(OrderItem, items_join())
+        )).all()
+        assert len(rows) == 1
+        assert rows[0][0] == rows[0][1]
+
+    async def test_items_of_known_orders(self, test_session, sample_order):
+        """Test that items of known orders are found with their partition key bounded."""
+        created_at = sample_order.created_at
+        condition = items_of([(sample_order.id, created_at)])
+        sql = str(select(OrderItem.id).where(condition).compile(dialect=postgresql.dialect()))
+        assert "order_items.order_created_at BETWEEN" in sql
+
+        items = (await test_session.execute(select(OrderItem.order_id).where(condition))).scalars().all()
+        assert items == [sample_order.id]
+
+
+@pytest.mark.asyncio
+class TestOrderNumbers:
+    """Test that order numbers stay unique now that orders are partitioned."""
+
+    async def test_numbers_are_reserved(self, client: AsyncClient, test_session, sample_product, sample_district):
+        """Test that each order claims its number and skips numbers already taken."""
+        payload = order_payload(sample_product, sample_district)
+        test_session.add(OrderNumber(order_id=100))
+        await test_session.commit()
+
+        response = await client.post("/api/v1/orders/", json=payload)
+        assert response.json()["order_id"] == 101
+        reserved = (await test_session.execute(select(OrderNumber.order_id))).scalars().all()
+        assert sorted(reserved) == [100, 101]
+
+
+@pytest.mark.asyncio
+class TestScheduler:
+    """Test periodic job scheduling."""
+
+    async def test_jobs_run_and_survive_failures(self, capsys):
+        """Test that a failing job is logged and run again."""
+        runs = []
+
+        async def flaky():
+            runs.append(True)
+            raise RuntimeError("boom")
+
+        scheduler = Scheduler()
+        scheduler.every(0.01, flaky)
+        scheduler.start()
+        await asyncio.sleep(0.05)
+        await scheduler.shutdown()
+
+        assert len(runs) >= 2
+        assert "Scheduled job flaky failed: boom" in capsys.readouterr().out
@@ -0,0 +1,114 @@
+"""Tests for query budgets and N+1 detection."""
+from datetime import datetime, timedelta
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import select
+
+from app.core.query_tracker import QueryBudgetExceeded, QueryTrackingMiddleware, query_budget as budget
+from app.db.models.order import DeliveryTimeSlot, Order, OrderItem, OrderStatus
+from app.db.models.product import Product
+from tests.test_rollups import order_payload
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest_asyncio.fixture
+async def user_orders(test_session, sample_user, sample_district, sample_product):
+    """Several orders with items for the sample user."""
+    for n in range(4):
+        order = Order(
+            order_id=5000 + n, user_id=sample_user.id, district_id=sample_district.id,
+            status=OrderStatus.PENDING, total_amount=100.0, delivery_time_slot=DeliveryTimeSlot.MORNING,
+            delivery_date=datetime.now() + timedelta(days=1), contact_name="Test User",
+        )
+        test_session.add(order)
+        await test_session.flush()
+        test_session.add(OrderItem(
+            order_id=order.id, product_id=sample_product.id, product_name=sample_product.name,
+            package_id="1kg", weight=1.0, unit="кг", quantity=n + 1, price_per_unit=25.0, total_price=25.0 * (n + 1),
+        ))
+    await test_session.commit()
+
+
+@pytest_asyncio.fixture
+async def extra_products(test_session, sample_product):
+    """Two more products in the sample category."""
+    for n in range(2):
+        test_session.add(Product(
+            id=f"extra-{n}", category_id=sample_product.category_id, name=f"Extra {n}",
+            price_per_kg=10.0, is_active=True,
+        ))
+    await test_session.commit()
+
+
+class TestQueryBudget:
+    """Test the tracker and the endpoints it guards."""
+
+    async def test_user_orders_use_one_query(self, client: AsyncClient, user_orders, query_budget):
+        """Test that item counts come with the orders rather than one query per order."""
+        with query_budget(1):
+            response = await client.get("/api/v1/orders/")
+
+        assert response.status_code == 200
+        assert sorted(order["items_count"] for order in response.json()) == [1, 2, 3, 4]
+
+    @pytest.mark.query_budget(max_queries=12)
+    async def test_create_order_validates_products_at_once(
+        self, client: AsyncClient, extra_products, sample_product, sample_district, telegram_headers
+    ):
+        """Test that a multi-item order does not look products up, or insert items, one by one."""
+        payload = order_payload(sample_product, sample_district)
+        payload["items"] += [
+            {**payload["items"][0], "product_id": f"extra-{n}", "product_name": f"Extra {n}"} for n in range(2)
+        ]
+        response = await client.post("/api/v1/orders", json=payload, headers=telegram_headers)
+
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == 3
+
+    async def test_create_order_rejects_inactive_product(
+        self, client: AsyncClient, sample_product, sample_district, telegram_headers
+    ):
+        """Test that batched validation still names the missing product."""
+        payload = order_payload(sample_product, sample_district)
+        payload["items"].append({**payload["items"][0], "product_id": "missing"})
+
+        response = await client.post("/api/v1/orders", json=payload, headers=telegram_headers)
+
+        assert response.status_code == 400
+        assert "missing" in response.json()["detail"]
+
+    async def test_repeated_statements_are_reported(self, test_session, sample_product):
+        """Test that the same statement run per row fails the budget and is quoted."""
+        with pytest.raises(QueryBudgetExceeded) as excinfo:
+            with budget(max_queries=10):
+                for product_id in (sample_product.id, "a", "b"):
+                    await test_session.execute(select(Product).where(Product.id == product_id))
+
+        message = str(excinfo.value)
+        assert "statement run 3 times (limit 1)" in message
+        assert "FROM products" in message
+
+        with pytest.raises(QueryBudgetExceeded, match="2 SQL statements, budget is 1"):
+            with budget(max_queries=1, max_repeats=None):
+                await test_session.execute(select(Product))
+                await test_session.execute(select(Product.id))
+
+    async def test_middleware_logs_offending_route(self, test_session, capsys):
+        """Test the staging log line for a request over budget."""
+        async def endpoint(scope, receive, send):
+            for _ in range(3):
+                await test_session.execute(select(Product))
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def send(message):
+            pass
+
+        middleware = QueryTrackingMiddleware(endpoint, max_queries=10, max_repeats=2)
+        await middleware({"type": "http", "method": "GET", "path": "/slow"}, None, send)
+
+        output = capsys.readouterr().out
+        assert "Warning: GET /slow exceeded its query budget" in output
+        assert "statement run 3 times (limit 2)" in output
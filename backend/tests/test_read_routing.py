@@ -0,0 +1,80 @@
+"""Tests for routing reads between the primary and a read replica."""
+import pytest
+from httpx import AsyncClient
+
+from app.db.session import ReadRouter, read_router
+from tests.test_rollups import order_payload
+
+pytestmark = pytest.mark.asyncio
+
+PRIMARY = object()
+REPLICA = object()
+
+
+def make_router(lag=0.0, replica=REPLICA, check_interval=60, pin_seconds=30) -> ReadRouter:
+    router = ReadRouter(PRIMARY, replica, max_lag=5, check_interval=check_interval, pin_seconds=pin_seconds)
+    router.checks = 0
+
+    async def replica_lag():
+        router.checks += 1
+        if isinstance(lag, Exception):
+            raise lag
+        return lag
+
+    router._replica_lag = replica_lag
+    return router
+
+
+class TestReadRouter:
+    """Test replica selection, lag fallback and read-your-writes pins."""
+
+    async def test_primary_without_replica(self):
+        """Test that reads stay on the primary when no replica is configured."""
+        assert await make_router(replica=None).factory() is PRIMARY
+
+    async def test_replica_when_caught_up(self):
+        """Test that reads go to a replica within the lag limit."""
+        assert await make_router(lag=1.5).factory() is REPLICA
+        assert await make_router(lag=None).factory() is REPLICA
+
+    async def test_primary_when_replica_lags_or_fails(self):
+        """Test the fallback for a lagging or unreachable replica."""
+        assert await make_router(lag=30.0).factory() is PRIMARY
+        assert await make_router(lag=ConnectionError("down")).factory() is PRIMARY
+
+    async def test_lag_is_checked_once_per_interval(self):
+        """Test that the lag check result is reused."""
+        router = make_router(lag=1.0)
+        for _ in range(3):
+            await router.factory()
+        assert router.checks == 1
+
+        router = make_router(lag=1.0, check_interval=0)
+        for _ in range(3):
+            await router.factory()
+        assert router.checks == 3
+
+    async def test_pinned_user_reads_primary(self):
+        """Test read-your-writes for a pinned user only, until the pin expires."""
+        router = make_router()
+        router.pin(1)
+        assert await router.factory(1) is PRIMARY
+        assert await router.factory(2) is REPLICA
+        assert await router.factory() is REPLICA
+
+        expired = make_router(pin_seconds=0)
+        expired.pin(1)
+        assert await expired.factory(1) is REPLICA
+
+    async def test_order_creation_pins_user(
+        self, client: AsyncClient, sample_user, sample_product, sample_district, telegram_headers
+    ):
+        """Test that a new order sends the customer's reads to the primary."""
+        read_router._pins.pop(sample_user.id, None)
+
+        response = await client.post(
+            "/api/v1/orders", json=order_payload(sample_product, sample_district), headers=telegram_headers
+        )
+
+        assert response.status_code == 200
+        assert read_router.is_pinned(sample_user.id)
@@ -0,0 +1,180 @@
+"""Tests for the daily rollups behind order statistics."""
+from datetime import datetime, timedelta, timezone
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.order import (
+    Order, OrderCategoryDailyStats, OrderDailyStats, OrderItem, OrderStatus, DeliveryTimeSlot
+)
+from app.db.models.user import UserDailySignups
+from app.services.rollups import rollup_day, rebuild_rollups
+
+pytestmark = pytest.mark.asyncio
+
+
+def order_payload(product, district, quantity: int = 2, total: float = 200.0) -> dict:
+    return {
+        "user_id": 123456789,
+        "user_name": "Test User",
+        "items": [{
+            "product_id": product.id,
+            "product_name": product.name,
+            "package_id": "1kg",
+            "weight": 1.0,
+            "unit": "кг",
+            "quantity": quantity,
+            "price_per_unit": total / quantity,
+            "total_price": total,
+        }],
+        "delivery": {"district": district.name, "time_slot": "morning"},
+        "total": total,
+    }
+
+
+async def rollup_rows(session: AsyncSession) -> dict:
+    result = await session.execute(select(OrderDailyStats))
+    return {
+        (row.day, row.status, row.district_id): (row.order_count, row.revenue, row.item_quantity)
+        for row in result.scalars().all()
+        if row.order_count
+    }
+
+
+async def category_rows(session: AsyncSession) -> dict:
+    result = await session.execute(select(OrderCategoryDailyStats))
+    return {
+        (row.day, row.status, row.category_id): (row.order_count, round(row.revenue, 2), row.item_quantity)
+        for row in result.scalars().all()
+        if row.order_count
+    }
+
+
+class TestRollups:
+    """Test that the rollups follow orders and users and feed the stats endpoint."""
+
+    async def test_new_orders_are_counted(
+        self, client: AsyncClient, test_session, sample_product, sample_district, telegram_headers
+    ):
+        """Test that creating orders adds to today's pending row."""
+        for total in (200.0, 300.0):
+            response = await client.post(
+                "/api/v1/orders", json=order_payload(sample_product, sample_district, total=total),
+                headers=telegram_headers
+            )
+            assert response.status_code == 200
+
+        today = datetime.now(timezone.utc).date()
+        assert await rollup_rows(test_session) == {
+            (today, OrderStatus.PENDING, sample_district.id): (2, 500.0, 4)
+        }
+        assert await category_rows(test_session) == {
+            (today, OrderStatus.PENDING, sample_product.category_id): (2, 500.0, 4)
+        }
+
+    async def test_status_change_moves_order(
+        self, client: AsyncClient, admin_headers, test_session, sample_product, sample_district, telegram_headers
+    ):
+        """Test that a status update moves the order between status rows and stats follow."""
+        response = await client.post(
+            "/api/v1/orders", json=order_payload(sample_product, sample_district), headers=telegram_headers
+        )
+        order_id = response.json()["id"]
+
+        response = await client.put(
+            f"/api/v1/admin/orders/{order_id}/status", json={"status": "shipped"}, headers=admin_headers
+        )
+        assert response.status_code == 400
+
+        response = await client.put(
+            f"/api/v1/admin/orders/{order_id}/status", json={"status": "confirmed"}, headers=admin_headers
+        )
+        assert response.status_code == 200
+
+        today = datetime.now(timezone.utc).date()
+        assert await rollup_rows(test_session) == {
+            (today, OrderStatus.CONFIRMED, sample_district.id): (1, 200.0, 2)
+        }
+        assert await category_rows(test_session) == {
+            (today, OrderStatus.CONFIRMED, sample_product.category_id): (1, 200.0, 2)
+        }
+
+        stats = (await client.get(
+            f"/api/v1/admin/orders/stats?start_date={today}&end_date={today}", headers=admin_headers
+        )).json()
+        assert stats["total_orders"] == 1
+        assert stats["total_revenue"] == 200.0
+        assert stats["orders_by_status"] == {"confirmed": 1}
+
+        yesterday = today - timedelta(days=1)
+        stats = (await client.get(
+            f"/api/v1/admin/orders/stats?end_date={yesterday}", headers=admin_headers
+        )).json()
+        assert stats["total_orders"] == 0
+
+    async def test_rebuild_matches_orders(self, test_session, sample_order, sample_district):
+        """Test that a rebuild recomputes rows from orders inserted behind the API's back."""
+        created_at = datetime(2026, 3, 1, 23, 30, tzinfo=timezone.utc)
+        order = Order(
+            order_id=5000, user_id=sample_order.user_id, district_id=sample_district.id,
+            status=OrderStatus.DELIVERED, total_amount=80.0, discount_amount=20.0,
+            delivery_time_slot=DeliveryTimeSlot.EVENING, delivery_date=created_at,
+            contact_name="Old Customer", created_at=created_at,
+        )
+        test_session.add(order)
+        await test_session.flush()
+        test_session.add(OrderItem(
+            order_id=order.id, product_id="test_product", product_name="Test Product",
+            package_id="1kg", weight=1.0, unit="кг", quantity=3, price_per_unit=25.0, total_price=75.0
+        ))
+        await test_session.commit()
+
+        written = await rebuild_rollups(test_session)
+        assert written == {"order_daily_stats": 2, "order_category_daily_stats": 2, "user_daily_signups": 1}
+
+        rows = await rollup_rows(test_session)
+        assert rows[(rollup_day(created_at), OrderStatus.DELIVERED, sample_district.id)] == (1, 80.0, 3)
+        assert rows[(rollup_day(sample_order.created_at), OrderStatus.PENDING, sample_order.district_id)] == (
+            1, sample_order.total_amount, 1
+        )
+        # The 20.0 discount is shared out, so category revenue matches the order total
+        categories = await category_rows(test_session)
+        assert categories[(rollup_day(created_at), OrderStatus.DELIVERED, "test_category")] == (1, 80.0, 3)
+
+    async def test_category_revenue_is_split_by_item_totals(
+        self, client: AsyncClient, test_session, sample_product, sample_district, telegram_headers
+    ):
+        """Test that an order spanning categories is counted once in each with its share of the total."""
+        from app.db.models.product import Category, Product
+        test_session.add(Category(id="caviar", name="Caviar", icon="🥚"))
+        test_session.add(Product(id="red_caviar", category_id="caviar", name="Red Caviar", price_per_kg=300.0))
+        await test_session.commit()
+
+        payload = order_payload(sample_product, sample_district, quantity=1, total=100.0)
+        payload["items"].append({
+            "product_id": "red_caviar", "product_name": "Red Caviar", "package_id": "100g",
+            "weight": 0.1, "unit": "шт", "quantity": 3, "price_per_unit": 100.0, "total_price": 300.0,
+        })
+        payload["total"] = 400.0
+        response = await client.post("/api/v1/orders", json=payload, headers=telegram_headers)
+        assert response.status_code == 200
+
+        today = datetime.now(timezone.utc).date()
+        assert await category_rows(test_session) == {
+            (today, OrderStatus.PENDING, "test_category"): (1, 100.0, 1),
+            (today, OrderStatus.PENDING, "caviar"): (1, 300.0, 3),
+        }
+
+    async def test_new_users_are_counted(self, client: AsyncClient, test_session):
+        """Test that users created by the bot add to today's sign-ups."""
+        for user_id in (555, 556, 555):
+            response = await client.post("/api/v1/bot/interactions", json={
+                "user": {"id": user_id, "first_name": "New"}, "interaction_type": "start"
+            })
+            assert response.status_code == 200
+
+        result = await test_session.execute(select(UserDailySignups))
+        assert [(row.day, row.new_users) for row in result.scalars().all()] == [
+            (datetime.now(timezone.utc).date(), 2)
+        ]
@@ -0,0 +1,94 @@
+"""Tests for lazily created request sessions and their transaction options."""
+import pytest
+from sqlalchemy import text
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+from app.db.session import (
+    LazySession,
+    get_async_session,
+    read_only_gets,
+    session_options,
+    transaction_settings,
+)
+from tests.conftest import TestSessionLocal
+
+pytestmark = pytest.mark.asyncio
+
+
+def make_connection(method: str = "GET") -> HTTPConnection:
+    return HTTPConnection({"type": "http", "method": method, "path": "/", "headers": []})
+
+
+class TestLazySession:
+    """Test that sessions are only created when used."""
+
+    async def test_unused_session_is_never_created(self):
+        """Test that closing an unused session does nothing."""
+        created = []
+
+        def factory():
+            created.append(True)
+            return TestSessionLocal()
+
+        session = LazySession(factory)
+        await session.close()
+
+        assert not session.opened
+        assert created == []
+
+    async def test_session_is_created_on_first_use(self):
+        """Test that the first attribute access opens a working session."""
+        session = LazySession(TestSessionLocal, read_only=True, statement_timeout=500)
+        try:
+            assert (await session.execute(text("SELECT 1"))).scalar() == 1
+            assert session.opened
+        finally:
+            await session.close()
+
+    async def test_transaction_settings(self):
+        """Test the statements that open a PostgreSQL transaction."""
+        assert transaction_settings(False, None) == []
+        assert transaction_settings(False, 0) == []
+        assert transaction_settings(True, 2500) == [
+            "SET TRANSACTION READ ONLY",
+            "SET LOCAL statement_timeout = 2500",
+        ]
+
+
+class TestSessionOptions:
+    """Test route and router dependencies that configure the request session."""
+
+    async def test_defaults(self):
+        """Test that a plain request gets a writable session with the default timeout."""
+        dependency = get_async_session(make_connection())
+        session = await dependency.__anext__()
+
+        assert not session.read_only
+        assert session.statement_timeout == settings.DATABASE_STATEMENT_TIMEOUT
+        await dependency.aclose()
+
+    async def test_route_options(self):
+        """Test that route options reach the session."""
+        connection = make_connection("POST")
+        await session_options(statement_timeout=500, read_only=True)(connection)
+
+        dependency = get_async_session(connection)
+        session = await dependency.__anext__()
+
+        assert session.read_only
+        assert session.statement_timeout == 500
+        assert not session.opened
+        await dependency.aclose()
+
+    async def test_read_only_gets(self):
+        """Test that only GET requests are made read-only, unless a route opts out."""
+        get, post = make_connection("GET"), make_connection("POST")
+        await read_only_gets(get)
+        await read_only_gets(post)
+
+        assert get.state.read_only is True
+        assert getattr(post.state, "read_only", False) is False
+
+        await session_options(read_only=False)(get)
+        assert get.state.read_only is False
@@ -117,10 +117,10 @@ class ApiClient {
         return this.request(endpoint);
     }
     
-    async post(endpoint, data) {
+    async post(endpoint, data, headers = {}) {
         return this.request(endpoint, {
             method: 'POST',
-            headers: this.getAuthHeaders(),
+            headers: { ...this.getAuthHeaders(), ...headers },
             body: JSON.stringify(data)
         });
     }
@@ -160,8 +160,10 @@ class ApiClient {
     }
     
     // Orders API
-    async createOrder(orderData) {
-        return this.post('/orders/', orderData);
+    async createOrder(orderData, idempotencyKey = null) {
+        // Retries with the same key return the first order instead of creating another
+        const headers = idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {};
+        return this.post('/orders/', orderData, headers);
     }
     
     async getUserOrders() {
@@ -286,9 +288,9 @@ class ApiService {
         return districts;
     }
     
-    async createOrder(orderData) {
+    async createOrder(orderData, idempotencyKey = null) {
         // Don't cache orders
-        return this.client.createOrder(orderData);
+        return this.client.createOrder(orderData, idempotencyKey);
     }
     
     async validatePromoCode(code) {
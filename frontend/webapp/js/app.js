@@ -1256,15 +1256,19 @@ class SeafoodStoreApp {
             
             console.log('🚀 Making API call to backend...');
             
+            // Kept until the order succeeds, so a retry after a timeout cannot create a duplicate
+            this.pendingOrderKey = this.pendingOrderKey || crypto.randomUUID();
+            
             // Submit to backend API with timeout
             const result = await Promise.race([
-                window.apiService.createOrder(orderData),
+                window.apiService.createOrder(orderData, this.pendingOrderKey),
                 new Promise((_, reject) => 
                     setTimeout(() => reject(new Error('API call timeout after 30 seconds')), 30000)
                 )
             ]);
             
             console.log('✅ Order created successfully:', result);
+            this.pendingOrderKey = null;
             console.log('🔍 Result type:', typeof result);
             console.log('🔍 Result keys:', Object.keys(result || {}));
             
@@ -411,15 +411,45 @@ class Router {
         }
     }
     
+    // Build srcset strings from backend image variants so the browser
+    // downloads the smallest image that covers the rendered size
+    buildSrcset(variants, format) {
+        return (variants || [])
+            .filter(variant => variant.format === format)
+            .map(variant => `${variant.url} ${variant.width}w`)
+            .join(', ');
+    }
+    
+    // Uploaded images can be resized by the API to exactly the rendered box;
+    // it picks WebP or JPEG from the Accept header. Every box requested here
+    // must be listed in the backend IMAGE_PROXY_SIZES setting
+    resizedImage(imageUrl, width, height, alt) {
+        const match = (imageUrl || '').match(/(?:^|\/)((?:products|packages)\/[^?#]+)$/);
+        if (!match) {
+            return null;
+        }
+        const url = (scale) => `/img/${width * scale}x${height * scale}/${match[1]}?fit=cover`;
+        return `<img src="${url(1)}" srcset="${url(2)} 2x, ${url(3)} 3x" width="${width}" height="${height}" alt="${alt}" loading="lazy" onerror="this.onerror=null; this.srcset=''; this.src='${imageUrl}'">`;
+    }
+    
     createProductElement(product) {
         const div = document.createElement('div');
         div.className = 'product-card';
         div.dataset.productId = product.id;
         
+        const webpSrcset = this.buildSrcset(product.image_variants, 'webp');
+        const jpegSrcset = this.buildSrcset(product.image_variants, 'jpeg');
+        const sizes = '80px';
+        const image = this.resizedImage(product.image_url, 80, 80, product.name) || `
+                    <picture>
+                        ${webpSrcset ? `<source type="image/webp" srcset="${webpSrcset}" sizes="${sizes}">` : ''}
+                        <img src="${product.image_url || '/images/placeholder.svg'}" ${jpegSrcset ? `srcset="${jpegSrcset}" sizes="${sizes}"` : ''} alt="${product.name}" loading="lazy" onerror="this.src='/images/placeholder.svg'">
+                    </picture>`;
+        
         div.innerHTML = `
             <div class="product-info">
                 <div class="product-image">
-                    <img src="${product.image_url || '/images/placeholder.svg'}" alt="${product.name}" onerror="this.src='/images/placeholder.svg'">
+                    ${image}
                 </div>
                 <div class="product-details">
                     <h3>${product.name}</h3>
@@ -416,6 +416,8 @@ class TelegramWebApp {
         orderData.user_id = this.user?.id;
         orderData.user_name = this.user?.first_name || 'Користувач';
         orderData.init_data = this.initData;
+        // Lets the bot retry the submission without creating a duplicate order
+        orderData.idempotency_key = crypto.randomUUID();
         
         // Send data to bot
         this.tg.sendData(JSON.stringify(orderData));
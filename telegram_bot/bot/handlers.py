@@ -82,7 +82,10 @@ async def handle_web_app_data(message: Message):
         print(f"💰 Total: {total} грн")
         
         # Submit order to backend API - backend will handle messaging
-        backend_result = await submit_order_to_backend(order_data)
+        backend_result = await submit_order_to_backend(
+            order_data,
+            order_data.get("idempotency_key") or f"tg-{message.chat.id}-{message.message_id}"
+        )
         
         if backend_result:
             print(f"✅ Order submitted successfully to backend")
@@ -198,8 +201,8 @@ def format_order_message(user_id: int, user_name: str, items: list, delivery: di
     return order_text
 
 
-async def submit_order_to_backend(order_data: dict):
-    """Submit order to backend API"""
+async def submit_order_to_backend(order_data: dict, idempotency_key: str = None):
+    """Submit order to backend API; resubmitting with the same key returns the same order"""
     try:
         print(f"🔄 Submitting order to backend: {BACKEND_API_URL}/orders/")
         print(f"📊 Order data keys: {list(order_data.keys())}")
@@ -211,7 +214,8 @@ async def submit_order_to_backend(order_data: dict):
                 json=order_data,
                 headers={
                     "Content-Type": "application/json",
-                    "Authorization": f"tma {order_data.get('init_data', '')}"
+                    "Authorization": f"tma {order_data.get('init_data', '')}",
+                    **({"Idempotency-Key": idempotency_key} if idempotency_key else {})
                 }
             )
             print(f"📊 Backend response status: {response.status_code}")